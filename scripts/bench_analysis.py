@@ -0,0 +1,50 @@
+"""
+Measures how long the stream analyzer takes for large synthetic traces.
+
+    python scripts/bench_analysis.py [--events N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from analysis import StreamAnalysis  # noqa: E402
+from mytypes import Keys  # noqa: E402
+
+
+def synthetic_stream(events, seed=0):
+    """Alternating down/up events of random keys with random holds and gaps"""
+    rng = np.random.default_rng(seed)
+    presses = events // 2
+    keys = rng.choice([Keys.W, Keys.A, Keys.S, Keys.D, Keys.SPACE, Keys.SHIFT, Keys.CTRL], presses)
+    starts = np.cumsum(rng.uniform(0.2, 1.5, presses))
+    holds = rng.uniform(0.05, 0.15, presses)
+
+    timestamps = np.empty(presses * 2)
+    timestamps[0::2], timestamps[1::2] = starts, starts + holds
+    downs = np.zeros(presses * 2, dtype=np.uint8)
+    downs[0::2] = 1
+    return timestamps, np.repeat(keys, 2).astype(np.uint8), downs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=1_000_000, help="Events in the synthetic trace")
+    args = parser.parse_args()
+
+    stream = synthetic_stream(args.events)
+    StreamAnalysis(*(part[:1000] for part in stream))  # warm up
+
+    start = time.perf_counter()
+    StreamAnalysis(*stream)
+    elapsed = time.perf_counter() - start
+    print(f"{args.events:,} events analyzed in {elapsed * 1000:.0f} ms ({args.events / elapsed:,.0f} events/s)")
+
+
+if __name__ == "__main__":
+    main()
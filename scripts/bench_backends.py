@@ -0,0 +1,52 @@
+"""
+Measures the per-event dispatch cost and the throughput of the input backends.
+
+The recording sink is always measured. The Windows backends deliver real key
+messages, so they are only measured against a window passed with --hwnd.
+
+    python scripts/bench_backends.py [--events N] [--hwnd HANDLE]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from backends import BACKENDS, RecordingBackend  # noqa: E402
+from sender import Keys  # noqa: E402
+
+
+def measure(backend, hwnd, events):
+    """Returns the average cost of one event in seconds"""
+    send = backend.send
+    key = Keys.W
+    start = time.perf_counter()
+    for i in range(events // 2):
+        send(hwnd, key, True)
+        send(hwnd, key, False)
+    return (time.perf_counter() - start) / events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=1_000_000, help="Events sent to each backend")
+    parser.add_argument("--hwnd", type=lambda value: int(value, 0), help="Window receiving real key messages")
+    args = parser.parse_args()
+
+    targets = [(RecordingBackend(), 0)]
+    if args.hwnd is not None:
+        for name, backend_class in BACKENDS.items():
+            if backend_class is not RecordingBackend:
+                targets.append((backend_class(), args.hwnd))
+
+    print(f"{'backend':<12} {'ns/event':>10} {'events/s':>14}")
+    for backend, hwnd in targets:
+        cost = measure(backend, hwnd, args.events)
+        print(f"{backend.name:<12} {cost * 1e9:>10.1f} {1 / cost:>14,.0f}")
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Load test of the control API with many concurrent clients.
+
+A control server is started in a child process against the recording sink.
+One client starts a WASD sender and measures its event rate alone, then
+every client connects at once and sends its commands one after another,
+alternating status and update_settings with a new value every time. The
+latency of every command and the total throughput are reported, and the
+benchmark fails if the sender fell below half of its event rate under the
+load, e.g. because every settings change restarted its movement.
+
+    python scripts/bench_control.py [--clients N] [--commands M]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+from control import PIPE_PREFIX, open_connection  # noqa: E402
+from metrics import UNIX_PREFIX  # noqa: E402
+
+STARTUP_TIMEOUT = 10.0
+BASELINE_SECONDS = 3.0  # the sender runs alone this long before the load starts
+MIN_RATE_SHARE = 0.5  # share of its own event rate the sender must keep under the load
+SENDER_SETTINGS = {"heavy_mode_delay": 0.2, "pause_frequency": 0.0, "movement_intensity": 0.5}
+
+
+async def command(reader, writer, request: dict) -> dict:
+    writer.write(json.dumps(request).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def client(address: str, commands: int, latencies: list, errors: list):
+    reader, writer = await open_connection(address)
+    try:
+        for index in range(commands):
+            if index % 2:
+                request = {"id": index, "command": "update_settings",
+                           "settings": {"movement_intensity": 0.1 + index % 90 / 100}}
+            else:
+                request = {"id": index, "command": "status"}
+            began = time.perf_counter()
+            reply = await command(reader, writer, request)
+            latencies.append(time.perf_counter() - began)
+            if not reply["ok"] or reply.get("id") != index:
+                errors.append(reply)
+    finally:
+        writer.close()
+
+
+async def connect_when_ready(address: str):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while True:
+        try:
+            return await open_connection(address)
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def run(address: str, clients: int, commands: int) -> bool:
+    """Runs the load test, returns whether the sender kept its event rate"""
+    reader, writer = await connect_when_ready(address)
+    reply = await command(reader, writer, {"command": "start", "mode": "WASD", "settings": SENDER_SETTINGS})
+    if not reply["ok"]:
+        raise RuntimeError(reply["error"])
+
+    await asyncio.sleep(BASELINE_SECONDS)
+    before = (await command(reader, writer, {"command": "status"}))["events_sent"]
+    baseline_rate = before / BASELINE_SECONDS
+
+    latencies, errors = [], []
+    began = time.perf_counter()
+    await asyncio.gather(*(client(address, commands, latencies, errors) for _ in range(clients)))
+    elapsed = time.perf_counter() - began
+
+    status = await command(reader, writer, {"command": "stop"})
+    writer.close()
+    load_rate = (status["events_sent"] - before) / elapsed
+
+    latencies.sort()
+    print(f"{clients} clients x {commands} commands in {elapsed:.2f} s, {len(latencies) / elapsed:,.0f} commands/s")
+    print(f"latency p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+    kept = load_rate >= MIN_RATE_SHARE * baseline_rate
+    print(f"errors {len(errors)}, sender {load_rate:.1f} key events/s under load, {baseline_rate:.1f} alone"
+          f"{'' if kept else ' - STARVED'}")
+    return kept and not errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=200, help="Concurrent control clients")
+    parser.add_argument("--commands", type=int, default=100, help="Commands sent by every client")
+    args = parser.parse_args()
+
+    if sys.platform == "win32":
+        address = f"{PIPE_PREFIX}valorant-afk-bench-{os.getpid()}"
+    else:
+        address = f"{UNIX_PREFIX}{os.path.join(tempfile.gettempdir(), f'valorant-afk-bench-{os.getpid()}.sock')}"
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(SRC, "control.py"), address, "--hwnd", "1", "--backend", "recording",
+         "--log-level", "WARNING"],
+    )
+    try:
+        passed = asyncio.run(run(address, args.clients, args.commands))
+    finally:
+        server.terminate()
+        server.wait(5)
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
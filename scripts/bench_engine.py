@@ -0,0 +1,90 @@
+"""
+Measures how the multi-target engine scales with the number of driven windows.
+
+Every step runs N virtual targets against the recording sink in real time, half
+of them in light mode and half in WASD mode, and reports the aggregate dispatch
+rate, the CPU time spent and how late the scheduler ran its callbacks. With
+--baseline the same targets are also run as one KeySender thread each.
+
+    python scripts/bench_engine.py [--seconds S] [--targets 1 10 100 500] [--baseline]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from backends import RecordingBackend  # noqa: E402
+from engine import MultiTargetEngine  # noqa: E402
+from sender import KeySender, Mode  # noqa: E402
+
+SETTINGS = {
+    Mode.LIGHT: {"light_mode_delay": 1.0},
+    Mode.HEAVY: {"heavy_mode_delay": 0.2, "pause_frequency": 0.1},
+}
+
+
+def modes(count):
+    return [Mode.LIGHT if i % 2 else Mode.HEAVY for i in range(count)]
+
+
+def run_engine(count, seconds):
+    """Returns the events sent, the CPU time, the mean and the max callback lag"""
+    engine = MultiTargetEngine(backend=RecordingBackend())
+    engine.start()
+    cpu = time.process_time()
+    for hwnd, mode in enumerate(modes(count), start=1):
+        engine.add_target(mode, hwnd, SETTINGS[mode])
+    time.sleep(seconds)
+    events = engine.events_sent
+    engine.stop()
+    engine.join()
+    return events, time.process_time() - cpu, engine.scheduler.mean_lag, engine.scheduler.lag_max
+
+
+def run_threads(count, seconds):
+    """Returns the events sent, the CPU time, the mean and the max callback lag"""
+    backend = RecordingBackend()
+    senders = []
+    cpu = time.process_time()
+    for hwnd, mode in enumerate(modes(count), start=1):
+        sender = KeySender(mode, hwnd, backend=backend)
+        sender.update_settings(SETTINGS[mode])
+        sender.start()
+        senders.append(sender)
+    time.sleep(seconds)
+    events = sum(sender.events_sent for sender in senders)
+    for sender in senders:
+        sender.stop()
+    for sender in senders:
+        sender.join()
+    actions = sum(sender.actions for sender in senders)
+    mean_lag = sum(sender.mean_lag * sender.actions for sender in senders) / actions if actions else 0.0
+    return events, time.process_time() - cpu, mean_lag, max(sender.max_lag for sender in senders)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0, help="Real time every step runs for")
+    parser.add_argument("--targets", type=int, nargs="+", default=[1, 10, 50, 100, 250, 500])
+    parser.add_argument("--baseline", action="store_true", help="Also run one thread per target")
+    args = parser.parse_args()
+
+    runners = [("engine", run_engine)]
+    if args.baseline:
+        runners.append(("threads", run_threads))
+
+    print(f"{'runner':<8} {'targets':>8} {'events/s':>10} {'per target':>11} {'CPU %':>7} "
+          f"{'mean lag ms':>12} {'max lag ms':>11}")
+    for count in args.targets:
+        for name, runner in runners:
+            events, cpu, mean_lag, max_lag = runner(count, args.seconds)
+            rate = events / args.seconds
+            print(f"{name:<8} {count:>8} {rate:>10,.1f} {rate / count:>11.2f} {cpu / args.seconds * 100:>7.1f} "
+                  f"{mean_lag * 1000:>12.3f} {max_lag * 1000:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Measures the cost of console appends as the log grows.
+
+Lines are appended to the bounded log model in flush-sized batches while its
+view is shown, and the average cost per line is reported for every slice of
+the run. With --baseline the old unbounded HTML QTextEdit console is measured
+the same way for a shorter run.
+
+    QT_QPA_PLATFORM=offscreen python scripts/bench_logview.py [--lines N] [--baseline]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from PyQt6.QtWidgets import QApplication, QTextEdit  # noqa: E402
+
+from logview import LogModel, LogView  # noqa: E402
+from mytypes import LoggingLevel  # noqa: E402
+
+BATCH = 250  # lines appended between two flushes, about a second of a chatty session
+SLICES = 10
+
+
+def bench_model(lines, max_lines):
+    model = LogModel(max_lines, flush_interval=0)
+    view = LogView(model)
+    view.resize(400, 300)
+    view.show()
+    app = QApplication.instance()
+
+    def append_batch(first):
+        for i in range(first, first + BATCH):
+            model.append(f"Settings updated: {{'movement_intensity': {i % 100 / 100}}}", LoggingLevel.INFO)
+        model.flush()
+        app.processEvents()
+
+    return measure(append_batch, lines)
+
+
+def bench_text_edit(lines):
+    console = QTextEdit()
+    console.setReadOnly(True)
+    console.resize(400, 300)
+    console.show()
+    app = QApplication.instance()
+
+    def append_batch(first):
+        for i in range(first, first + BATCH):
+            scrollbar = console.verticalScrollBar()
+            at_bottom = scrollbar.value() == scrollbar.maximum()
+            console.append(
+                f"<span style='color: #999999;'>[00:00:00] [INFO]</span> "
+                f"<span style='color: #ffffff;'>Settings updated: {{'movement_intensity': {i % 100 / 100}}}</span>"
+            )
+            if at_bottom:
+                scrollbar.setValue(scrollbar.maximum())
+        app.processEvents()
+
+    return measure(append_batch, lines)
+
+
+def measure(append_batch, lines):
+    """Returns the average cost of one line in microseconds for every slice of the run"""
+    per_slice = max(BATCH, lines // SLICES // BATCH * BATCH)
+    costs = []
+    for start in range(0, lines, per_slice):
+        began = time.perf_counter()
+        for first in range(start, start + per_slice, BATCH):
+            append_batch(first)
+        costs.append((start + per_slice, (time.perf_counter() - began) / per_slice * 1e6))
+    return costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=1_000_000, help="Lines appended to the log model")
+    parser.add_argument("--max-lines", type=int, default=LogModel.DEFAULT_MAX_LINES, help="Line cap of the model")
+    parser.add_argument("--baseline", action="store_true", help="Also measure the QTextEdit console")
+    parser.add_argument("--baseline-lines", type=int, default=50_000, help="Lines appended to the QTextEdit")
+    args = parser.parse_args()
+
+    app = QApplication([])  # noqa: F841
+
+    runs = [("log model", bench_model(args.lines, args.max_lines))]
+    if args.baseline:
+        runs.append(("QTextEdit", bench_text_edit(args.baseline_lines)))
+
+    for name, costs in runs:
+        print(name)
+        print(f"{'lines':>12} {'us/line':>10}")
+        for lines, cost in costs:
+            print(f"{lines:>12,} {cost:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
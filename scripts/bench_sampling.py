@@ -0,0 +1,95 @@
+"""
+Compares the draws per second of the random module with the block sampler.
+
+The micro benchmark draws from single call sites, the timeline benchmark
+generates WASD timeline blocks, which exercise every humanization call site.
+
+    python scripts/bench_sampling.py [--draws N] [--blocks N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from sampling import Sampler, UnbufferedSampler  # noqa: E402
+from sender import KeySender, Mode  # noqa: E402
+from backends import RecordingBackend  # noqa: E402
+from timeline import MovementTimeline  # noqa: E402
+
+
+def rate(function, draws):
+    """Returns how many times per second the function can be called"""
+    start = time.perf_counter()
+    for _ in range(draws):
+        function()
+    return draws / (time.perf_counter() - start)
+
+
+def timeline_rate(sampler, blocks):
+    """Returns the number of random draws per second made while generating WASD blocks"""
+    sender = KeySender(Mode.HEAVY, 0, backend=RecordingBackend())
+    sender.update_settings({"action_probability": 1.0, "pause_frequency": 0.2})
+
+    counted = CountingSampler(sampler)
+    timeline = MovementTimeline(**sender._compiled_settings(), sampler=counted)
+    for _ in range(blocks // 10):  # warm up and count draws per block
+        timeline.fill()
+    draws_per_block = counted.draws / (blocks // 10)
+
+    timeline = MovementTimeline(**sender._compiled_settings(), sampler=sampler)
+    start = time.perf_counter()
+    for _ in range(blocks):
+        timeline.fill()
+    return blocks * draws_per_block / (time.perf_counter() - start)
+
+
+class CountingSampler:
+    """Wraps a sampler and counts every draw"""
+
+    def __init__(self, sampler):
+        self._sampler = sampler
+        self.draws = 0
+
+    def _counted(self, draw):
+        def counted():
+            self.draws += 1
+            return draw()
+        return counted
+
+    def stream(self, *args):
+        return self._counted(self._sampler.stream(*args))
+
+    def integers(self, *args):
+        return self._counted(self._sampler.integers(*args))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--draws", type=int, default=2_000_000, help="Draws for every micro benchmark")
+    parser.add_argument("--blocks", type=int, default=2_000, help="Timeline blocks generated")
+    args = parser.parse_args()
+
+    sampler = Sampler()
+    cases = [
+        ("random()", random.random, sampler.stream("bench")),
+        ("uniform(0.85, 1.15)", lambda: random.uniform(0.85, 1.15), sampler.stream("bench", 0.85, 1.15)),
+        ("randint(3, 8)", lambda: random.randint(3, 8), sampler.integers("bench", 3, 8)),
+    ]
+
+    print(f"{'call site':<22} {'random/s':>14} {'sampler/s':>14} {'speedup':>8}")
+    for name, before, after in cases:
+        before_rate = rate(before, args.draws)
+        after_rate = rate(after, args.draws)
+        print(f"{name:<22} {before_rate:>14,.0f} {after_rate:>14,.0f} {after_rate / before_rate:>7.2f}x")
+
+    before_rate = timeline_rate(UnbufferedSampler(), args.blocks)
+    after_rate = timeline_rate(Sampler(), args.blocks)
+    print(f"{'WASD timeline':<22} {before_rate:>14,.0f} {after_rate:>14,.0f} {after_rate / before_rate:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
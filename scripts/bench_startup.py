@@ -0,0 +1,105 @@
+"""
+Measures the cold start time and the peak memory of the headless entry point
+and of the GUI.
+
+The headless run starts the sender against the recording sink and stops it
+right away. The GUI run builds the main window and quits on the first event
+loop iteration. Every run is a fresh interpreter, the best and the median of
+several runs are reported.
+
+    python scripts/bench_startup.py [--runs N] [--skip-gui]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+HEADLESS = [
+    sys.executable, os.path.join(SRC, "headless.py"),
+    "--hwnd", "1", "--backend", "recording", "--duration", "0", "--log-level", "WARNING",
+]
+
+GUI = [sys.executable, "-c", f"""
+import sys
+sys.path.insert(0, {SRC!r})
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication
+from window import MainWindow
+app = QApplication([])
+window = MainWindow()
+window.show()
+QTimer.singleShot(0, app.quit)
+app.exec()
+window.close()
+"""]
+
+NO_QT_CHECK = [sys.executable, "-c", f"""
+import sys
+sys.path.insert(0, {SRC!r})
+import headless
+sys.exit(1 if "PyQt6" in sys.modules else 0)
+"""]
+
+
+def run(command):
+    """Returns the wall time in seconds and the peak RSS in MB of the command, None if unknown"""
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        peak = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    else:
+        peak = None
+        try:
+            import psutil
+
+            monitored = psutil.Process(process.pid)
+            while process.poll() is None:
+                peak = monitored.memory_info().peak_wset / (1024 * 1024)
+                time.sleep(0.005)
+        except Exception:
+            pass
+        process.wait()
+        elapsed = time.perf_counter() - start
+
+    if process.returncode:
+        raise RuntimeError(process.stderr.read().decode(errors="replace").strip().splitlines()[-1])
+    return elapsed, peak
+
+
+def report(name, command, runs):
+    try:
+        results = [run(command) for _ in range(runs)]
+    except RuntimeError as e:
+        print(f"{name:<10} failed: {e}")
+        return
+
+    times = [elapsed * 1000 for elapsed, _ in results]
+    peaks = [peak for _, peak in results if peak is not None]
+    memory = f"{statistics.median(peaks):>10.1f}" if peaks else f"{'n/a':>10}"
+    print(f"{name:<10} {min(times):>10.1f} {statistics.median(times):>10.1f} {memory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters started for each entry point")
+    parser.add_argument("--skip-gui", action="store_true", help="Only measure the headless entry point")
+    args = parser.parse_args()
+
+    print(f"headless imports PyQt6: {'yes' if subprocess.call(NO_QT_CHECK) else 'no'}")
+    print(f"{'entry':<10} {'best ms':>10} {'median ms':>10} {'peak MB':>10}")
+    report("headless", HEADLESS, args.runs)
+    if not args.skip_gui:
+        report("gui", GUI, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Measures how accurately every timing strategy of the scheduler holds keys.
+
+Holds of the lengths the sender uses, the 0.1 s press and the 0.05-0.15 s
+combo gaps, are chained on a real-time scheduler. Every hold ends in the
+callback scheduled for its end, and the error is how much longer the hold
+was than requested. The CPU time shows what the precision costs.
+
+    python scripts/bench_timing.py [--holds N] [--timers coarse hybrid]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from scheduler import DeadlineScheduler  # noqa: E402
+from timing import TIMERS  # noqa: E402
+
+
+def measure(timer, holds):
+    """Returns the errors of the holds in seconds and the share of the wall time spent on the CPU"""
+    scheduler = DeadlineScheduler(timer=timer)
+    durations = [random.choice((0.1, random.uniform(0.05, 0.15))) for _ in range(holds)]
+    errors = []
+    started = [0.0]
+
+    def hold_end(index):
+        now = time.perf_counter()
+        errors.append(now - started[0] - durations[index])
+        if index + 1 < holds:
+            started[0] = now
+            scheduler.call_later(durations[index + 1], hold_end, index + 1)
+
+    cpu, wall = time.process_time(), time.perf_counter()
+    started[0] = wall
+    scheduler.call_later(durations[0], hold_end, 0)
+    scheduler.run()
+    return errors, (time.process_time() - cpu) / (time.perf_counter() - wall)
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--holds", type=int, default=200, help="Holds measured per strategy")
+    parser.add_argument("--timers", nargs="+", default=list(TIMERS), choices=list(TIMERS), help="Strategies to measure")
+    args = parser.parse_args()
+
+    print(f"{'timer':<8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'cpu %':>7}  details")
+    for name in args.timers:
+        timer = TIMERS[name]()
+        errors, cpu_share = measure(timer, args.holds)
+        print(
+            f"{name:<8} {percentile(errors, 0.5) * 1000:>8.3f} {percentile(errors, 0.99) * 1000:>8.3f} "
+            f"{max(errors) * 1000:>8.3f} {cpu_share * 100:>6.1f}%  {timer.summary()}"
+        )
+
+
+if __name__ == "__main__":
+    main()
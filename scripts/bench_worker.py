@@ -0,0 +1,65 @@
+"""
+Compares the timing jitter of a KeySender thread with a sender process.
+
+The sender runs in WASD mode against the recording sink, while the main thread
+emulates a busy GUI with pure-Python work holding the GIL. Jitter is how late
+the sender ran its scheduled key events, as measured by its own scheduler.
+
+    python scripts/bench_worker.py [--seconds S] [--load 0.0-1.0]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from backends import RecordingBackend  # noqa: E402
+from sender import KeySender, Mode  # noqa: E402
+from worker import SenderProcess  # noqa: E402
+
+SETTINGS = {"heavy_mode_delay": 0.2, "pause_frequency": 0.1}
+LOAD_SLICE = 0.02  # seconds of every busy period
+
+
+def busy_gui(seconds, load):
+    """Keeps the main thread busy with Python work for the given share of the time"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        busy_until = time.perf_counter() + LOAD_SLICE * load
+        lines = []
+        while time.perf_counter() < busy_until:
+            lines.append(f"<span>{len(lines)}</span>")  # like formatting console lines
+        time.sleep(LOAD_SLICE * (1 - load))
+
+
+def measure(sender, seconds, load):
+    sender.update_settings(SETTINGS)
+    sender.start()
+    busy_gui(seconds, load)
+    sender.stop()
+    sender.join()
+    return sender.events_sent, sender.mean_lag, sender.max_lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=10.0, help="Real time every sender runs for")
+    parser.add_argument("--load", type=float, default=0.8, help="Share of time the emulated GUI is busy")
+    args = parser.parse_args()
+
+    senders = [
+        ("thread", KeySender(Mode.HEAVY, 1, backend=RecordingBackend())),
+        ("process", SenderProcess(Mode.HEAVY, 1, backend_name=RecordingBackend.name)),
+    ]
+
+    print(f"GUI load {args.load:.0%}")
+    print(f"{'sender':<8} {'events':>8} {'mean lag ms':>12} {'max lag ms':>11}")
+    for name, sender in senders:
+        events, mean_lag, max_lag = measure(sender, args.seconds, args.load)
+        print(f"{name:<8} {events:>8} {mean_lag * 1000:>12.3f} {max_lag * 1000:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -26,11 +26,12 @@ call venv\Scripts\activate
 
 :: Install dependencies
 echo Installing dependencies...
-pip install PyQt6 pywin32 pyinstaller
+pip install PyQt6 pywin32 numpy pyinstaller
 
 :: Build executable with PyInstaller
 echo Building executable...
 pyinstaller --noconfirm --onefile --windowed --icon=assets/icon.ico --add-data="assets;assets/" --name="Valorant-AntiAFK" src/main.py
+pyinstaller --noconfirm --onefile --console --exclude-module PyQt6 --name="Valorant-AntiAFK-Headless" src/headless.py
 
 :: Deactivate virtual environment
 call venv\Scripts\deactivate
@@ -0,0 +1,128 @@
+"""
+Checks when the idle policy lets a sender inject keys.
+
+The policy is driven by a stub activity source with a fixed idle time,
+foreground window and minimized state, then a WASD sender runs on a virtual
+clock against a hand-set source while the user plays and stops playing:
+
+- minimized, the policy only rechecks later; in the background, it injects
+- while the user plays, it suspends until the ramp before the AFK deadline
+- over the ramp it injects a growing share of the time, then it stays at 0
+- the sender sends nothing while the user plays and keeps sending after the ramp
+
+    python scripts/check_activity.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from activity import IdlePolicy, ManualActivitySource  # noqa: E402
+from backends import RecordingBackend  # noqa: E402
+from mytypes import Mode  # noqa: E402
+from sampling import Sampler  # noqa: E402
+from scheduler import DeadlineScheduler  # noqa: E402
+from sender import KeySender  # noqa: E402
+from simulation import VirtualClock  # noqa: E402
+
+GAME = 0x1A2B
+AFK_TIMEOUT = 60.0
+
+
+class StubSource:
+    """Activity source answering with fixed values"""
+
+    def __init__(self, idle: float = 0.0, foreground=GAME, minimized: bool = False):
+        self.idle = idle
+        self.foreground_hwnd = foreground
+        self.minimized = minimized
+
+    def idle_seconds(self) -> float:
+        return self.idle
+
+    def foreground(self):
+        return self.foreground_hwnd
+
+    def is_minimized(self, hwnd) -> bool:
+        return self.minimized
+
+
+def check_policy(check):
+    policy = IdlePolicy(StubSource(), lead=15.0, ramp=10.0)
+    resume_after = AFK_TIMEOUT - policy.lead
+    ramp_start = resume_after - policy.ramp
+
+    def suspend(**state):
+        policy.source = StubSource(**state)
+        return policy.suspend_for(GAME, AFK_TIMEOUT)
+
+    check("minimized game is rechecked later", suspend(minimized=True) == IdlePolicy.HIDDEN_RECHECK)
+    check("background game is injected", suspend(foreground=0x3C4D) == 0.0)
+    check("playing suspends until the ramp", abs(suspend(idle=0.0) - ramp_start) < 1e-9)
+    check("a few seconds of play are subtracted", abs(suspend(idle=12.5) - (ramp_start - 12.5)) < 1e-9)
+
+    # Share of every ramp slice spent injecting, sampled every 10 ms
+    shares = []
+    for start in range(int(policy.ramp / IdlePolicy.RAMP_SLICE)):
+        samples = [ramp_start + (start + index / 200) * IdlePolicy.RAMP_SLICE for index in range(200)]
+        shares.append(sum(suspend(idle=idle) == 0.0 for idle in samples) / len(samples))
+    check(
+        f"ramp injects a growing share: {', '.join(f'{share:.2f}' for share in shares)}",
+        shares[0] < 0.05 and shares[-1] > 0.7 and all(a < b for a, b in zip(shares, shares[1:])),
+    )
+    waits = [suspend(idle=ramp_start + index * 0.01) for index in range(int(policy.ramp * 100))]
+    check("ramp suspensions end within a slice", max(waits) <= IdlePolicy.RAMP_SLICE + 1e-9)
+    check("back to 0 at the resume point", suspend(idle=resume_after) == 0.0)
+    check("stays at 0 past the AFK deadline", all(suspend(idle=AFK_TIMEOUT + extra) == 0.0 for extra in (0, 5, 600)))
+
+
+def check_sender(check):
+    clock = VirtualClock()
+    scheduler = DeadlineScheduler(clock=clock.monotonic, sleep=clock.advance)
+    backend = RecordingBackend(clock=clock.monotonic)
+    source = ManualActivitySource(clock.monotonic)
+    source.foreground_hwnd = GAME
+    sender = KeySender(
+        Mode.HEAVY, GAME, backend=backend, scheduler=scheduler, sampler=Sampler(1), activity_source=source
+    )
+    sender.update_settings({"idle_aware": True, "afk_timeout": AFK_TIMEOUT})
+
+    # The user plays for 5 minutes, then walks away
+    last_input = 290.0
+    for at in range(0, int(last_input) + 1, 10):
+        scheduler.call_at(float(at), source.input)
+    scheduler.call_at(600.0, sender.stop)
+    sender.run()
+
+    policy = IdlePolicy(source)
+    resume_after = last_input + AFK_TIMEOUT - policy.lead
+    timestamps = list(backend.timestamps)
+
+    def sent(start, end):
+        return sum(start <= timestamp < end for timestamp in timestamps)
+
+    playing = sent(0, resume_after - policy.ramp)
+    ramp = sent(resume_after - policy.ramp, resume_after)
+    resumed = sent(resume_after, last_input + AFK_TIMEOUT)
+    check(f"nothing sent while playing: {playing}", playing == 0)
+    check(f"keys sent over the ramp: {ramp}", ramp > 0)
+    check(f"keys sent until the AFK deadline: {resumed}", resumed > 0)
+    check("not suspended after the ramp", not sender.suspended)
+
+
+def main() -> int:
+    failures = []
+
+    def check(name, passed):
+        if not passed:
+            failures.append(name)
+        print(f"{'ok  ' if passed else 'FAIL'} {name}")
+
+    check_policy(check)
+    check_sender(check)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
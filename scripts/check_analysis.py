@@ -0,0 +1,49 @@
+"""
+Checks that the stream analyzer tells fixed movement patterns from random movement.
+
+Simulated sessions with default settings are analyzed: every fixed pattern
+must be reported as periodic, RANDOM movement must not be.
+
+    python scripts/check_analysis.py [--hours H] [--seed S]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from analysis import analyze  # noqa: E402
+from mytypes import Mode, MovementPattern  # noqa: E402
+from simulation import simulate  # noqa: E402
+
+EXPECTED = {
+    MovementPattern.CIRCLE: True,
+    MovementPattern.STRAFE: True,
+    MovementPattern.FORWARD_BACK: True,
+    MovementPattern.CUSTOM: True,
+    MovementPattern.RANDOM: False,
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hours", type=float, default=1.0, help="Simulated length of every session")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the simulations")
+    args = parser.parse_args()
+
+    failures = 0
+    for pattern, periodic in EXPECTED.items():
+        result = simulate(Mode.HEAVY, args.hours * 3600, {"pattern_type": pattern.value}, args.seed)
+        analysis = analyze(result.events)
+        passed = analysis.periodic == periodic
+        failures += not passed
+        print(
+            f"{'ok  ' if passed else 'FAIL'} {pattern.value:<13} periodicity {analysis.periodicity:.2f} "
+            f"at period {analysis.period}, expected {'periodic' if periodic else 'not periodic'}"
+        )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Checks how the window discovery caches and invalidates the game window.
+
+A stub window source stands in for the desktop. The discovery is checked
+step by step while the game window appears, is renamed, disappears and comes
+back with a new handle, then its thread is run against the notifications of
+the stub:
+
+- a cached handle is only revalidated, all windows are enumerated again
+  only when it dies or while no window is found
+- on_change is called once for every change of the handle
+- a notification of the source is picked up without waiting for the rescan
+
+    python scripts/check_discovery.py
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from discovery import WindowDiscovery  # noqa: E402
+
+NAME = "VALORANT"
+
+
+class StubWindowSource:
+    """Top-level windows set by hand, counting the calls of the discovery"""
+
+    def __init__(self):
+        self.windows = {}  # handle: title
+        self.finds = 0
+        self.liveness_checks = 0
+        self.notify = None
+        self.unwatched = False
+
+    def find(self, window_name: str):
+        self.finds += 1
+        return next((hwnd for hwnd, title in self.windows.items() if window_name in title), None)
+
+    def is_alive(self, hwnd, window_name: str) -> bool:
+        self.liveness_checks += 1
+        return window_name in self.windows.get(hwnd, "")
+
+    def watch(self, notify):
+        self.notify = notify
+
+    def unwatch(self):
+        self.unwatched = True
+
+
+def check_cache(check):
+    source = StubWindowSource()
+    changes = []
+    discovery = WindowDiscovery(NAME, source=source, on_change=changes.append)
+
+    discovery.check()
+    check("no window: enumerated, nothing reported", discovery.hwnd is None and source.finds == 1 and not changes)
+
+    source.windows[0x10] = "VALORANT  "
+    discovery.check()
+    check("window appears: found and reported", discovery.hwnd == 0x10 and changes == [0x10])
+
+    for _ in range(5):
+        discovery.check()
+    check(
+        f"cached window: revalidated {source.liveness_checks} times, enumerated {source.finds} times",
+        source.finds == 2 and source.liveness_checks == 5 and discovery.revalidations == 5,
+    )
+
+    source.windows[0x10] = "Riot Client"
+    discovery.check()
+    check("window renamed: invalidated and reported", discovery.hwnd is None and changes == [0x10, None])
+    check("invalid handle: enumerated again", source.finds == 3)
+
+    source.windows.pop(0x10)
+    source.windows[0x20] = "VALORANT  "
+    discovery.check()
+    check("new handle: found and reported", discovery.hwnd == 0x20 and changes == [0x10, None, 0x20])
+    check(f"full scans counted: {discovery.full_scans}", discovery.full_scans == 4)
+
+
+def check_thread(check):
+    source = StubWindowSource()
+    found = threading.Event()
+
+    def on_change(hwnd):
+        if hwnd is not None:
+            found.set()
+
+    # Long intervals, so only the notification can find the window in time
+    discovery = WindowDiscovery(
+        NAME, source=source, on_change=on_change, revalidate_interval=60.0, rescan_interval=60.0,
+        coalesce_interval=0.01,
+    )
+    discovery.start()
+    try:
+        for _ in range(100):
+            if source.finds:
+                break
+            found.wait(0.01)
+        check("thread watches the source", source.notify is not None and source.finds == 1)
+
+        source.windows[0x30] = "VALORANT  "
+        source.notify()
+        check("notification finds the window", found.wait(1.0) and discovery.hwnd == 0x30)
+    finally:
+        discovery.stop()
+        discovery.join(1.0)
+    check("thread stops and unwatches", not discovery.is_alive() and source.unwatched)
+
+
+def main() -> int:
+    failures = []
+
+    def check(name, passed):
+        if not passed:
+            failures.append(name)
+        print(f"{'ok  ' if passed else 'FAIL'} {name}")
+
+    check_cache(check)
+    check_thread(check)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+Scrapes a metrics exporter, like Prometheus would, and prints the metrics.
+
+With --count the exporter is scraped repeatedly and the scrape latency is
+reported instead, e.g. to check that scraping does not disturb a sender.
+
+    python scripts/scrape_metrics.py 127.0.0.1:9464 [--count N] [--filter NAME]
+    python scripts/scrape_metrics.py unix:/tmp/afk-metrics.sock
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from metrics import parse, scrape  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("address", help="host:port or unix:/path of the exporter")
+    parser.add_argument("--count", type=int, default=1, help="Number of scrapes")
+    parser.add_argument("--filter", help="Only print the samples whose name contains this")
+    args = parser.parse_args()
+
+    latencies = []
+    for _ in range(args.count):
+        began = time.perf_counter()
+        text = scrape(args.address)
+        latencies.append(time.perf_counter() - began)
+
+    if args.count > 1:
+        latencies.sort()
+        print(f"{args.count} scrapes, {len(parse(text))} samples")
+        print(f"latency p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+    elif args.filter:
+        for sample, value in parse(text).items():
+            if args.filter in sample:
+                print(sample, value)
+    else:
+        print(text, end="")
+
+
+if __name__ == "__main__":
+    main()
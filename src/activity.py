@@ -0,0 +1,122 @@
+"""
+Activity of the real user and of the game window, and the policy deciding
+when a sender may inject keys.
+
+Keys are only needed when the game would otherwise see no input until its
+AFK deadline. While the user plays, the game is the foreground window and
+receives real input, so the sender stays suspended until shortly before the
+deadline that input has pushed out. Injection resumes gradually over a short
+ramp, so a late wakeup never leaves the deadline without keys. While the game
+is minimized nothing is injected at all. Sources are plain objects, so the policy runs anywhere:
+
+    source = ManualActivitySource()
+    policy = IdlePolicy(source)
+    policy.suspend_for(hwnd, afk_timeout=60.0)  # 0 if the sender may inject now
+"""
+
+import ctypes
+import time
+
+from mytypes import Handle
+
+
+class Win32ActivitySource:
+    """
+    Last input of the session and the state of the game window, read from Win32.
+    GetLastInputInfo also counts input injected with SendInput, so this source
+    only tells the user apart from a sender that posts window messages
+    """
+
+    def __init__(self):
+        import win32gui
+        from ctypes import wintypes
+
+        class LASTINPUTINFO(ctypes.Structure):
+            _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+
+        self._win32gui = win32gui
+        self._user32 = ctypes.windll.user32
+        self._kernel32 = ctypes.windll.kernel32
+        self._last_input = LASTINPUTINFO()
+        self._last_input.cbSize = ctypes.sizeof(LASTINPUTINFO)
+
+    def idle_seconds(self) -> float:
+        """Seconds since the last keyboard or mouse input of the user"""
+        if not self._user32.GetLastInputInfo(ctypes.byref(self._last_input)):
+            return 0.0
+        # Both are 32-bit millisecond tick counts, the difference survives the wraparound
+        return ((self._kernel32.GetTickCount() - self._last_input.dwTime) & 0xFFFFFFFF) / 1000
+
+    def foreground(self) -> Handle | None:
+        return self._win32gui.GetForegroundWindow() or None
+
+    def is_minimized(self, hwnd: Handle) -> bool:
+        return bool(self._win32gui.IsIconic(hwnd))
+
+
+class ManualActivitySource:
+    """Activity set by hand, for tests and simulations on any platform"""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self.last_input = clock()
+        self.foreground_hwnd = None
+        self.minimized = False
+
+    def input(self):
+        """Records real user input at the current time"""
+        self.last_input = self._clock()
+
+    def idle_seconds(self) -> float:
+        return self._clock() - self.last_input
+
+    def foreground(self) -> Handle | None:
+        return self.foreground_hwnd
+
+    def is_minimized(self, hwnd: Handle) -> bool:
+        return self.minimized
+
+
+class IdlePolicy:
+    """Decides from an activity source whether injecting keys is needed"""
+
+    DEFAULT_LEAD = 15.0  # seconds before the AFK deadline the sender resumes
+    DEFAULT_RAMP = 10.0  # seconds before the resume point injection starts to come back
+    RAMP_SLICE = 2.0  # seconds of every period of the ramp, each one injects a larger share of it
+    HIDDEN_RECHECK = 2.0  # seconds between checks while the game is minimized
+    MIN_SUSPEND = 0.001  # shorter pauses are not worth a wakeup, and absorb clock rounding
+
+    def __init__(self, source, lead: float = DEFAULT_LEAD, ramp: float = DEFAULT_RAMP):
+        """
+        :param source: Object with idle_seconds(), foreground() and is_minimized(hwnd) methods
+        :param lead: Seconds before the AFK deadline injection fully resumes
+        :param ramp: Seconds before the full resumption during which a growing share of the time is injected
+        """
+        self.source = source
+        self.lead = lead
+        self.ramp = ramp
+
+    def suspend_for(self, hwnd: Handle, afk_timeout: float) -> float:
+        """
+        Returns how long injection should stay suspended, 0 if the sender may inject now
+        :param hwnd: The game window
+        :param afk_timeout: Seconds without input after which the game considers the player AFK
+        """
+        source = self.source
+        if source.is_minimized(hwnd):
+            return self.HIDDEN_RECHECK
+
+        # Input only reaches the game while it is the foreground window
+        if source.foreground() == hwnd:
+            remaining = afk_timeout - self.lead - source.idle_seconds()
+            ramp = self.ramp
+            if remaining > ramp:
+                return remaining - ramp
+            if remaining > self.MIN_SUSPEND:
+                # Every slice of the ramp starts with injection, for a share growing from 0 to 1
+                offset = (ramp - remaining) % self.RAMP_SLICE
+                if offset >= (1 - remaining / ramp) * self.RAMP_SLICE:
+                    wait = min(self.RAMP_SLICE - offset, remaining)
+                    if wait > self.MIN_SUSPEND:
+                        return wait
+        return 0.0
@@ -0,0 +1,230 @@
+"""
+Vectorized statistics of recorded key event streams.
+
+Streams come from a RecordingBackend or a trace file, as parallel
+arrays of timestamps, virtual key codes and down flags. Everything is computed
+with NumPy in a few passes, so million-event traces take a fraction of a second:
+
+    python src/analysis.py --mode WASD --hours 24 --settings '{"pattern_type": "circle"}'
+
+Directions are taken from the movement steps only, the short presses of
+combos and extra actions are left out. A stream is reported as periodic when
+most of its direction changes follow one cycle: a default CIRCLE session
+follows W, WD, D, SD, S, SA back to W, as its pattern restarts on every
+direction change, while RANDOM movement follows no cycle.
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from mytypes import Keys
+from timeline import DIRECTION_BITS
+
+# Bin edges of the inter-press interval and hold duration histograms in seconds
+INTERVAL_BINS = np.array([0.0, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, np.inf])
+HOLD_BINS = np.array([0.0, 0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, np.inf])
+
+MAX_PERIOD = 16  # longest movement cycle looked for, in steps
+MIN_CYCLES = 4  # direction changes needed per possible step before a cycle is looked for
+PERIODIC_THRESHOLD = 0.8  # share of transitions following the cycle from which a stream is periodic
+MOVEMENT_HOLD_SHARE = 0.5  # direction presses held shorter than this share of the median are not movement steps
+MAX_TIMING_BINS = 1 << 21  # upper bound of the event rate signal length
+TIMING_RESOLUTION = 0.05  # preferred event rate bin width in seconds
+
+KEY_NAMES = {value: name for name, value in vars(Keys).items() if not name.startswith("_")}
+
+
+class StreamAnalysis:
+    """Statistics of one key event stream"""
+
+    def __init__(self, timestamps, keys, downs):
+        """
+        Analyzes a stream
+        :param timestamps: Event timestamps in seconds, in recording order
+        :param keys: Virtual key code of every event
+        :param downs: Nonzero for key-down events, zero for key-up events
+        """
+
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        keys = np.asarray(keys, dtype=np.uint8)
+        downs = np.asarray(downs, dtype=bool)
+
+        self.events = len(timestamps)
+        self.duration = float(timestamps[-1] - timestamps[0]) if self.events else 0.0
+
+        press_times = timestamps[downs]
+        press_keys = keys[downs]
+        self.presses = len(press_times)
+
+        # Per-key frequency
+        codes, counts = np.unique(press_keys, return_counts=True)
+        self.key_counts = {int(code): int(count) for code, count in zip(codes, counts)}
+
+        # Inter-press intervals
+        intervals = np.diff(press_times)
+        self.interval_histogram = np.histogram(intervals, INTERVAL_BINS)[0]
+        self.mean_interval = float(intervals.mean()) if len(intervals) else 0.0
+
+        press_holds = self._press_holds(timestamps, keys, downs)
+        self.holds = press_holds[~np.isnan(press_holds)]
+        self.hold_histogram = np.histogram(self.holds, HOLD_BINS)[0]
+
+        self.directions = self._direction_sequence(press_times, press_keys, press_holds[downs])
+        self.entropy, self.conditional_entropy = self._entropies(self.directions)
+        self.period, self.periodicity = self._symbol_periodicity(self.directions)
+        self.periodic = self.period >= 2 and self.periodicity >= PERIODIC_THRESHOLD
+        self.timing_period, self.timing_peak = self._timing_periodicity(press_times)
+
+    @staticmethod
+    def _press_holds(timestamps, keys, downs):
+        """
+        Duration between every key-down and the next key-up of the same key,
+        NaN for key-ups and for key-downs that are never released
+        """
+        order = np.lexsort((np.arange(len(keys)), keys))  # by key, then recording order
+        sorted_keys, sorted_downs, sorted_times = keys[order], downs[order], timestamps[order]
+        pairs = sorted_downs[:-1] & ~sorted_downs[1:] & (sorted_keys[:-1] == sorted_keys[1:])
+        holds = np.full(len(keys), np.nan)
+        holds[order[:-1][pairs]] = sorted_times[1:][pairs] - sorted_times[:-1][pairs]
+        return holds
+
+    @staticmethod
+    def _direction_sequence(press_times, press_keys, press_holds):
+        """
+        Movement directions as W/A/S/D bitmasks, one per movement step. Keys
+        pressed at the same instant form one diagonal direction. Short presses
+        of direction keys come from combos and extra actions, not from the
+        movement pattern, and are left out
+        """
+        bits = np.zeros(256, dtype=np.int64)
+        for bit, (_, key) in enumerate(DIRECTION_BITS):
+            bits[key] = 1 << bit
+
+        movement = bits[press_keys] > 0
+        if movement.any():
+            holds = press_holds[movement]
+            threshold = MOVEMENT_HOLD_SHARE * np.nanmedian(holds) if not np.isnan(holds).all() else 0.0
+            movement[movement] = ~(holds < threshold)  # unreleased presses are kept
+        times, masks = press_times[movement], bits[press_keys[movement]]
+        if not len(times):
+            return masks
+
+        starts = np.flatnonzero(np.r_[True, times[1:] != times[:-1]])
+        return np.bitwise_or.reduceat(masks, starts)
+
+    @staticmethod
+    def _entropies(directions):
+        """Shannon entropy of the directions and of a direction given the previous one, in bits"""
+        if len(directions) < 2:
+            return 0.0, 0.0
+
+        def entropy(counts):
+            probabilities = counts[counts > 0] / counts.sum()
+            return float(-(probabilities * np.log2(probabilities)).sum())
+
+        single = entropy(np.bincount(directions, minlength=16))
+        pairs = entropy(np.bincount(directions[:-1] * 16 + directions[1:], minlength=256))
+        return single, pairs - entropy(np.bincount(directions[:-1], minlength=16))
+
+    @staticmethod
+    def _symbol_periodicity(directions):
+        """
+        Cycle of the direction sequence, found from its transitions. Repeated
+        directions are merged first, then every direction is followed by the
+        successor it has most often. A pattern that restarts its cycle early
+        keeps the successors of the steps it does reach, so it is still found
+        :return: The length of the cycle through the most frequent direction, 0
+            if there is none, and the share of transitions that follow the cycle
+        """
+        if len(directions) < 2:
+            return 0, 0.0
+        changes = directions[np.r_[True, directions[1:] != directions[:-1]]]
+        if len(changes) < 2 * MIN_CYCLES:
+            return 0, 0.0
+
+        transitions = np.bincount(changes[:-1] * 16 + changes[1:], minlength=256).reshape(16, 16)
+        successors = transitions.argmax(axis=1)
+        score = float(transitions.max(axis=1).sum() / transitions.sum())
+
+        start = int(np.bincount(changes).argmax())
+        direction, period = int(successors[start]), 1
+        while direction != start and period < MAX_PERIOD:
+            direction, period = int(successors[direction]), period + 1
+        if direction != start:
+            return 0, score
+        return period, score
+
+    @staticmethod
+    def _timing_periodicity(press_times):
+        """
+        Spectrum of the key press rate
+        :return: The dominant period in seconds and how far its power stands out of the mean power
+        """
+        if len(press_times) < 4:
+            return 0.0, 0.0
+
+        span = press_times[-1] - press_times[0]
+        resolution = max(TIMING_RESOLUTION, span / MAX_TIMING_BINS)
+        bins = int(span / resolution) + 1
+        indices = ((press_times - press_times[0]) / resolution).astype(np.int64)
+        signal = np.bincount(indices, minlength=bins).astype(np.float64)
+        signal -= signal.mean()
+
+        # Zero-pad to a power of two, FFT lengths with large prime factors are slow
+        length = 1 << (bins - 1).bit_length()
+        power = np.abs(np.fft.rfft(signal, length)) ** 2
+        power[0] = 0.0
+        peak = int(power.argmax())
+        mean = power[1:].mean()
+        if not peak or not mean:
+            return 0.0, 0.0
+        return length * resolution / peak, float(power[peak] / mean)
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.events} events, {self.presses} key presses over {self.duration / 3600:.2f} h",
+            "presses per key: " + ", ".join(
+                f"{KEY_NAMES.get(code, hex(code))}={count}" for code, count in self.key_counts.items()
+            ),
+            f"mean inter-press interval {self.mean_interval:.3f} s, histogram {self.interval_histogram.tolist()}",
+            f"mean hold {self.holds.mean() if len(self.holds) else 0.0:.3f} s, histogram {self.hold_histogram.tolist()}",
+            f"direction entropy {self.entropy:.2f} bits, {self.conditional_entropy:.2f} bits given the previous one",
+            f"direction periodicity {self.periodicity:.2f} at period {self.period}: "
+            f"{'periodic' if self.periodic else 'not periodic'}",
+            f"timing peak {self.timing_peak:.1f}x mean power at {self.timing_period:.2f} s",
+        ]
+        return "\n".join(lines)
+
+
+def analyze(events) -> StreamAnalysis:
+    """Analyzes the events recorded by a RecordingBackend"""
+    return StreamAnalysis(events.timestamps, events.keys, events.downs)
+
+
+def main():
+    from sender import KeySender, Mode
+    from simulation import simulate
+
+    parser = argparse.ArgumentParser(description="Analyzes the key event stream of a trace or a simulated session")
+    parser.add_argument("--trace", help="Analyze this trace file instead of a simulation")
+    parser.add_argument("--mode", choices=KeySender.MODES_NAMES, default=Mode.HEAVY.value)
+    parser.add_argument("--hours", type=float, default=24.0, help="Simulated session length")
+    parser.add_argument("--settings", type=json.loads, default={}, help="Settings as a JSON object")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible runs")
+    args = parser.parse_args()
+
+    if args.trace:
+        from tracefile import TraceReader
+
+        with TraceReader(args.trace) as reader:
+            print(StreamAnalysis(reader.timestamps, reader.keys, reader.downs).summary())
+        return
+
+    result = simulate(Mode(args.mode), args.hours * 3600, args.settings, args.seed)
+    print(analyze(result.events).summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import ctypes
+import time
+from array import array
+
+from mytypes import Hexadecimal, Handle
+
+
+class InputBackend:
+    """
+    Base class for the ways key events can be delivered to the game window.
+    Backends only deliver single key down/up events, all the timing is done
+    by the KeySender
+    """
+
+    name = "base"
+    injects_input = False  # events count as user input of the session, e.g. for GetLastInputInfo
+
+    def is_window(self, hwnd: Handle) -> bool:
+        """Returns True if the handle points to an existing window"""
+        raise NotImplementedError
+
+    def is_window_visible(self, hwnd: Handle) -> bool:
+        """Returns True if the window is visible"""
+        raise NotImplementedError
+
+    def send(self, hwnd: Handle, key: Hexadecimal, down: bool) -> bool:
+        """
+        Delivers a single key event to the window
+        :return: True if the event was delivered
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Releases resources held by the backend"""
+
+    def summary(self) -> str:
+        """Returns a short human readable description of the delivery statistics"""
+        return ""
+
+
+class SendMessageBackend(InputBackend):
+    """Delivers key messages synchronously with SendMessage"""
+
+    name = "sendmessage"
+
+    def __init__(self):
+        import win32api
+        import win32con
+        import win32gui
+
+        self._win32api = win32api
+        self._win32gui = win32gui
+        self._key_down = win32con.WM_KEYDOWN
+        self._key_up = win32con.WM_KEYUP
+
+    def is_window(self, hwnd: Handle) -> bool:
+        return bool(self._win32gui.IsWindow(hwnd))
+
+    def is_window_visible(self, hwnd: Handle) -> bool:
+        return bool(self._win32gui.IsWindowVisible(hwnd))
+
+    def send(self, hwnd: Handle, key: Hexadecimal, down: bool) -> bool:
+        self._win32api.SendMessage(hwnd, self._key_down if down else self._key_up, key, 0)
+        return True
+
+
+class PostMessageBackend(SendMessageBackend):
+    """Queues key messages to the window with PostMessage without waiting for them"""
+
+    name = "postmessage"
+
+    def send(self, hwnd: Handle, key: Hexadecimal, down: bool) -> bool:
+        self._win32api.PostMessage(hwnd, self._key_down if down else self._key_up, key, 0)
+        return True
+
+
+class SendMessageTimeoutBackend(SendMessageBackend):
+    """
+    Delivers key messages with SendMessageTimeout, so a window whose message
+    pump is hung cannot block the caller for longer than the timeout
+    """
+
+    name = "sendmessagetimeout"
+    DEFAULT_TIMEOUT = 0.1
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT):
+        """
+        Creates a new timeout-bounded backend
+        :param timeout: Maximum time to wait for the window in seconds
+        """
+
+        super().__init__()
+        import pywintypes
+        import win32con
+
+        self._error = pywintypes.error
+        self._timeout_ms = max(1, int(timeout * 1000))
+        self._flags = win32con.SMTO_ABORTIFHUNG | win32con.SMTO_BLOCK
+
+    def send(self, hwnd: Handle, key: Hexadecimal, down: bool) -> bool:
+        try:
+            self._win32gui.SendMessageTimeout(
+                hwnd, self._key_down if down else self._key_up, key, 0, self._flags, self._timeout_ms
+            )
+        except self._error:
+            return False
+        return True
+
+
+class _KeyboardInput(ctypes.Structure):
+    _fields_ = [
+        ("wVk", ctypes.c_ushort),
+        ("wScan", ctypes.c_ushort),
+        ("dwFlags", ctypes.c_ulong),
+        ("time", ctypes.c_ulong),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class _MouseInput(ctypes.Structure):
+    _fields_ = [
+        ("dx", ctypes.c_long),
+        ("dy", ctypes.c_long),
+        ("mouseData", ctypes.c_ulong),
+        ("dwFlags", ctypes.c_ulong),
+        ("time", ctypes.c_ulong),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class _Input(ctypes.Structure):
+    class _Union(ctypes.Union):
+        # The mouse input is the largest member and defines the INPUT size
+        _fields_ = [("ki", _KeyboardInput), ("mi", _MouseInput)]
+
+    _anonymous_ = ("u",)
+    _fields_ = [("type", ctypes.c_ulong), ("u", _Union)]
+
+
+class SendInputBackend(InputBackend):
+    """
+    Injects key events with SendInput. The events go to the foreground window,
+    so the handle is only used to check that the game is still alive
+    """
+
+    name = "sendinput"
+    injects_input = True
+
+    INPUT_KEYBOARD = 1
+    KEYEVENTF_KEYUP = 0x0002
+
+    def __init__(self):
+        self._user32 = ctypes.windll.user32
+        self._input = _Input(type=self.INPUT_KEYBOARD)
+        self._input_size = ctypes.sizeof(_Input)
+
+    def is_window(self, hwnd: Handle) -> bool:
+        return bool(self._user32.IsWindow(hwnd))
+
+    def is_window_visible(self, hwnd: Handle) -> bool:
+        return bool(self._user32.IsWindowVisible(hwnd))
+
+    def send(self, hwnd: Handle, key: Hexadecimal, down: bool) -> bool:
+        self._input.ki.wVk = key
+        self._input.ki.dwFlags = 0 if down else self.KEYEVENTF_KEYUP
+        return self._user32.SendInput(1, ctypes.byref(self._input), self._input_size) == 1
+
+
+class RecordingBackend(InputBackend):
+    """
+    In-memory sink that records timestamped key events instead of delivering
+    them. Works on every platform, so the sender can run, be profiled and be
+    benchmarked without the game
+    """
+
+    name = "recording"
+
+    def __init__(self, clock=time.perf_counter, windows=None):
+        """
+        Creates a new recording sink
+        :param clock: Function returning the timestamp stored with every event
+        :param windows: Handles reported as existing windows, any handle if None
+        """
+
+        self.windows = windows
+        self.timestamps = array("d")
+        self.hwnds = array("Q")
+        self.keys = array("B")
+        self.downs = array("B")
+
+        # Bound methods save attribute lookups on every recorded event
+        self._clock = clock
+        self._append_timestamp = self.timestamps.append
+        self._append_hwnd = self.hwnds.append
+        self._append_key = self.keys.append
+        self._append_down = self.downs.append
+
+    def __len__(self):
+        return len(self.keys)
+
+    def is_window(self, hwnd: Handle) -> bool:
+        return self.windows is None or hwnd in self.windows
+
+    def is_window_visible(self, hwnd: Handle) -> bool:
+        return self.is_window(hwnd)
+
+    def send(self, hwnd: Handle, key: Hexadecimal, down: bool) -> bool:
+        self._append_timestamp(self._clock())
+        self._append_hwnd(hwnd)
+        self._append_key(key)
+        self._append_down(down)
+        return True
+
+    def events(self):
+        """Yields the recorded events as (timestamp, hwnd, key, down) tuples"""
+        for event in zip(self.timestamps, self.hwnds, self.keys, self.downs):
+            yield event[0], event[1], event[2], bool(event[3])
+
+    def clear(self):
+        """Forgets all recorded events"""
+        del self.timestamps[:]
+        del self.hwnds[:]
+        del self.keys[:]
+        del self.downs[:]
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (
+        SendMessageBackend,
+        SendMessageTimeoutBackend,
+        PostMessageBackend,
+        SendInputBackend,
+        RecordingBackend,
+    )
+}
+
+
+def create_backend(name: str = SendMessageBackend.name) -> InputBackend:
+    """Creates a backend by its name"""
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Invalid backend: {name}") from None
@@ -0,0 +1,363 @@
+"""
+Local control API for scripts, served on a Unix socket or a Windows named pipe.
+
+Clients send newline-delimited JSON commands and get one JSON line back for
+every command, in order. Every command may carry an "id" that is echoed in
+its reply:
+
+    {"id": 1, "command": "start", "mode": "WASD", "settings": {"pattern_type": "circle"}}
+    {"id": 2, "command": "update_settings", "settings": {"pause_frequency": 0.3}}
+    {"id": 3, "command": "status"}
+    {"id": 4, "command": "stop"}
+
+Replies are {"id": ..., "ok": true, ...} or {"id": ..., "ok": false, "error": "..."}.
+The commands map onto the KeySender lifecycle and its settings keys, and they
+run on the event loop, so any number of clients can be connected without
+locks; waiting for a sender thread happens on a worker thread:
+
+    python src/control.py unix:/tmp/valorant-afk.sock
+    python src/control.py \\\\.\\pipe\\valorant-afk
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import stat
+import sys
+
+from backends import create_backend
+from discovery import WindowDiscovery
+from metrics import UNIX_PREFIX
+from mytypes import Mode
+from sender import KeySender
+from settings import SenderSettings
+
+logger = logging.getLogger("control")
+
+PIPE_PREFIX = "\\\\.\\pipe\\"
+DEFAULT_WINDOW_NAME = "VALORANT"
+STOP_TIMEOUT = 0.1  # seconds to wait for the sender thread on stop
+CLOSE_TIMEOUT = 1.0  # seconds to wait for the sender thread on shutdown
+SETTINGS_INTERVAL = 0.1  # seconds, setting changes within it are handed to the sender as one snapshot
+LINE_LIMIT = 64 * 1024  # longest command accepted, in bytes
+BACKLOG = 1024  # pending connections, so a burst of clients is not refused
+
+
+class ControlError(Exception):
+    """A command that cannot be executed, reported to the client"""
+
+
+class Controller:
+    """
+    Owns the sender driven by the control API, the way the main window owns
+    the sender driven by its buttons
+    """
+
+    def __init__(self, window, backend=None):
+        """
+        :param window: Object whose hwnd attribute is the game window handle or None, e.g. a WindowDiscovery
+        :param backend: The backend shared by the senders, each sender creates its own if None
+        """
+        self.window = window
+        self.backend = backend
+        self.sender = None
+        self.settings = SenderSettings()
+        self._settings_timer = None  # pending hand-over of the settings to the sender
+        self._lifecycle = asyncio.Lock()  # start and stop wait for sender threads, they must not interleave
+        self.commands = {
+            "start": self.start,
+            "stop": self.stop,
+            "update_settings": self.update_settings,
+            "status": self.status,
+        }
+
+    async def execute(self, request: dict) -> dict:
+        """Runs one command, returns the fields of its reply"""
+        handler = self.commands.get(request.get("command"))
+        if handler is None:
+            raise ControlError(f"Unknown command: {request.get('command')!r}")
+        return await handler(request)
+
+    def _merge_settings(self, request: dict) -> SenderSettings:
+        changes = request.get("settings") or {}
+        if not isinstance(changes, dict):
+            raise ControlError("settings must be an object")
+        try:
+            return self.settings.merge(changes)
+        except ValueError as e:
+            raise ControlError(str(e)) from None
+
+    async def start(self, request: dict) -> dict:
+        async with self._lifecycle:
+            previous = self.sender
+            if previous is not None and previous.is_alive():
+                if previous.running:
+                    raise ControlError("Anti-AFK already started")
+                # Stopped but still releasing its keys, a new sender must not overlap with it
+                await asyncio.to_thread(previous.join, STOP_TIMEOUT)
+                if previous.is_alive():
+                    raise ControlError("Anti-AFK is still stopping, try again")
+            try:
+                mode = Mode(request.get("mode", Mode.LIGHT.value))
+            except ValueError:
+                raise ControlError(f"Invalid mode, expected one of {KeySender.MODES_NAMES}") from None
+            settings = self._merge_settings(request)
+
+            hwnd = self.window.hwnd
+            if not hwnd:
+                raise ControlError("VALORANT not found!")
+            try:
+                sender = KeySender(mode, hwnd, backend=self.backend)
+            except ValueError as e:
+                raise ControlError(str(e)) from None
+            self.settings = settings
+            sender.update_settings(settings)
+            sender.start()
+            self.sender = sender
+            logger.info(f"Anti-AFK started in mode: {mode.value}, window {hwnd:#x}")
+            return await self.status(request)
+
+    async def stop(self, request: dict) -> dict:
+        async with self._lifecycle:
+            sender = self.sender
+            if sender is None or not sender.is_alive():
+                raise ControlError("Anti-AFK is not running")
+            sender.stop()
+            # Joined on a worker thread, a sender stuck on a hung window never blocks the other clients
+            await asyncio.to_thread(sender.join, STOP_TIMEOUT)
+            logger.info("Anti-AFK stopped")
+            return await self.status(request)
+
+    async def update_settings(self, request: dict) -> dict:
+        settings = self._merge_settings(request)
+        if settings is not self.settings:
+            self.settings = settings
+            # Like the GUI, changes within SETTINGS_INTERVAL reach the sender as one snapshot,
+            # every snapshot the timeline uses recompiles it
+            if self.sender is not None and self._settings_timer is None:
+                self._settings_timer = asyncio.get_running_loop().call_later(
+                    SETTINGS_INTERVAL, self._publish_settings
+                )
+        return {"settings": _settings_dict(self.settings)}
+
+    def _publish_settings(self):
+        """Hands the latest settings to the sender"""
+        self._settings_timer = None
+        if self.sender is not None:
+            self.sender.update_settings(self.settings)
+
+    async def status(self, request: dict) -> dict:
+        sender = self.sender
+        status = {
+            "running": sender is not None and sender.running,
+            "window_found": self.window.hwnd is not None,
+            "settings": _settings_dict(self.settings),
+        }
+        if sender is not None:
+            telemetry = sender.telemetry
+            status.update(
+                mode=sender.mode.value,
+                hwnd=sender.valorant_hwnd,
+                stop_reason=sender.stop_reason,
+                events_sent=sender.events_sent,
+                keys_sent=telemetry.keys_sent,
+                combos=telemetry.combos,
+                pauses=telemetry.pauses,
+                messages_saved=telemetry.messages_saved,
+            )
+        return status
+
+    async def close(self):
+        """Stops the sender, releasing the keys it holds"""
+        if self._settings_timer is not None:
+            self._settings_timer.cancel()
+            self._settings_timer = None
+        if self.sender is not None:
+            self.sender.stop()
+            await asyncio.to_thread(self.sender.join, CLOSE_TIMEOUT)
+        if self.backend is not None:
+            self.backend.close()
+
+
+def _settings_dict(settings: SenderSettings) -> dict:
+    return {name: getattr(value, "value", value) for name, value in vars(settings).items()}
+
+
+class ControlServer:
+    """Serves a controller to any number of clients on one event loop"""
+
+    def __init__(self, controller: Controller, address: str):
+        """
+        :param controller: Executes the commands
+        :param address: "unix:/path" or a named pipe path like \\\\.\\pipe\\name
+        """
+        self.controller = controller
+        self.address = address
+        self.clients = 0
+        self.commands = 0
+        self._servers = []
+        self._closed = None
+
+    async def serve(self):
+        """Serves until close() is called"""
+        self._closed = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def protocol():
+            return asyncio.StreamReaderProtocol(asyncio.StreamReader(limit=LINE_LIMIT), self._client)
+
+        if self.address.startswith(UNIX_PREFIX):
+            path = self.address[len(UNIX_PREFIX):]
+            # A socket left behind by a previous run would make the bind fail
+            if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+                os.remove(path)
+            self._servers = [await loop.create_unix_server(protocol, path, backlog=BACKLOG)]
+        elif self.address.startswith(PIPE_PREFIX):
+            if not hasattr(loop, "start_serving_pipe"):
+                raise ValueError("Named pipes need the proactor event loop of Windows")
+            self._servers = await loop.start_serving_pipe(protocol, self.address)
+        else:
+            raise ValueError(f"Invalid control address: {self.address!r}")
+
+        try:
+            await self._closed.wait()
+        finally:
+            for server in self._servers:
+                server.close()
+            if self.address.startswith(UNIX_PREFIX) and os.path.exists(self.address[len(UNIX_PREFIX):]):
+                os.remove(self.address[len(UNIX_PREFIX):])
+
+    def close(self):
+        """Stops serving, called from the event loop thread"""
+        if self._closed is not None:
+            self._closed.set()
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.clients += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than the limit, the rest of the connection cannot be framed anymore
+                    writer.write(_encode({"ok": False, "error": "Command too long"}))
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    writer.write(_encode(await self._execute(line)))
+                    # Only wait for a slow client, a fast one never suspends here
+                    await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def _execute(self, line: bytes) -> dict:
+        self.commands += 1
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {"ok": False, "error": f"Invalid JSON: {e}"}
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "A command must be a JSON object"}
+
+        reply = {"id": request["id"]} if "id" in request else {}
+        try:
+            reply.update(ok=True, **await self.controller.execute(request))
+        except ControlError as e:
+            reply.update(ok=False, error=str(e))
+        except Exception as e:
+            logger.error(f"Error in command {request.get('command')!r}: {e}")
+            reply.update(ok=False, error=f"Internal error: {e}")
+        return reply
+
+
+def _encode(reply: dict) -> bytes:
+    return json.dumps(reply, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+async def open_connection(address: str) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Connects a client to a control server"""
+    if address.startswith(UNIX_PREFIX):
+        return await asyncio.open_unix_connection(address[len(UNIX_PREFIX):], limit=LINE_LIMIT)
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=LINE_LIMIT)
+    protocol = asyncio.StreamReaderProtocol(reader, loop=loop)
+    transport, _ = await loop.create_pipe_connection(lambda: protocol, address)
+    return reader, asyncio.StreamWriter(transport, protocol, reader, loop)
+
+
+def default_address() -> str:
+    if hasattr(socket, "AF_UNIX") and sys.platform != "win32":
+        return f"{UNIX_PREFIX}/tmp/valorant-afk.sock"
+    return f"{PIPE_PREFIX}valorant-afk"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serves the local control API of the anti-AFK sender")
+    parser.add_argument("address", nargs="?", default=default_address(), help="unix:/path or \\\\.\\pipe\\name")
+    parser.add_argument("--window-name", default=DEFAULT_WINDOW_NAME, help="Part of the game window title")
+    parser.add_argument("--hwnd", type=lambda value: int(value, 0), help="Use this window handle instead of searching")
+    parser.add_argument("--backend", help="Backend delivering the key events, a dispatched SendMessage by default")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    return parser.parse_args(argv)
+
+
+class _FixedWindow:
+    def __init__(self, hwnd):
+        self.hwnd = hwnd
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="[%(asctime)s] [%(levelname)s] %(message)s", datefmt="%H:%M:%S")
+
+    if args.hwnd is not None:
+        window = _FixedWindow(args.hwnd)
+    else:
+        window = WindowDiscovery(args.window_name)
+        window.start()
+
+    try:
+        backend = create_backend(args.backend) if args.backend else None
+    except Exception as e:
+        logger.error(f"Error during startup: {e}")
+        return 1
+    controller = Controller(window, backend)
+    server = ControlServer(controller, args.address)
+
+    async def serve():
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, server.close)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows, Ctrl+C raises KeyboardInterrupt instead
+        logger.info(f"Control API listening on {args.address}")
+        try:
+            await server.serve()
+        finally:
+            await controller.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ValueError) as e:
+        logger.error(f"Cannot serve the control API: {e}")
+        return 1
+    finally:
+        if isinstance(window, WindowDiscovery):
+            window.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import ctypes
+import threading
+
+from mytypes import Handle
+
+
+def find_window(window_name: str) -> Handle | None:
+    """Returns window handle if found, otherwise None"""
+    import win32gui
+
+    def enum_windows_callback(hwnd, windows):
+        if window_name in win32gui.GetWindowText(hwnd):
+            windows.append(hwnd)
+
+    windows = []
+    win32gui.EnumWindows(enum_windows_callback, windows)
+    return windows[0] if windows else None
+
+
+class Win32WindowSource:
+    """
+    Top-level windows of the desktop. Can also report window creation,
+    destruction and title changes through a WinEvent hook
+    """
+
+    EVENT_OBJECT_CREATE = 0x8000
+    EVENT_OBJECT_DESTROY = 0x8001
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    OBJID_WINDOW = 0
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        import win32gui
+
+        self._win32gui = win32gui
+        self._hook_thread = None
+        self._hook_thread_id = None
+
+    def find(self, window_name: str) -> Handle | None:
+        """Enumerates all top-level windows looking for the name"""
+        return find_window(window_name)
+
+    def is_alive(self, hwnd: Handle, window_name: str) -> bool:
+        """Cheaply checks that the handle still points to the named window"""
+        return bool(self._win32gui.IsWindow(hwnd)) and window_name in self._win32gui.GetWindowText(hwnd)
+
+    def watch(self, notify):
+        """Calls notify() from a hook thread whenever a top-level window appears, disappears or is renamed"""
+        ready = threading.Event()
+        self._hook_thread = threading.Thread(target=self._hook_loop, args=(notify, ready), daemon=True)
+        self._hook_thread.start()
+        ready.wait(1.0)
+
+    def unwatch(self):
+        if self._hook_thread_id is not None:
+            ctypes.windll.user32.PostThreadMessageW(self._hook_thread_id, self.WM_QUIT, 0, 0)
+            self._hook_thread.join(1.0)
+            self._hook_thread_id = None
+
+    def _hook_loop(self, notify, ready):
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        user32.SetWinEventHook.restype = ctypes.c_void_p
+        user32.UnhookWinEvent.argtypes = [ctypes.c_void_p]
+
+        def callback(hook, event, hwnd, id_object, id_child, thread, timestamp):
+            if id_object == self.OBJID_WINDOW and id_child == 0:
+                notify()
+
+        # The hook procedure has to stay referenced for as long as the hooks exist
+        procedure = ctypes.WINFUNCTYPE(
+            None,
+            ctypes.c_void_p, wintypes.DWORD, wintypes.HWND, wintypes.LONG, wintypes.LONG,
+            wintypes.DWORD, wintypes.DWORD,
+        )(callback)
+        flags = self.WINEVENT_OUTOFCONTEXT | self.WINEVENT_SKIPOWNPROCESS
+        hooks = [
+            user32.SetWinEventHook(self.EVENT_OBJECT_CREATE, self.EVENT_OBJECT_DESTROY, 0, procedure, 0, 0, flags),
+            user32.SetWinEventHook(self.EVENT_OBJECT_NAMECHANGE, self.EVENT_OBJECT_NAMECHANGE, 0, procedure, 0, 0, flags),
+        ]
+
+        self._hook_thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        ready.set()
+
+        # Out-of-context hooks are delivered through this thread's message loop
+        message = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(message), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(message))
+            user32.DispatchMessageW(ctypes.byref(message))
+
+        for hook in hooks:
+            if hook:
+                user32.UnhookWinEvent(hook)
+
+
+class WindowDiscovery(threading.Thread):
+    """
+    Keeps track of the game window from its own thread. The found handle is
+    cached and only revalidated with cheap per-window calls, all windows are
+    enumerated again only when the cached handle dies, when the source reports
+    that windows were created or destroyed, or as a slow fallback while no
+    window is found
+    """
+
+    DEFAULT_REVALIDATE_INTERVAL = 1.0
+    DEFAULT_RESCAN_INTERVAL = 5.0
+    DEFAULT_COALESCE_INTERVAL = 0.5
+
+    def __init__(
+        self,
+        window_name: str,
+        source=None,
+        on_change=None,
+        revalidate_interval: float = DEFAULT_REVALIDATE_INTERVAL,
+        rescan_interval: float = DEFAULT_RESCAN_INTERVAL,
+        coalesce_interval: float = DEFAULT_COALESCE_INTERVAL,
+    ):
+        """
+        Creates a new discovery thread
+        :param window_name: Part of the title of the window looked for
+        :param source: Object with find(name), is_alive(hwnd, name) and optionally
+            watch(notify)/unwatch() methods, the real desktop if None
+        :param on_change: Called with the new handle, or None, from the discovery thread
+        :param revalidate_interval: Seconds between checks of the cached handle
+        :param rescan_interval: Seconds between full enumerations while no window is found
+        :param coalesce_interval: Seconds window notifications are coalesced for
+        """
+
+        super().__init__(name="WindowDiscovery", daemon=True)
+        self.window_name = window_name
+        self.source = source if source is not None else Win32WindowSource()
+        self.on_change = on_change
+        self.revalidate_interval = revalidate_interval
+        self.rescan_interval = rescan_interval
+        self.coalesce_interval = coalesce_interval
+
+        self._hwnd = None
+        self._changed = threading.Event()
+        self._stop_event = threading.Event()
+
+        self.full_scans = 0
+        self.revalidations = 0
+
+    @property
+    def hwnd(self) -> Handle | None:
+        """The cached window handle, None if the window is not found"""
+        return self._hwnd
+
+    def notify_changed(self):
+        """Tells the discovery that top-level windows were created, destroyed or renamed"""
+        self._changed.set()
+
+    def _set_hwnd(self, hwnd: Handle | None):
+        if hwnd != self._hwnd:
+            self._hwnd = hwnd
+            if self.on_change is not None:
+                self.on_change(hwnd)
+
+    def check(self):
+        """Revalidates the cached handle and enumerates windows again if needed"""
+        if self._hwnd is not None:
+            self.revalidations += 1
+            if self.source.is_alive(self._hwnd, self.window_name):
+                return
+            self._set_hwnd(None)
+
+        self.full_scans += 1
+        self._set_hwnd(self.source.find(self.window_name))
+
+    def run(self):
+        watch = getattr(self.source, "watch", None)
+        if watch is not None:
+            watch(self.notify_changed)
+        try:
+            while not self._stop_event.is_set():
+                self._changed.clear()
+                self.check()
+                timeout = self.revalidate_interval if self._hwnd is not None else self.rescan_interval
+                if self._changed.wait(timeout):
+                    # Coalesce a burst of window notifications into one check
+                    self._stop_event.wait(self.coalesce_interval)
+        finally:
+            unwatch = getattr(self.source, "unwatch", None)
+            if unwatch is not None:
+                unwatch()
+
+    def stop(self):
+        self._stop_event.set()
+        self._changed.set()
@@ -0,0 +1,163 @@
+import bisect
+import threading
+import time
+from collections import deque
+
+from backends import InputBackend
+from logwriter import log
+from mytypes import Hexadecimal, Handle, LoggingLevel
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of latencies in seconds"""
+
+    BOUNDS = (
+        0.0001, 0.00025, 0.0005,
+        0.001, 0.0025, 0.005,
+        0.01, 0.025, 0.05,
+        0.1, 0.25, 0.5,
+        1.0, 2.5, 5.0,
+    )
+
+    def __init__(self, bounds=BOUNDS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction: float) -> float:
+        """Returns the upper bound of the bucket holding the given fraction of samples"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class Dispatcher(InputBackend):
+    """
+    Backend that enqueues key events without blocking and delivers them from a
+    dedicated thread through another backend. A hung game window only delays
+    the dispatcher thread, while the sender keeps its own timeline.
+
+    Key-ups are never dropped, so a dropped key-down cannot leave a key held.
+    Key-downs are dropped when too many events are pending or when they waited
+    in the queue for too long to still make sense.
+    """
+
+    name = "dispatcher"
+    DEFAULT_MAX_PENDING = 64
+    DEFAULT_MAX_AGE = 0.5
+    DEFAULT_CLOSE_TIMEOUT = 1.0
+
+    def __init__(
+        self,
+        backend: InputBackend,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        """
+        Creates a new dispatcher and starts its thread
+        :param backend: The backend delivering the events, ideally a non-blocking one
+        :param max_pending: Maximum number of queued events before key-downs are dropped
+        :param max_age: Maximum time in seconds a key-down may wait in the queue
+        """
+
+        self.backend = backend
+        self.max_pending = max_pending
+        self.max_age = max_age
+
+        self._pending = deque()
+        self._wakeup = threading.Event()
+        self._closing = False
+
+        self.latency = LatencyHistogram()
+        self.delivered = 0
+        self.timeouts = 0
+        self.errors = 0  # deliveries where the backend raised
+        self.dropped = 0
+
+        self._thread = threading.Thread(target=self._run, name="KeyDispatcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def injects_input(self) -> bool:
+        return self.backend.injects_input
+
+    def is_window(self, hwnd: Handle) -> bool:
+        return self.backend.is_window(hwnd)
+
+    def is_window_visible(self, hwnd: Handle) -> bool:
+        return self.backend.is_window_visible(hwnd)
+
+    def send(self, hwnd: Handle, key: Hexadecimal, down: bool) -> bool:
+        """Enqueues the event; returns False if it was dropped instead"""
+        if down and len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return False
+        self._pending.append((time.perf_counter(), hwnd, key, down))
+        self._wakeup.set()
+        return True
+
+    def _run(self):
+        pending = self._pending
+        failing = False  # only the first error of a series is logged
+        while True:
+            while pending:
+                queued_at, hwnd, key, down = pending.popleft()
+                if down and time.perf_counter() - queued_at > self.max_age:
+                    self.dropped += 1
+                    continue
+
+                try:
+                    delivered = self.backend.send(hwnd, key, down)
+                except Exception as e:
+                    # One failing event must not end the thread, queued key-ups still have to go out
+                    self.errors += 1
+                    if not failing:
+                        log(LoggingLevel.ERROR, "dispatch", f"Could not deliver key {key:#x}: {e}", hwnd=hwnd)
+                    failing = True
+                    continue
+                failing = False
+                if delivered:
+                    self.delivered += 1
+                else:
+                    self.timeouts += 1
+                self.latency.add(time.perf_counter() - queued_at)
+
+            if self._closing:
+                break
+            self._wakeup.wait()
+            self._wakeup.clear()
+
+    def close(self, timeout: float = DEFAULT_CLOSE_TIMEOUT):
+        """Delivers the remaining events and stops the dispatcher thread"""
+        self._closing = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self.backend.close()
+
+    def summary(self) -> str:
+        return (
+            f"delivered {self.delivered}, timeouts {self.timeouts}, errors {self.errors}, dropped {self.dropped}, "
+            f"latency mean {self.latency.mean * 1000:.2f} ms, "
+            f"p50 <= {self.latency.percentile(0.5) * 1000:g} ms, "
+            f"p99 <= {self.latency.percentile(0.99) * 1000:g} ms, "
+            f"max {self.latency.max * 1000:.2f} ms"
+        )
@@ -0,0 +1,159 @@
+"""
+One scheduler thread driving the KeySender behavior of many game windows.
+
+Every target is a KeySender attached to the shared scheduler of the engine
+instead of running its own thread, so N windows cost one OS thread and one
+wait per nearest deadline, whatever N is:
+
+    engine = MultiTargetEngine()
+    engine.start()
+    engine.add_target(Mode.HEAVY, hwnd, {"pattern_type": "circle"})
+    ...
+    engine.stop()
+"""
+
+import threading
+import traceback
+
+from backends import InputBackend, SendMessageTimeoutBackend
+from dispatch import Dispatcher
+from logwriter import log
+from mytypes import Handle, LoggingLevel
+from sampling import Sampler
+from scheduler import DeadlineScheduler
+from sender import KeySender, Mode
+
+
+class TargetStats:
+    """Dispatch statistics of one target"""
+
+    def __init__(self, hwnd: Handle, mode: Mode, running: bool, events: int, rate: float):
+        self.hwnd = hwnd
+        self.mode = mode
+        self.running = running
+        self.events = events
+        self.rate = rate
+
+    def __repr__(self):
+        return f"{self.hwnd:#x} ({self.mode.value}): {self.events} events, {self.rate:.2f} events/s"
+
+
+class MultiTargetEngine(threading.Thread):
+    """
+    Multiplexes any number of windows, each with its own mode and settings,
+    over a single deadline scheduler. Targets can be added, updated and
+    removed from any thread while the engine is running
+    """
+
+    def __init__(
+        self,
+        backend: InputBackend | None = None,
+        scheduler: DeadlineScheduler | None = None,
+        sampler: Sampler | None = None,
+    ):
+        """
+        Creates a new engine thread
+        :param backend: The backend shared by all targets. If None, the engine
+            creates and owns a Dispatcher over timeout-bounded SendMessage calls
+        :param scheduler: The scheduler shared by all targets, a new real-time one if None
+        :param sampler: The source of random variates shared by all targets, a new unseeded one if None
+        """
+
+        super().__init__(name="MultiTargetEngine", daemon=True)
+        self._owns_backend = backend is None
+        self.backend = backend if backend is not None else Dispatcher(SendMessageTimeoutBackend())
+        self.scheduler = scheduler or DeadlineScheduler()
+        # A failing target is finished on its own, the other windows keep their input
+        self.scheduler.on_error = self._target_failed
+        self.sampler = sampler or Sampler()
+        self._targets = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._targets)
+
+    def add_target(self, mode: Mode, hwnd: Handle, settings: dict | None = None) -> KeySender:
+        """
+        Starts driving a window
+        :param mode: The mode of the target
+        :param hwnd: The window handle of the game client
+        :param settings: Settings passed to KeySender.update_settings
+        :return: The sender of the target
+        """
+
+        with self._lock:
+            if hwnd in self._targets:
+                raise ValueError(f"Window is already a target: {hwnd}")
+            sender = KeySender(mode, hwnd, backend=self.backend, scheduler=self.scheduler, sampler=self.sampler)
+            sender.update_settings(settings or {})
+            self._targets[hwnd] = sender
+
+        # Senders share the sampler streams, so they only ever run on the scheduler thread
+        self.scheduler.call_at(self.scheduler.now(), sender.attach)
+        return sender
+
+    def update_target(self, hwnd: Handle, settings: dict):
+        """Updates the settings of a target"""
+        self._targets[hwnd].update_settings(settings)
+
+    def remove_target(self, hwnd: Handle):
+        """Stops driving a window and releases the keys it holds"""
+        with self._lock:
+            sender = self._targets.pop(hwnd)
+        sender.stop()
+
+    def targets(self) -> list[KeySender]:
+        with self._lock:
+            return list(self._targets.values())
+
+    def stats(self) -> list[TargetStats]:
+        """Returns the dispatch statistics of every target"""
+        return [
+            TargetStats(sender.valorant_hwnd, sender.mode, sender.running, sender.events_sent, sender.dispatch_rate)
+            for sender in self.targets()
+        ]
+
+    @property
+    def events_sent(self) -> int:
+        """Key events sent by all targets"""
+        return sum(sender.events_sent for sender in self.targets())
+
+    @property
+    def dispatch_rate(self) -> float:
+        """Key events sent per second by all targets together"""
+        return sum(sender.dispatch_rate for sender in self.targets())
+
+    def _target_failed(self, callback, error: Exception):
+        """Finishes the target whose callback raised, or ends the engine if the callback is not a target's"""
+        sender = getattr(callback, "__self__", None)
+        if not isinstance(sender, KeySender):
+            raise error
+        with self._lock:
+            if self._targets.get(sender.valorant_hwnd) is sender:
+                del self._targets[sender.valorant_hwnd]
+
+        log(
+            LoggingLevel.ERROR, "engine", f"Error in target {sender.valorant_hwnd:#x}, it is stopped: {error}",
+            hwnd=sender.valorant_hwnd, traceback=traceback.format_exc(),
+        )
+        sender.stop_reason = "error"
+        sender.finish()
+
+    def run(self):
+        try:
+            self.scheduler.run(keep_alive=True)
+        except Exception as e:
+            log(
+                LoggingLevel.ERROR, "engine", f"Error in MultiTargetEngine thread: {e}",
+                targets=len(self), traceback=traceback.format_exc(),
+            )
+        finally:
+            self.scheduler.stop()
+            for sender in self.targets():
+                sender.finish()
+            if self._owns_backend:
+                self.backend.close()
+
+    def stop(self):
+        """Stops all targets; held keys are released before the engine thread exits"""
+        self.scheduler.stop()
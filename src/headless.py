@@ -0,0 +1,229 @@
+"""
+Headless entry point for unattended runs. It finds the game window, runs a
+KeySender and logs to stdout or a file, without ever importing PyQt6.
+
+Every KeySender setting can be given as a flag or in a JSON config file;
+flags override the file:
+
+    python src/headless.py --mode WASD --pattern-type circle --pause-frequency 0.3
+    python src/headless.py --config afk.json --log-file afk.log
+    python src/headless.py --metrics 127.0.0.1:9464
+
+Several --hwnd values drive every window from one scheduler thread with the
+same mode and settings:
+
+    python src/headless.py --mode WASD --hwnd 0x1a2b 0x3c4d
+"""
+
+import argparse
+import json
+import logging
+import signal
+import sys
+import time
+
+import logwriter
+from backends import create_backend
+from discovery import find_window
+from engine import MultiTargetEngine
+from scheduler import DeadlineScheduler
+from sender import KeySender, Mode
+from settings import SenderSettings
+from timing import HybridTimer
+
+logger = logging.getLogger("headless")
+
+DEFAULT_WINDOW_NAME = "VALORANT"
+
+# SenderSettings fields with the type of their flag
+SETTINGS = {
+    "light_mode_delay": (float, "Seconds between jumps in Jumping mode"),
+    "heavy_mode_path": (str, "Movement path of WASD keys"),
+    "heavy_mode_delay": (float, "Seconds every key of the path is held"),
+    "pattern_type": (str, "Movement pattern: random, circle, strafe, forward_back or custom"),
+    "movement_intensity": (float, "How active the movement is (0.1-1.0)"),
+    "direction_change_frequency": (float, "How often the direction changes (0.1-1.0)"),
+    "action_probability": (float, "Probability of additional actions (0.0-1.0)"),
+    "strafe_preference": (float, "Preference for strafing over forward/back (0.0-1.0)"),
+    "movement_smoothness": (float, "How smooth transitions are (0.1-1.0)"),
+    "pause_frequency": (float, "How often movement pauses (0.0-1.0)"),
+    "max_event_rate": (float, "Key events per second sent at most, later events wait"),
+    "event_burst": (float, "Key events sent at once before the rate limit applies"),
+    "idle_aware": (str, "true to pause while you play or the game is minimized, ignored with --backend sendinput"),
+    "afk_timeout": (float, "Seconds without input after which the game kicks the player"),
+    "markov_order": (int, "Past movement steps the next random step depends on (1-3)"),
+}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Runs the anti-AFK sender without the GUI")
+    parser.add_argument("--config", help="JSON file with the mode and settings, flags take precedence")
+    parser.add_argument("--mode", choices=KeySender.MODES_NAMES, help=f"Working mode, {Mode.LIGHT.value} by default")
+    parser.add_argument("--window-name", help=f"Part of the game window title, {DEFAULT_WINDOW_NAME!r} by default")
+    parser.add_argument(
+        "--hwnd", type=lambda value: int(value, 0), nargs="+",
+        help="Use these window handles instead of searching, several run on one scheduler thread",
+    )
+    parser.add_argument("--wait", type=float, default=0.0, help="Seconds to keep looking for the window")
+    parser.add_argument("--backend", help="Backend delivering the key events, a dispatched SendMessage by default")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds instead of running until killed")
+    parser.add_argument(
+        "--precise-timing", action="store_true",
+        help="Spin briefly before every deadline so key holds are not rounded up to the OS timer tick",
+    )
+    parser.add_argument("--trace", help="Append every sent key event to this trace file")
+    parser.add_argument("--log-file", help="Log to this file instead of stdout")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    parser.add_argument("--json-log", help="Also write structured JSONL records to this rotated file")
+    parser.add_argument("--metrics", help="Serve Prometheus metrics on a loopback host:port or on unix:/path")
+
+    settings = parser.add_argument_group("sender settings")
+    for key, (value_type, help_text) in SETTINGS.items():
+        settings.add_argument(f"--{key.replace('_', '-')}", dest=key, type=value_type, help=help_text)
+    return parser.parse_args(argv)
+
+
+def load_config(args: argparse.Namespace) -> tuple[Mode, str, dict]:
+    """Merges the config file with the flags into the mode, window name and changed settings"""
+    config = {}
+    if args.config:
+        with open(args.config, encoding="utf-8") as file:
+            config = json.load(file)
+
+    mode = Mode(args.mode or config.get("mode", Mode.LIGHT.value))
+    window_name = args.window_name or config.get("window_name", DEFAULT_WINDOW_NAME)
+    settings = {key: config[key] for key in SETTINGS if key in config}
+    settings.update({key: getattr(args, key) for key in SETTINGS if getattr(args, key) is not None})
+    return mode, window_name, settings
+
+
+def wait_for_window(window_name: str, timeout: float):
+    """Looks for the window once a second until it is found or the timeout expires"""
+    deadline = time.monotonic() + timeout
+    while True:
+        hwnd = find_window(window_name)
+        if hwnd is not None or time.monotonic() >= deadline:
+            return hwnd
+        time.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    output = {"filename": args.log_file} if args.log_file else {"stream": sys.stdout}
+    logging.basicConfig(
+        level=args.log_level,
+        format="[%(asctime)s] [%(levelname)s] %(message)s",
+        datefmt="%H:%M:%S",
+        **output,
+    )
+
+    writer = None
+    if args.json_log:
+        writer = logwriter.StructuredLogWriter(args.json_log)
+        logwriter.install(writer)
+        logging.getLogger().addHandler(logwriter.StructuredLogHandler(writer))
+    try:
+        return run(args)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def run(args: argparse.Namespace) -> int:
+    """Runs the sender until it is stopped, returns the exit code"""
+    try:
+        mode, window_name, settings = load_config(args)
+        snapshot = SenderSettings().merge(settings)
+    except (OSError, ValueError) as e:
+        logger.error(f"Invalid configuration: {e}")
+        return 2
+
+    hwnds = args.hwnd if args.hwnd is not None else [wait_for_window(window_name, args.wait)]
+    if hwnds[0] is None:
+        logger.error(f"{window_name} not found!")
+        return 1
+    if len(hwnds) > 1 and args.trace:
+        logger.error("--trace records a single window")
+        return 2
+
+    try:
+        backend = create_backend(args.backend) if args.backend else None
+        if len(hwnds) == 1:
+            runner = KeySender(
+                mode, hwnds[0], backend=backend, trace_path=args.trace, precise_timing=args.precise_timing
+            )
+            runner.update_settings(snapshot)
+            senders = [runner]
+        else:
+            scheduler = DeadlineScheduler(timer=HybridTimer()) if args.precise_timing else None
+            runner = MultiTargetEngine(backend=backend, scheduler=scheduler)
+            senders = [runner.add_target(mode, hwnd, snapshot) for hwnd in hwnds]
+    except Exception as e:
+        logger.error(f"Error during startup: {e}")
+        return 1
+
+    exporter = None
+    if args.metrics:
+        # Imported only when serving, it is not needed for the start of a plain run
+        from metrics import MetricsCollector, MetricsExporter
+
+        def window_found():
+            return all(
+                sender.backend.is_window(sender.valorant_hwnd) and sender.backend.is_window_visible(sender.valorant_hwnd)
+                for sender in senders
+            )
+
+        try:
+            exporter = MetricsExporter(MetricsCollector(lambda: senders, window_found), args.metrics)
+        except (OSError, ValueError) as e:
+            logger.error(f"Cannot serve metrics: {e}")
+            return 1
+        exporter.start()
+        logger.info(f"Serving metrics on {exporter.address}")
+
+    signal.signal(signal.SIGTERM, lambda *_: runner.stop())
+    if hasattr(signal, "SIGBREAK"):
+        signal.signal(signal.SIGBREAK, lambda *_: runner.stop())
+
+    runner.start()
+    logger.info(f"Anti-AFK started in mode: {mode.value}, window {', '.join(f'{hwnd:#x}' for hwnd in hwnds)}")
+    if settings:
+        logger.info(f"Settings: {settings}")
+
+    # The main thread only waits, so Ctrl+C and signals are handled promptly.
+    # The engine keeps running without targets, it is stopped once every window stopped
+    deadline = None if args.duration is None else time.monotonic() + args.duration
+    try:
+        while runner.is_alive():
+            if deadline is not None and time.monotonic() >= deadline:
+                runner.stop()
+            elif all(sender.finished for sender in senders):
+                runner.stop()
+            runner.join(0.25)
+    except KeyboardInterrupt:
+        runner.stop()
+        runner.join(1.0)
+
+    if exporter is not None:
+        exporter.stop()
+    if backend is not None:
+        backend.close()
+
+    # A requested stop of a single sender is logged by the sender itself, with its latency
+    if len(senders) > 1:
+        logger.info(f"Anti-AFK stopped, {runner.events_sent} key events sent to {len(senders)} windows")
+    failed = 0
+    for sender in senders:
+        if sender.stop_reason == "window_lost":
+            logger.warning(f"Anti-AFK stopped, the game window {sender.valorant_hwnd:#x} is gone or hidden")
+        elif sender.stop_reason == "error":
+            logger.error(f"Anti-AFK stopped after an error in window {sender.valorant_hwnd:#x}")
+        failed += sender.stop_reason not in (None, "requested")
+    summary = senders[0].dispatch_summary()
+    if summary:
+        logger.info(f"Key dispatch: {summary}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
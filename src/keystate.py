@@ -0,0 +1,54 @@
+"""
+Held state of the keys of one game window.
+
+Every virtual-key code is one bit of an integer, so checking, pressing and
+releasing a key are single bit operations and the table stays a single
+object whatever is held. A down message for a held key and an up message for
+a released key change nothing in the game, the table reports them so the
+sender can skip them.
+"""
+
+from mytypes import Hexadecimal
+
+
+class KeyStateTable:
+    """Bitset of the virtual keys held down in one window"""
+
+    def __init__(self):
+        self._bits = 0
+
+    def press(self, key: Hexadecimal) -> bool:
+        """Marks the key as held; returns False if it already was, the down message is redundant then"""
+        bit = 1 << key
+        if self._bits & bit:
+            return False
+        self._bits |= bit
+        return True
+
+    def release(self, key: Hexadecimal) -> bool:
+        """Marks the key as released; returns False if it was not held, the up message is redundant then"""
+        bit = 1 << key
+        if not self._bits & bit:
+            return False
+        self._bits &= ~bit
+        return True
+
+    def is_held(self, key: Hexadecimal) -> bool:
+        return bool(self._bits >> key & 1)
+
+    def held(self) -> list[Hexadecimal]:
+        """Returns the held keys in ascending order"""
+        keys = []
+        bits, key = self._bits, 0
+        while bits:
+            if bits & 1:
+                keys.append(key)
+            bits >>= 1
+            key += 1
+        return keys
+
+    def __len__(self):
+        return self._bits.bit_count()
+
+    def __bool__(self):
+        return self._bits != 0
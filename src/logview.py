@@ -0,0 +1,159 @@
+"""
+Bounded log model and its virtualized view.
+
+Lines are kept in a fixed-size ring, the oldest lines are overwritten once
+the cap is reached. append() can be called from any thread; it only queues the line,
+and the queue is flushed into the model by a GUI timer a few times per second.
+The view is a QListView with uniform rows, so only the visible lines are ever
+formatted and painted, whatever the number of lines is.
+"""
+
+import threading
+import time
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QColor, QFont
+from PyQt6.QtWidgets import QAbstractItemView, QListView
+
+from mytypes import LoggingLevel
+
+LEVEL_COLORS = {
+    LoggingLevel.DEBUG: QColor("#cccccc"),    # light gray for debug
+    LoggingLevel.INFO: QColor("#ffffff"),     # white for info
+    LoggingLevel.WARNING: QColor("#ffcc66"),  # orange for warnings
+    LoggingLevel.ERROR: QColor("#ff6b6b"),    # red for errors
+}
+
+
+class LogModel(QAbstractListModel):
+    """Ring buffer of the last log lines"""
+
+    # Emitted around every flush that changes the rows, views repaint on flushed
+    about_to_flush = pyqtSignal()
+    flushed = pyqtSignal()
+
+    DEFAULT_MAX_LINES = 10_000
+    DEFAULT_FLUSH_INTERVAL = 250  # milliseconds between flushes of queued lines
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES, flush_interval: int = DEFAULT_FLUSH_INTERVAL, parent=None):
+        """
+        Creates a new log model
+        :param max_lines: Number of lines kept, older lines are dropped
+        :param flush_interval: Milliseconds between flushes of the queued lines, no timer if 0
+        :param parent: The parent QObject
+        """
+
+        super().__init__(parent)
+        self.max_lines = max_lines
+        self._lines = [None] * max_lines
+        self._start = 0  # slot of the oldest line
+        self._count = 0
+        self._pending = []  # lines queued since the last flush
+        self._pending_lock = threading.Lock()
+        self.appended = 0  # lines ever appended
+        self.dropped = 0  # lines dropped because of the cap
+
+        self._timer = None
+        if flush_interval:
+            self._timer = QTimer(self)
+            self._timer.timeout.connect(self.flush)
+            self._timer.start(flush_interval)
+
+    def append(self, text: str, level: LoggingLevel = LoggingLevel.INFO, coalesce: str | None = None):
+        """
+        Queues a line, it is shown on the next flush
+        :param text: The text of the line
+        :param level: The logging level of the line
+        :param coalesce: Key of lines superseding each other. A queued line with the
+            same key right before this one is replaced instead of kept
+        """
+        line = (time.time(), level, text, coalesce)
+        with self._pending_lock:
+            pending = self._pending
+            if coalesce is not None and pending and pending[-1][3] == coalesce:
+                pending[-1] = line
+            else:
+                pending.append(line)
+
+    def flush(self):
+        """
+        Moves the queued lines into the model. Until the cap is reached the lines
+        are inserted as new rows; after that the row count stays the same and the
+        oldest lines are overwritten, so views never lay out all rows again.
+        Overwritten rows are announced by the flushed signal only, a dataChanged
+        over every row would make QListView visit every row
+        """
+        with self._pending_lock:
+            lines, self._pending = self._pending, []
+        if not lines:
+            return
+
+        self.about_to_flush.emit()
+        if len(lines) > self.max_lines:
+            self.dropped += len(lines) - self.max_lines
+            lines = lines[-self.max_lines:]
+        self.appended += len(lines)
+
+        inserted = min(len(lines), self.max_lines - self._count)
+        if inserted:
+            self.beginInsertRows(QModelIndex(), self._count, self._count + inserted - 1)
+            for line in lines[:inserted]:
+                self._lines[(self._start + self._count) % self.max_lines] = line
+                self._count += 1
+            self.endInsertRows()
+
+        if inserted < len(lines):
+            for line in lines[inserted:]:
+                self._lines[self._start] = line
+                self._start = (self._start + 1) % self.max_lines
+            self.dropped += len(lines) - inserted
+        self.flushed.emit()
+
+    def line(self, row: int) -> tuple:
+        """Returns the (timestamp, level, text, coalesce key) of a row, the oldest line is row 0"""
+        return self._lines[(self._start + row) % self.max_lines]
+
+    def text(self) -> str:
+        """Returns all lines as plain text"""
+        return "\n".join(self.data(self.index(row)) for row in range(self._count))
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._count
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        timestamp, level, text, _ = self.line(index.row())
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"[{time.strftime('%H:%M:%S', time.localtime(timestamp))}] [{level.value}] {text}"
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return LEVEL_COLORS.get(level)
+        return None
+
+
+class LogView(QListView):
+    """List view of a LogModel that follows new lines while scrolled to the bottom"""
+
+    def __init__(self, model: LogModel, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setUniformItemSizes(True)  # rows are never measured one by one
+        self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.setFont(QFont("Consolas", 10))
+
+        self._follow = True
+        model.about_to_flush.connect(self._remember_position)
+        model.flushed.connect(self._follow_new_lines)
+
+    def _remember_position(self):
+        scrollbar = self.verticalScrollBar()
+        self._follow = scrollbar.value() == scrollbar.maximum()
+
+    def _follow_new_lines(self):
+        # Scroll to bottom only if we were already at the bottom
+        scrollbar = self.verticalScrollBar()
+        if self._follow:
+            scrollbar.setValue(scrollbar.maximum())
+        self.viewport().update()
@@ -0,0 +1,198 @@
+"""
+Asynchronous structured log writer.
+
+Records are JSON lines with a timestamp, a level, a source, a message and any
+extra fields. Callers only put a tuple on a queue; a background thread
+serializes the records, writes them in batches and rotates the file once it
+reaches its size limit, optionally compressing the rotated files with gzip:
+
+    writer = StructuredLogWriter("logs/afk.jsonl", max_bytes=5_000_000, compress=True)
+    install(writer)
+    log(LoggingLevel.INFO, "sender", "KeySender stopped", stop_latency_ms=0.12)
+"""
+
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+from mytypes import LoggingLevel
+
+APP_NAME = "Valorant-AntiAFK"
+
+_STOP = object()
+_writer = None
+
+
+def default_log_dir() -> str:
+    """Per-user directory for log files, it also works for the frozen build"""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".local", "state")
+    return os.path.join(base, APP_NAME, "logs")
+
+
+class StructuredLogWriter(threading.Thread):
+    """Background thread appending JSONL records to a size-rotated file"""
+
+    DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+    DEFAULT_BACKUP_COUNT = 5
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+        compress: bool = True,
+    ):
+        """
+        Creates and starts a new writer thread
+        :param path: The file records are appended to, its directory is created if needed
+        :param max_bytes: Size the file is rotated at
+        :param backup_count: Number of rotated files kept as path.1 ... path.N
+        :param compress: Whether rotated files are compressed to path.N.gz
+        """
+
+        super().__init__(name="StructuredLogWriter", daemon=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._queue = queue.SimpleQueue()
+        self._put = self._queue.put
+
+        self.written = 0
+        self.rotations = 0
+        self.start()
+
+    def write(self, level: LoggingLevel, source: str, message: str, fields: dict | None = None):
+        """Queues a record; the only work done on the calling thread"""
+        self._put((time.time(), level, source, message, fields))
+
+    def sibling(self, name: str) -> str:
+        """Path of another log file next to this one, e.g. for a child process"""
+        return os.path.join(os.path.dirname(self.path), f"{name}.jsonl")
+
+    def run(self):
+        get = self._queue.get
+        while True:
+            batch = [get()]
+            # Drain everything that is queued already, so a burst costs one flush
+            try:
+                while True:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            stop = False
+            for record in batch:
+                if record is _STOP:
+                    stop = True
+                    continue
+                self._write_record(record)
+            self._file.flush()
+            if stop:
+                self._file.close()
+                return
+
+    def _write_record(self, record: tuple):
+        timestamp, level, source, message, fields = record
+        data = {
+            "ts": round(timestamp, 6),
+            "level": level.value,
+            "source": source,
+            "message": message,
+        }
+        if fields:
+            data.update(fields)
+        line = json.dumps(data, default=str, ensure_ascii=False) + "\n"
+
+        size = len(line.encode("utf-8"))
+        if self._size and self._size + size > self.max_bytes:
+            try:
+                self._rotate()
+            except OSError:
+                # e.g. a rotated file is held open by a viewer; keep appending and retry later
+                if self._file.closed:
+                    self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(line)
+        self._size += size
+        self.written += 1
+
+    def _backup_path(self, index: int) -> str:
+        return f"{self.path}.{index}" + (".gz" if self.compress else "")
+
+    def _rotate(self):
+        """Shifts path.N to path.N+1, dropping the oldest, and moves the current file to path.1"""
+        self._file.close()
+        if self.backup_count > 0:
+            oldest = self._backup_path(self.backup_count)
+            if os.path.exists(oldest):
+                os.remove(oldest)
+            for index in range(self.backup_count - 1, 0, -1):
+                if os.path.exists(self._backup_path(index)):
+                    os.replace(self._backup_path(index), self._backup_path(index + 1))
+
+            if self.compress:
+                with open(self.path, "rb") as source, gzip.open(self._backup_path(1), "wb") as target:
+                    shutil.copyfileobj(source, target)
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self._backup_path(1))
+        else:
+            os.remove(self.path)
+
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+        self.rotations += 1
+
+    def close(self, timeout: float = 1.0):
+        """Writes everything queued so far and closes the file"""
+        self._put(_STOP)
+        self.join(timeout)
+
+
+class StructuredLogHandler(logging.Handler):
+    """Forwards records of the logging module to a writer, named after their logger"""
+
+    def __init__(self, writer: StructuredLogWriter):
+        super().__init__()
+        self.writer = writer
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            level = LoggingLevel(record.levelname)
+        except ValueError:
+            level = LoggingLevel.ERROR  # CRITICAL
+        self.writer.write(level, record.name, record.getMessage())
+
+
+def install(writer: StructuredLogWriter | None):
+    """Makes the writer the destination of log()"""
+    global _writer
+    _writer = writer
+
+
+def installed() -> StructuredLogWriter | None:
+    return _writer
+
+
+def log(level: LoggingLevel, source: str, message: str, **fields):
+    """
+    Queues a structured record on the installed writer. Without a writer the
+    message goes to the standard logger of the source, so the handlers of the
+    application, e.g. the one of --log-file, receive it
+    """
+    writer = _writer
+    if writer is not None:
+        writer.write(level, source, message, fields)
+    else:
+        logging.getLogger(source).log(logging.getLevelName(level.value), message)
@@ -1,23 +1,59 @@
-import sys
-import os
-from PyQt6.QtCore import Qt
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtGui import QIcon
+import time
 
-from window import MainWindow
+STARTED = time.perf_counter()  # taken before anything heavy is imported
+
+import sys  # noqa: E402
+import os  # noqa: E402
+import multiprocessing  # noqa: E402
+
+import logwriter  # noqa: E402
+from startup import StartupTimer  # noqa: E402
+
+
+def main():
+    startup_timer = StartupTimer(STARTED)
+
+    # Qt is imported here, so sender processes spawned from this module never load it
+    from PyQt6.QtCore import Qt
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtGui import QIcon
+
+    startup_timer.mark("qt imports")
+
+    from window import MainWindow
+
+    startup_timer.mark("window imports")
 
-if __name__ == "__main__":
     app = QApplication([])
-    
+
     # Set application name and icon
     app.setApplicationName("Valorant AFK bot")
-    
+
     # Check for assets directory and set icon if it exists
     icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "icon.png")
     if os.path.exists(icon_path):
         app.setWindowIcon(QIcon(icon_path))
-    
-    window = MainWindow(None, Qt.WindowType.Widget)
+
+    startup_timer.mark("application")
+
+    try:
+        writer = logwriter.StructuredLogWriter(os.path.join(logwriter.default_log_dir(), "afk.jsonl"))
+        logwriter.install(writer)
+    except OSError:
+        writer = None  # no persistent log, messages are only printed
+    startup_timer.mark("log writer")
+
+    window = MainWindow(None, Qt.WindowType.Widget, startup_timer=startup_timer)
+    startup_timer.mark("main window")
     window.show()
-    
-    sys.exit(app.exec())
\ No newline at end of file
+    startup_timer.mark("show")
+
+    exit_code = app.exec()
+    if writer is not None:
+        writer.close()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # lets the frozen executable start sender processes
+    main()
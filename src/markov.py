@@ -0,0 +1,167 @@
+"""
+Markov model of the RANDOM movement pattern.
+
+The movement states are standing still and the eight WASD directions. The
+next state depends on the last `order` states, with transition weights
+derived from the sliders of the sender:
+
+- direction_change_frequency: how likely a step leaves the current state
+- strafe_preference: how much strafing directions are favored over forward/back
+- movement_smoothness: how strongly small turns are favored over reversals,
+  and with an order above 1, how strongly recent states are avoided, so the
+  movement does not oscillate
+
+The transition table of every context is compiled into an alias table once
+per combination of settings, after which a step costs one uniform draw and
+a few array lookups whatever the number of states:
+
+    model = MovementModel(compile_model(1, 0.5, 0.3, 0.6), sampler.stream("markov_state", 0, len(STATES)))
+    keys = model.next_keys()
+"""
+
+import math
+from array import array
+from functools import lru_cache
+
+from mytypes import Keys
+
+# Compass order, a step through the list is a 45 degree turn; the empty direction is standing still
+STATES = ("", "W", "WD", "D", "SD", "S", "SA", "A", "WA")
+IDLE = 0
+# Keys held in every state, in the W, A, S, D order the timeline presses them
+STATE_KEYS = tuple(tuple(getattr(Keys, letter) for letter in "WASD" if letter in state) for state in STATES)
+DIRECTIONS = len(STATES) - 1
+
+MAX_ORDER = 3
+IDLE_WEIGHT = 0.05  # weight of standing still for a step, against 1 for the preferred direction
+
+
+def _turn(state: int, target: int) -> int:
+    """Number of 45 degree turns between two directions, 0 to 4"""
+    difference = abs(state - target) % DIRECTIONS
+    return min(difference, DIRECTIONS - difference)
+
+
+def _axis_weight(state: int, strafe_preference: float) -> float:
+    """Weight of a direction by how much of it is strafing"""
+    direction = STATES[state]
+    strafe = ("A" in direction or "D" in direction) / 2 + ("W" not in direction and "S" not in direction) / 2
+    return strafe * strafe_preference + (1 - strafe) * (1 - strafe_preference)
+
+
+def transition_weights(
+    context: tuple, strafe_preference: float, direction_change_frequency: float, movement_smoothness: float
+) -> list[float]:
+    """
+    Returns the unnormalized weights of every next state
+    :param context: The last states, oldest first
+    """
+    current = context[-1]
+    weights = []
+    for target in range(len(STATES)):
+        if target == IDLE:
+            weight = IDLE_WEIGHT
+        else:
+            weight = max(_axis_weight(target, strafe_preference), 0.01)
+            if current != IDLE:
+                # Smooth movement keeps turning a little instead of reversing
+                weight *= math.exp(-movement_smoothness * 2.0 * _turn(current, target))
+        if target != current:
+            # Earlier states of the context are avoided, so strafing does not flip back and forth
+            weight *= (1 - 0.5 * movement_smoothness) ** context[:-1].count(target)
+        weights.append(weight)
+
+    # The current state keeps its share, the others split the rest by their weights
+    stay = IDLE_WEIGHT if current == IDLE else 1.0 - direction_change_frequency
+    others = sum(weight for target, weight in enumerate(weights) if target != current)
+    return [stay if target == current else (1.0 - stay) * weight / others for target, weight in enumerate(weights)]
+
+
+def alias_table(weights: list[float]) -> tuple[list[float], list[int]]:
+    """
+    Builds the alias table of a discrete distribution with Vose's method
+    :return: The acceptance probability and the alias of every column
+    """
+    count = len(weights)
+    total = sum(weights)
+    scaled = [weight * count / total for weight in weights]
+    probability = [1.0] * count
+    alias = list(range(count))
+    small = [column for column, value in enumerate(scaled) if value < 1.0]
+    large = [column for column, value in enumerate(scaled) if value >= 1.0]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        probability[less] = scaled[less]
+        alias[less] = more
+        scaled[more] += scaled[less] - 1.0
+        (small if scaled[more] < 1.0 else large).append(more)
+    # Whatever is left is 1 up to rounding
+    return probability, alias
+
+
+class CompiledModel:
+    """Alias tables of every context of a Markov movement model, flattened into arrays"""
+
+    def __init__(self, order: int, probability: array, alias: array):
+        self.order = order
+        self.contexts = len(STATES) ** order
+        self.probability = probability
+        self.alias = alias
+
+
+@lru_cache(maxsize=8)
+def compile_model(
+    order: int, strafe_preference: float, direction_change_frequency: float, movement_smoothness: float
+) -> CompiledModel:
+    """
+    Compiles the transition tables of the model, the result is cached, so
+    timelines rebuilt with the same sliders share their tables
+    :param order: Number of past states the next state depends on, 1 to MAX_ORDER
+    """
+    if not 1 <= order <= MAX_ORDER:
+        raise ValueError(f"Markov order must be between 1 and {MAX_ORDER}: {order}")
+
+    count = len(STATES)
+    probability = array("d")
+    alias = array("B")
+    for index in range(count ** order):
+        # Context index in base len(STATES), the oldest state is the most significant digit
+        context = tuple(index // count ** power % count for power in reversed(range(order)))
+        column_probability, column_alias = alias_table(
+            transition_weights(context, strafe_preference, direction_change_frequency, movement_smoothness)
+        )
+        probability.extend(column_probability)
+        alias.extend(column_alias)
+    return CompiledModel(order, probability, alias)
+
+
+class MovementModel:
+    """Walks a compiled model, one state per movement step"""
+
+    def __init__(self, model: CompiledModel, roll):
+        """
+        :param model: The compiled tables
+        :param roll: Function drawing a float in [0, len(STATES))
+        """
+        self._probability = model.probability
+        self._alias = model.alias
+        self._contexts = model.contexts
+        self._roll = roll
+        self.context = IDLE  # the last states as a base len(STATES) number, starting from standing still
+
+    def resume(self, context: int):
+        """Continues from the context of a model compiled from other settings, maybe of another order"""
+        self.context = context % len(STATES)
+
+    def next_state(self) -> int:
+        """Samples the next state from the table of the current context in constant time"""
+        value = self._roll()
+        column = int(value)
+        row = self.context * len(STATES)
+        state = column if value - column < self._probability[row + column] else self._alias[row + column]
+        self.context = (row + state) % self._contexts
+        return state
+
+    def next_keys(self) -> tuple:
+        """Samples the next state and returns the keys held in it"""
+        return STATE_KEYS[self.next_state()]
@@ -0,0 +1,321 @@
+"""
+Prometheus metrics of running senders, served on a loopback port or a Unix socket.
+
+Nothing is counted for the exporter itself. On every scrape it reads the
+counters a sender already keeps in its telemetry channel, the latency
+histogram of its dispatcher and its scheduler lag, so an idle exporter costs
+nothing and the sender loop never waits for it:
+
+    exporter = MetricsExporter(MetricsCollector(lambda: [sender]), "127.0.0.1:9464")
+    exporter.start()
+    print(scrape("127.0.0.1:9464"))
+
+Addresses are "host:port" with a loopback host, a bare port on 127.0.0.1, or
+"unix:/path/to/socket".
+"""
+
+import http.client
+import ipaddress
+import os
+import socket
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mytypes import Keys
+
+PREFIX = "valorant_afk"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNIX_PREFIX = "unix:"
+DEFAULT_HOST = "127.0.0.1"
+
+KEY_NAMES = {code: name for name, code in vars(Keys).items() if not name.startswith("_")}
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """
+    Splits a TCP address into its host and port
+    :raises ValueError: If the address is malformed or the host is not a loopback address
+    """
+    host, _, port = address.rpartition(":")
+    host = host or DEFAULT_HOST
+    try:
+        port = int(port)
+    except ValueError:
+        raise ValueError(f"Invalid metrics address: {address!r}") from None
+    if host != "localhost":
+        try:
+            loopback = ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            loopback = False
+        if not loopback:
+            raise ValueError(f"Metrics are only served on loopback addresses: {address!r}")
+    return host, port
+
+
+class MetricsCollector:
+    """Renders the metrics of the senders in the Prometheus text format"""
+
+    def __init__(self, senders, window_found=None):
+        """
+        :param senders: Callable returning the senders to report, KeySender or SenderProcess objects
+        :param window_found: Callable returning whether the game window is found, no window state if None
+        """
+        self.senders = senders
+        self.window_found = window_found
+        self.started_at = time.monotonic()
+
+    def render(self) -> str:
+        families = _Families()
+        families.add(
+            "process_cpu_seconds_total", "counter", "Total user and system CPU time spent in seconds",
+            time.process_time(),
+        )
+        families.add(
+            f"{PREFIX}_uptime_seconds", "gauge", "Seconds since the exporter was created",
+            time.monotonic() - self.started_at,
+        )
+        if self.window_found is not None:
+            families.add(f"{PREFIX}_window_found", "gauge", "Whether the game window is found", int(self.window_found()))
+
+        dispatchers = set()
+        for sender in self.senders():
+            labels = {"hwnd": f"{sender.valorant_hwnd:#x}", "mode": sender.mode.value}
+            self._add_sender(families, sender, labels)
+
+            limiter = getattr(sender, "limiter", None)
+            if limiter is not None:
+                self._add_limiter(families, limiter, labels)
+
+            # Senders of an engine share one dispatcher, which is reported once
+            backend = getattr(sender, "backend", None)
+            if getattr(backend, "latency", None) is not None and id(backend) not in dispatchers:
+                dispatchers.add(id(backend))
+                self._add_dispatcher(families, backend, labels)
+        return families.text()
+
+    @staticmethod
+    def _add_sender(families, sender, labels: dict):
+        telemetry = sender.telemetry
+        families.add(f"{PREFIX}_sender_running", "gauge", "Whether the sender is running", int(sender.running), labels)
+        families.add(
+            f"{PREFIX}_suspensions_total", "counter", "Times injection paused while the user played or the game was hidden",
+            telemetry.suspensions, labels,
+        )
+        families.add(
+            f"{PREFIX}_events_sent_total", "counter", "Key down and up events sent to the game window",
+            sender.events_sent, labels,
+        )
+        for code, count in enumerate(list(telemetry.keys_by_code)):
+            if count:
+                families.add(
+                    f"{PREFIX}_key_presses_total", "counter", "Key presses by virtual-key code",
+                    count, {**labels, "vk": f"{code:#04x}", "key": KEY_NAMES.get(code, "")},
+                )
+        for action, count in (("jump", telemetry.jumps), ("combo", telemetry.combos), ("pause", telemetry.pauses)):
+            families.add(f"{PREFIX}_actions_total", "counter", "Actions by type", count, {**labels, "type": action})
+        families.add(
+            f"{PREFIX}_overruns_total", "counter", "Steps of the sender loop that ran noticeably late",
+            telemetry.overruns, labels,
+        )
+        families.add(
+            f"{PREFIX}_messages_saved_total", "counter", "Redundant key messages that were not sent",
+            telemetry.messages_saved, labels,
+        )
+        families.add(
+            f"{PREFIX}_windows_lost_total", "counter", "Times the sender stopped because the window was gone",
+            telemetry.windows_lost, labels,
+        )
+        families.add(
+            f"{PREFIX}_loop_lag_mean_seconds", "gauge", "Average time scheduled key events ran late",
+            sender.mean_lag, labels,
+        )
+        families.add(
+            f"{PREFIX}_loop_lag_max_seconds", "gauge", "Longest time a scheduled key event ran late",
+            sender.max_lag, labels,
+        )
+
+    @staticmethod
+    def _add_limiter(families, limiter, labels: dict):
+        families.add(
+            f"{PREFIX}_throttled_total", "counter", "Key events deferred by the events per second budget",
+            limiter.deferred, labels,
+        )
+        families.add(
+            f"{PREFIX}_throttle_dropped_total", "counter", "Throttled key-downs skipped because they waited too long",
+            limiter.dropped, labels,
+        )
+        families.add(
+            f"{PREFIX}_throttle_delay_max_seconds", "gauge", "Longest time a throttled key event waited",
+            limiter.delay_max, labels,
+        )
+
+    @staticmethod
+    def _add_dispatcher(families, dispatcher, labels: dict):
+        latency = dispatcher.latency
+        counts, total = list(latency.counts), latency.total
+        name = f"{PREFIX}_dispatch_latency_seconds"
+        help_text = "Time from queuing a key event to its delivery"
+        cumulative = 0
+        for bound, count in zip((*latency.bounds, float("inf")), counts):
+            cumulative += count
+            families.add(name, "histogram", help_text, cumulative, {**labels, "le": _format_value(bound)}, "_bucket")
+        families.add(name, "histogram", help_text, total, labels, "_sum")
+        families.add(name, "histogram", help_text, cumulative, labels, "_count")
+        families.add(
+            f"{PREFIX}_dispatch_dropped_total", "counter", "Key-downs dropped by the dispatcher",
+            dispatcher.dropped, labels,
+        )
+        families.add(
+            f"{PREFIX}_dispatch_timeouts_total", "counter", "Key events the game window did not accept in time",
+            dispatcher.timeouts, labels,
+        )
+        families.add(
+            f"{PREFIX}_dispatch_errors_total", "counter", "Key events the backend failed to deliver with an error",
+            dispatcher.errors, labels,
+        )
+
+
+class _Families:
+    """Samples grouped by metric family, in the order the families were first added"""
+
+    def __init__(self):
+        self._families = {}
+
+    def add(self, name: str, kind: str, help_text: str, value, labels: dict | None = None, suffix: str = ""):
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = (kind, help_text, [])
+        family[2].append((name + suffix, labels, value))
+
+    def text(self) -> str:
+        lines = []
+        for name, (kind, help_text, samples) in self._families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample, labels, value in samples:
+                if labels:
+                    sample += "{" + ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items()) + "}"
+                lines.append(f"{sample} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.collector.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # a line per scrape would flood the log
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, handler):
+        # A socket left behind by a previous run would make the bind fail
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            os.remove(path)
+        super().__init__(path, handler)
+
+
+class MetricsExporter(threading.Thread):
+    """Thread serving the metrics of a collector over HTTP"""
+
+    def __init__(self, collector: MetricsCollector, address: str):
+        """
+        Creates a new exporter thread, the socket is bound right away
+        :param collector: The metrics served on every request
+        :param address: "host:port" with a loopback host, a port, or "unix:/path"
+        :raises ValueError: If the address is not a loopback or Unix socket address
+        """
+
+        super().__init__(name="MetricsExporter", daemon=True)
+        self._unix_path = None
+        if address.startswith(UNIX_PREFIX):
+            if not hasattr(socket, "AF_UNIX"):
+                raise ValueError("Unix sockets are not supported on this platform")
+            self._unix_path = address[len(UNIX_PREFIX):]
+            self._server = _UnixHTTPServer(self._unix_path, _MetricsHandler)
+        else:
+            self._server = ThreadingHTTPServer(parse_address(address), _MetricsHandler)
+            self._server.daemon_threads = True
+        self._server.collector = collector
+
+    @property
+    def address(self) -> str:
+        """The bound address, with the actual port if port 0 was asked for"""
+        if self._unix_path is not None:
+            return UNIX_PREFIX + self._unix_path
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def run(self):
+        self._server.serve_forever(poll_interval=0.5)
+
+    def stop(self):
+        """Stops serving and closes the socket"""
+        if self.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
+        if self._unix_path is not None and os.path.exists(self._unix_path):
+            os.remove(self._unix_path)
+
+
+def scrape(address: str, timeout: float = 2.0) -> str:
+    """
+    Fetches the metrics text from an exporter
+    :raises OSError: If the exporter cannot be reached or does not answer with the metrics
+    """
+    if address.startswith(UNIX_PREFIX):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(address[len(UNIX_PREFIX):])
+            sock.sendall(b"GET /metrics HTTP/1.0\r\nHost: localhost\r\n\r\n")
+            response = b"".join(iter(lambda: sock.recv(65536), b""))
+        head, _, body = response.partition(b"\r\n\r\n")
+        status = head.split(b"\r\n", 1)[0].decode("latin-1")
+        if status.split(" ")[1:2] != ["200"]:
+            raise OSError(f"Metrics request failed: {status}")
+        return body.decode("utf-8")
+
+    host, port = parse_address(address)
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request("GET", "/metrics")
+        response = connection.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise OSError(f"Metrics request failed: {response.status} {response.reason}")
+        return body.decode("utf-8")
+    finally:
+        connection.close()
+
+
+def parse(text: str) -> dict[str, float]:
+    """Returns the samples of a metrics text by their name with labels, e.g. 'x_total{type="jump"}'"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            sample, _, value = line.rpartition(" ")
+            samples[sample] = float(value)
+    return samples
@@ -11,4 +11,39 @@ class LoggingLevel(Enum):
     DEBUG = "DEBUG"
     INFO = "INFO"
     WARNING = "WARNING"
-    ERROR = "ERROR"
\ No newline at end of file
+    ERROR = "ERROR"
+
+
+class Mode(Enum):
+    """
+    Enum for the KeySender working modes
+
+    LIGHT - Just jumps with random delay between jumps and rare other key presses
+    HEAVY - Moves along a random path and rarely does random jumps
+    """
+
+    LIGHT = "Jumping"
+    HEAVY = "WASD"
+
+
+class Keys:
+    """
+    Bindings for the keys and their hexadecimal values
+    """
+
+    W = 0x57
+    A = 0x41
+    S = 0x53
+    D = 0x44
+    SPACE = 0x20
+    SHIFT = 0x10
+    CTRL = 0x11
+
+
+class MovementPattern(Enum):
+    """Different movement patterns for WASD mode"""
+    RANDOM = "random"
+    CIRCLE = "circle"
+    STRAFE = "strafe"
+    FORWARD_BACK = "forward_back"
+    CUSTOM = "custom"
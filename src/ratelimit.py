@@ -0,0 +1,66 @@
+"""
+Token bucket limiting the rate of key events sent to one game window.
+
+The bucket holds up to `burst` tokens and gains `rate` tokens per second,
+every event takes one. An event arriving at an empty bucket is not dropped,
+the caller defers it until the bucket has a token again, so a burst is
+spread out instead of cut short.
+"""
+
+
+class TokenBucket:
+    """Events per second budget of one window, driven by the caller's clock"""
+
+    def __init__(self, rate: float, burst: float):
+        """
+        :param rate: Tokens added per second
+        :param burst: Tokens the bucket holds at most, the bucket starts full
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = None
+
+        self.passed = 0  # events sent right away
+        self.deferred = 0  # events that had to wait for a token
+        self.dropped = 0  # key-downs that waited too long and were skipped
+        self.delay_total = 0.0
+        self.delay_max = 0.0
+
+    def configure(self, rate: float, burst: float):
+        """Changes the budget, the tokens collected so far are kept up to the new burst"""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = min(self._tokens, burst)
+
+    def acquire(self, now: float) -> float:
+        """
+        Takes a token if there is one
+        :return: 0 if a token was taken, otherwise the seconds until there is one; nothing is taken then
+        """
+        if self._updated is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # The tolerance absorbs rounding, a caller waking up exactly on time always gets its token
+        if self._tokens >= 1.0 - 1e-9:
+            self._tokens = max(0.0, self._tokens - 1.0)
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+    def record_delay(self, delay: float):
+        """Records how long a deferred event waited before it was sent"""
+        self.deferred += 1
+        self.delay_total += delay
+        if delay > self.delay_max:
+            self.delay_max = delay
+
+    @property
+    def mean_delay(self) -> float:
+        return self.delay_total / self.deferred if self.deferred else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"throttled {self.deferred} of {self.passed + self.deferred} events "
+            f"(limit {self.rate:g}/s, burst {self.burst:g}), dropped {self.dropped}, "
+            f"delay mean {self.mean_delay * 1000:.1f} ms, max {self.delay_max * 1000:.1f} ms"
+        )
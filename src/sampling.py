@@ -0,0 +1,75 @@
+import itertools
+import random
+
+
+class Sampler:
+    """
+    Source of all random variates used for humanization. Variates are drawn
+    in NumPy blocks and handed out one by one, every category has its own
+    stream with its own cursor into its own block. A block is refilled lazily
+    once its cursor reaches the end
+    """
+
+    DEFAULT_BLOCK_SIZE = 4096
+
+    def __init__(self, seed: int | None = None, block_size: int = DEFAULT_BLOCK_SIZE):
+        """
+        Creates a new sampler
+        :param seed: Seed of the random generator, random if None
+        :param block_size: Number of variates drawn at once for every category
+        """
+
+        import numpy as np
+
+        self._rng = np.random.default_rng(seed)
+        self._block_size = block_size
+        self._streams = {}
+        self.refills = {}  # blocks drawn so far for every category
+
+    def _blocks(self, category: str, draw):
+        while True:
+            self.refills[category] = self.refills.get(category, 0) + 1
+            yield draw(self._block_size).tolist()
+
+    def _stream(self, category: str, key: tuple, draw):
+        stream = self._streams.get(key)
+        if stream is None:
+            # chain's __next__ is a C call, so a draw costs no Python frame
+            stream = itertools.chain.from_iterable(self._blocks(category, draw)).__next__
+            self._streams[key] = stream
+        return stream
+
+    def stream(self, category: str, low: float = 0.0, high: float = 1.0):
+        """Returns a function drawing the next float in [low, high) of the category"""
+        return self._stream(
+            category,
+            (category, "uniform", low, high),
+            lambda size: self._rng.uniform(low, high, size),
+        )
+
+    def integers(self, category: str, low: int, high: int):
+        """Returns a function drawing the next integer in [low, high] of the category"""
+        return self._stream(
+            category,
+            (category, "integers", low, high),
+            lambda size: self._rng.integers(low, high, size, endpoint=True),
+        )
+
+
+class UnbufferedSampler:
+    """
+    Sampler with the same interface that draws every variate directly from
+    the random module. It is the baseline the block sampler is measured against
+    """
+
+    def __init__(self, seed: int | None = None):
+        self._random = random.Random(seed)
+        self.refills = {}
+
+    def stream(self, category: str, low: float = 0.0, high: float = 1.0):
+        if low == 0.0 and high == 1.0:
+            return self._random.random
+        return lambda: self._random.uniform(low, high)
+
+    def integers(self, category: str, low: int, high: int):
+        return lambda: self._random.randint(low, high)
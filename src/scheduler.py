@@ -0,0 +1,137 @@
+import heapq
+import itertools
+import threading
+import time
+
+from timing import CoarseTimer
+
+
+class DeadlineScheduler:
+    """
+    Runs callbacks at monotonic-clock deadlines. The owning thread sleeps until
+    the nearest deadline instead of waking up periodically to poll
+    """
+
+    def __init__(self, clock=time.monotonic, sleep=None, timer=None, on_error=None):
+        """
+        Creates a new scheduler
+        :param clock: Function returning the current monotonic time in seconds
+        :param sleep: Function waiting for the given number of seconds instead of
+            the default interruptible wait, e.g. to advance a virtual clock
+        :param timer: Strategy of the interruptible wait, see timing.py. A
+            coarse wait precise to the tick of the OS timer if None
+        :param on_error: Function called with the callback and the exception when a
+            callback raises, the run goes on then. If None the exception ends the run
+        """
+
+        self._clock = clock
+        self._sleep = sleep
+        self.timer = timer or CoarseTimer()
+        self.on_error = on_error
+        self._queue = []
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._stopped = False
+        self._thread_id = None
+
+        self.wakeups = 0  # times the scheduler thread woke up
+        self.actions = 0  # callbacks actually executed
+        self.lag_total = 0.0  # summed lateness of the executed callbacks
+        self.lag_max = 0.0
+
+    def now(self) -> float:
+        """Returns the current time of the scheduler clock"""
+        return self._clock()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @property
+    def stopped(self) -> bool:
+        """Whether stop() was called; a stopped scheduler never runs again"""
+        return self._stopped
+
+    @property
+    def wakeups_per_action(self) -> float:
+        """Average number of wakeups needed per executed callback"""
+        return self.wakeups / self.actions if self.actions else 0.0
+
+    @property
+    def mean_lag(self) -> float:
+        """Average time between a deadline and the execution of its callback"""
+        return self.lag_total / self.actions if self.actions else 0.0
+
+    def call_at(self, deadline: float, callback, *args):
+        """Schedules callback(*args) to run at the given deadline"""
+        with self._lock:
+            heapq.heappush(self._queue, (deadline, next(self._sequence), callback, args))
+            earliest = self._queue[0][0] == deadline
+        if earliest and threading.get_ident() != self._thread_id:
+            # The sleeping thread may be waiting for a later deadline
+            self._wakeup.set()
+
+    def call_later(self, delay: float, callback, *args):
+        """Schedules callback(*args) to run after the given delay"""
+        self.call_at(self._clock() + delay, callback, *args)
+
+    def clear(self):
+        """Drops all pending callbacks"""
+        with self._lock:
+            self._queue.clear()
+
+    def run(self, keep_alive: bool = False):
+        """
+        Runs callbacks until stopped or until nothing is left to run
+        :param keep_alive: Wait for new callbacks instead of returning when the queue is empty
+        """
+        self._running = True
+        self._thread_id = threading.get_ident()
+        while not self._stopped:
+            with self._lock:
+                if not self._queue:
+                    if not keep_alive:
+                        break
+                    timeout = None
+                else:
+                    deadline = self._queue[0][0]
+                    timeout = deadline - self._clock()
+                    if timeout <= 0:
+                        _, _, callback, args = heapq.heappop(self._queue)
+            if timeout is None:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                self.wakeups += 1
+                continue
+            if timeout > 0:
+                if self._sleep is None:
+                    self.timer.wait(self._wakeup, timeout)
+                    self._wakeup.clear()
+                else:
+                    self._sleep(timeout)
+                self.wakeups += 1
+                continue
+
+            self.actions += 1
+            lag = -timeout
+            self.lag_total += lag
+            if lag > self.lag_max:
+                self.lag_max = lag
+            if self.on_error is None:
+                callback(*args)
+            else:
+                try:
+                    callback(*args)
+                except Exception as e:
+                    self.on_error(callback, e)
+        self._running = False
+
+    def stop(self):
+        """
+        Stops the run loop as soon as possible. Any wait in progress is
+        interrupted, so the loop exits without waiting for its next deadline
+        """
+        self._stopped = True
+        self._wakeup.set()
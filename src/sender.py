@@ -1,50 +1,22 @@
-import random
 import threading
-from enum import Enum
 import time
-
-import win32api
-import win32con
-import win32gui
-
-from time import sleep as wait
-
-from mytypes import Hexadecimal, Handle
-
-
-class Keys:
-    """
-    Bindings for the keys and their hexadecimal values
-    """
-
-    W = 0x57
-    A = 0x41
-    S = 0x53
-    D = 0x44
-    SPACE = 0x20
-    SHIFT = 0x10
-    CTRL = 0x11
-
-
-class Mode(Enum):
-    """
-    Enum for the KeySender working modes
-
-    LIGHT - Just jumps with random delay between jumps and rare other key presses
-    HEAVY - Moves along a random path and rarely does random jumps
-    """
-
-    LIGHT = "Jumping"
-    HEAVY = "WASD"
-
-
-class MovementPattern(Enum):
-    """Different movement patterns for WASD mode"""
-    RANDOM = "random"
-    CIRCLE = "circle"
-    STRAFE = "strafe"
-    FORWARD_BACK = "forward_back"
-    CUSTOM = "custom"
+import traceback
+from collections import deque
+
+from activity import IdlePolicy, Win32ActivitySource
+from backends import InputBackend, SendMessageTimeoutBackend
+from dispatch import Dispatcher
+from keystate import KeyStateTable
+from logwriter import log
+from mytypes import Hexadecimal, Handle, Keys, LoggingLevel, Mode
+from ratelimit import TokenBucket
+from sampling import Sampler
+from scheduler import DeadlineScheduler
+from settings import SenderSettings
+from telemetry import TelemetryChannel, TelemetryEvent
+from timeline import MovementTimeline
+from timing import HybridTimer
+from tracefile import TraceWriter
 
 
 class KeySender(threading.Thread):
@@ -56,21 +28,41 @@ class KeySender(threading.Thread):
     AVAILABLE_MODES = list(Mode)
     MODES_NAMES = [mode.value for mode in AVAILABLE_MODES]
     DEFAULT_PRESS_DURATION = 0.1
-    DEFAULT_LIGHT_DELAY = 5.0
-    DEFAULT_HEAVY_DELAY = 0.5
-    DEFAULT_PATH = "WASD"
+    OVERRUN_THRESHOLD = 0.05  # seconds a step may run late before it is reported
+    MAX_THROTTLE_DELAY = 1.0  # seconds a throttled key-down may wait before it is skipped
+    ACTIVITY_CHECK_INTERVAL = 0.5  # seconds between two checks of the user activity
+    MAX_SUSPEND = 5.0  # seconds a suspended sender sleeps at most before checking again
 
     def __init__(
         self,
         mode: Mode,
         window_handle: Handle,
         press_duration: float = DEFAULT_PRESS_DURATION,
+        backend: InputBackend | None = None,
+        scheduler: DeadlineScheduler | None = None,
+        sampler: Sampler | None = None,
+        trace_path: str | None = None,
+        telemetry: TelemetryChannel | None = None,
+        activity_source=None,
+        precise_timing: bool = False,
     ):
         """
         Creates a new KeySender thread
         :param mode: The mode of the KeySender thread
         :param window_handle: The window handle of the game
         :param press_duration: Duration of key press in seconds
+        :param backend: The backend delivering key events. If None, the sender
+            creates and owns a Dispatcher over timeout-bounded SendMessage calls
+        :param scheduler: The scheduler driving the sender, e.g. one running on
+            a virtual clock. A new real-time scheduler if None
+        :param sampler: The source of random variates, a new unseeded one if None
+        :param trace_path: File every sent key event is appended to, no trace if None
+        :param telemetry: Channel the sender publishes its counters and events to, a new one if None
+        :param activity_source: Source of the user activity read when the idle_aware setting is on,
+            see activity.IdlePolicy. The Win32 session if None, which only works with backends
+            that do not inject input, idle_aware is ignored with SendInput
+        :param precise_timing: Spin briefly before every deadline of a new scheduler, so key
+            holds are not rounded up to the tick of the OS timer, see timing.HybridTimer
         """
 
         if not isinstance(mode, Mode):
@@ -79,10 +71,16 @@ class KeySender(threading.Thread):
         if mode not in self.AVAILABLE_MODES:
             raise ValueError(f"Invalid mode: {mode}")
 
-        if not win32gui.IsWindow(window_handle):
+        self._owns_backend = backend is None
+        if backend is None:
+            backend = Dispatcher(SendMessageTimeoutBackend())
+
+        if not backend.is_window(window_handle):
             raise ValueError(f"Invalid window handle: {window_handle}")
 
         self.mode = mode
+        self.backend = backend
+        self._trace = TraceWriter(trace_path) if trace_path else None
         self.valorant_hwnd = window_handle
         self._press_duration = press_duration
         self._last_window_check = 0
@@ -92,8 +90,32 @@ class KeySender(threading.Thread):
         self.daemon = True  # make thread daemon so it terminates with main
         self.running = False
 
-        self._jump_delay = self.DEFAULT_LIGHT_DELAY
-        self._last_action_time = time.time()
+        self._scheduler = scheduler or DeadlineScheduler(timer=HybridTimer() if precise_timing else None)
+        self._attached = False  # driven by a shared scheduler instead of its own thread
+        self._finished = False
+        self._key_state = KeyStateTable()  # keys held down in the game window
+        self._stop_requested_at = None
+        self.stop_latency = None  # seconds between stop() and the thread exit
+        self.started_at = None
+        self.events_sent = 0
+        self.telemetry = telemetry or TelemetryChannel()
+        self._next_step_at = 0.0
+        self.stop_reason = None  # "requested", "window_lost" or "error" once stopped
+
+        self.settings = SenderSettings()  # replaced as a whole, never modified
+
+        # Events per second budget of the window, events over it wait in order
+        self.limiter = TokenBucket(self.settings.max_event_rate, self.settings.event_burst)
+        self._limiter_settings = self.settings
+        self._throttled = deque()
+
+        # Created when the idle_aware setting is first seen on
+        self._activity_source = activity_source
+        self._activity = None
+        self._activity_checked_at = float("-inf")
+        self._idle_warned = False
+        self.suspended = False  # injection paused while the user plays or the game is hidden
+        self._last_action_time = self._scheduler.now()
         
         # Extended set of random actions
         self._random_actions = [
@@ -109,289 +131,515 @@ class KeySender(threading.Thread):
             [(Keys.SHIFT, 0.2), (Keys.W, 0.15)],   # Run forward
             [(Keys.A, 0.1), (Keys.D, 0.1)],                       # Strafe left-right
         ]
+        self._combo_chance = 0.6  # Chance to perform key combination
+
+        # Every random decision draws from its own pre-sampled stream
+        self._sampler = sampler or Sampler()
+        self._jump_jitter = self._sampler.stream("jump_delay", 0.6, 1.4)  # 40% variation
+        self._press_jitter = self._sampler.stream("press_jitter", 0.85, 1.15)
+        self._jump_press_jitter = self._sampler.stream("jump_press_jitter", 0.8, 1.2)
+        self._random_action_roll = self._sampler.stream("random_action")
+        self._random_action_index = self._sampler.integers("random_action_choice", 0, len(self._random_actions) - 1)
+        self._random_action_gap = self._sampler.stream("random_action_gap", 0.05, 0.2)
+        self._combo_roll = self._sampler.stream("combo")
+        self._combo_index = self._sampler.integers("combo_choice", 0, len(self._action_combos) - 1)
+        self._combo_gap = self._sampler.stream("combo_gap", 0.05, 0.15)
+        self._sequence_roll = self._sampler.stream("sequence")
+        self._sequence_threshold = self._sampler.integers("sequence_threshold", 3, 6)
+        self._sequence_length = self._sampler.integers("sequence_length", 2, 4)
+        self._sequence_gap = self._sampler.stream("sequence_gap", 0.05, 0.25)
 
         if self.mode == Mode.HEAVY:
             self.path = None
             self._wasd_sequence = []
-            self._key_press_time = self.DEFAULT_HEAVY_DELAY
-            self._movement_path = self.DEFAULT_PATH
-            self._combo_chance = 0.6  # Chance to perform key combination
-            self._movement_pattern_count = 0  # Movement pattern counter
-            self._max_movement_patterns = random.randint(3, 7)  # Max patterns before change
-            
-            # Enhanced WASD mode settings
-            self._movement_intensity = 0.7  # How active the movement is (0.1-1.0)
-            self._direction_change_frequency = 0.3  # How often to change direction (0.1-1.0)
-            self._action_probability = 0.4  # Probability of additional actions (0.0-1.0)
-            self._pattern_type = MovementPattern.RANDOM
-            self._strafe_preference = 0.5  # Preference for strafing vs forward/back (0.0-1.0)
-            self._movement_smoothness = 0.6  # How smooth transitions are (0.1-1.0)
-            self._pause_frequency = 0.2  # How often to pause movement (0.0-1.0)
             self._pause_duration_range = (0.5, 2.0)  # Range for pause durations
 
-    @property
-    def _jump_delay_diff(self):
-        """Returns the 1/4 of the jump delay"""
-        return self._jump_delay / 4
+            # Compiled WASD timeline, rebuilt only when relevant settings change
+            self._timeline = None
+            self._timeline_snapshot = None  # the settings snapshot the timeline was compiled from
+            self._timeline_settings = None
+            self._timeline_origin = 0.0
+            self._timeline_index = 0
+            self._timeline_next_step = 0  # first step of the block whose start was not dispatched yet
 
-    def update_settings(self, settings: dict):
-        """Updates the settings of the KeySender thread"""
-        if self.mode == Mode.LIGHT:
-            self._jump_delay = float(settings.get("light_mode_delay", self._jump_delay))
-            return
-
-        # Basic WASD settings
-        self._movement_path = settings.get("heavy_mode_path", self._movement_path)
-        self._key_press_time = float(settings.get("heavy_mode_delay", self._key_press_time))
-        
-        # Advanced WASD settings
-        self._movement_intensity = float(settings.get("movement_intensity", self._movement_intensity))
-        self._direction_change_frequency = float(settings.get("direction_change_frequency", self._direction_change_frequency))
-        self._action_probability = float(settings.get("action_probability", self._action_probability))
-        self._strafe_preference = float(settings.get("strafe_preference", self._strafe_preference))
-        self._movement_smoothness = float(settings.get("movement_smoothness", self._movement_smoothness))
-        self._pause_frequency = float(settings.get("pause_frequency", self._pause_frequency))
-        
-        pattern_type = settings.get("pattern_type", "random")
-        if isinstance(pattern_type, str):
-            try:
-                self._pattern_type = MovementPattern(pattern_type)
-            except ValueError:
-                self._pattern_type = MovementPattern.RANDOM
-        
-        # Reset counters to apply new settings
-        self._movement_pattern_count = 0
-        self._max_movement_patterns = random.randint(3, 7)
+    def update_settings(self, settings: SenderSettings | dict):
+        """
+        Replaces the settings of the KeySender thread, safe to call from any thread
+        :param settings: A new snapshot, or the changes to apply to the current one
+        :raises ValueError: If a setting is invalid, the current settings are kept then
+        """
+        if isinstance(settings, dict):
+            settings = self.settings.merge(settings)
+        # A single reference swap, the sender thread sees either the old or the new snapshot
+        self.settings = settings
+
+    def _compiled_settings(self, settings: SenderSettings | None = None) -> dict:
+        """Returns the settings the WASD timeline is compiled from"""
+        settings = settings or self.settings
+        return {
+            "key_press_time": settings.heavy_mode_delay,
+            "press_duration": self._press_duration,
+            "movement_path": settings.heavy_mode_path,
+            "pattern_type": settings.pattern_type,
+            "movement_intensity": settings.movement_intensity,
+            "direction_change_frequency": settings.direction_change_frequency,
+            "action_probability": settings.action_probability,
+            "combo_chance": self._combo_chance,
+            "strafe_preference": settings.strafe_preference,
+            "movement_smoothness": settings.movement_smoothness,
+            "markov_order": settings.markov_order,
+            "pause_frequency": settings.pause_frequency,
+            "pause_duration_range": self._pause_duration_range,
+            "random_actions": self._random_actions,
+            "action_combos": self._action_combos,
+        }
 
     @property
     def jump_delay(self):
         """Returns a random delay between the jump delay +- jump delay difference"""
-        variation = self._jump_delay * 0.4  # 40% variation
-        return random.uniform(
-            self._jump_delay - variation,
-            self._jump_delay + variation,
-        )
+        return self.settings.light_mode_delay * self._jump_jitter()
+
+    def _suspend_for(self, now: float) -> float:
+        """
+        Returns how long injection should pause because the user plays or the
+        game is hidden, 0 to go on. Only pauses while no key is held
+        """
+        settings = self.settings
+        if not settings.idle_aware or self._idle_unsupported():
+            if self.suspended:
+                self._set_suspended(False)
+            return 0.0
+        if self._key_state or self._throttled:
+            return 0.0
+        if not self.suspended and now < self._activity_checked_at + self.ACTIVITY_CHECK_INTERVAL:
+            return 0.0
+        self._activity_checked_at = now
+
+        if self._activity is None:
+            if self._activity_source is None:
+                self._activity_source = Win32ActivitySource()
+            self._activity = IdlePolicy(self._activity_source)
+        wait = min(self._activity.suspend_for(self.valorant_hwnd, settings.afk_timeout), self.MAX_SUSPEND)
+        if bool(wait) != self.suspended:
+            self._set_suspended(bool(wait))
+        return wait
+
+    def _idle_unsupported(self) -> bool:
+        """
+        Whether idle awareness cannot work with the backend. Injected input resets
+        the idle time of the session, the sender would take itself for the user
+        """
+        if self._activity_source is not None or not self.backend.injects_input:
+            return False
+        if not self._idle_warned:
+            self._idle_warned = True
+            log(
+                LoggingLevel.WARNING, "sender",
+                "idle_aware is ignored, the backend injects keys that count as user input",
+                hwnd=self.valorant_hwnd,
+            )
+        return True
+
+    def _set_suspended(self, suspended: bool):
+        self.suspended = suspended
+        if suspended:
+            self.telemetry.suspensions += 1
+        self.telemetry.publish(TelemetryEvent.SUSPENDED if suspended else TelemetryEvent.RESUMED)
 
     def is_window_active(self):
-        current_time = time.time()
+        current_time = self._scheduler.now()
         if current_time - self._last_window_check >= self._window_check_interval:
             self._last_window_check = current_time
-            return win32gui.IsWindow(self.valorant_hwnd) and win32gui.IsWindowVisible(self.valorant_hwnd)
+            return self.backend.is_window(self.valorant_hwnd) and self.backend.is_window_visible(self.valorant_hwnd)
         return True
 
-    def send_key(self, key: Hexadecimal, delay: float):
-        """Sends a key to the game"""
-        if not self.is_window_active():
-            self.running = False
+    def _key_event(self, key: Hexadecimal, down: bool):
+        """Delivers a key event within the budget of the window, or defers it until there is budget"""
+        now = self._scheduler.now()
+        if not self._throttled:
+            wait = self._acquire(now)
+            if not wait:
+                self.limiter.passed += 1
+                self._send_key_event(key, down)
+                return
+            self._scheduler.call_at(now + wait, self._send_throttled)
+        # Deferred events keep their order, so a key-up never overtakes its key-down
+        self._throttled.append((now, key, down))
+
+    def _acquire(self, now: float) -> float:
+        """Takes a token of the budget, see TokenBucket.acquire"""
+        settings = self.settings
+        if settings is not self._limiter_settings:
+            self._limiter_settings = settings
+            self.limiter.configure(settings.max_event_rate, settings.event_burst)
+        return self.limiter.acquire(now)
+
+    def _send_throttled(self):
+        """Sends the deferred events in order, as far as the budget allows"""
+        throttled = self._throttled
+        now = self._scheduler.now()
+        while throttled:
+            queued_at, key, down = throttled[0]
+            if self._key_state.is_held(key) == down:
+                # Redundant, e.g. the key-up of a skipped key-down; it is not sent and costs nothing
+                throttled.popleft()
+                self._send_key_event(key, down)
+                continue
+            if down and now - queued_at > self.MAX_THROTTLE_DELAY:
+                # Too late to still make sense; its key-up is skipped as redundant
+                throttled.popleft()
+                self.limiter.dropped += 1
+                continue
+            wait = self._acquire(now)
+            if wait:
+                self._scheduler.call_at(now + wait, self._send_throttled)
+                return
+            throttled.popleft()
+            self.limiter.record_delay(now - queued_at)
+            self._send_key_event(key, down)
+
+    def _send_key_event(self, key: Hexadecimal, down: bool):
+        """Delivers a single key down/up message to the game window"""
+        if down:
+            if not self.running:
+                return
+            if not self.is_window_active():
+                self.telemetry.windows_lost += 1
+                self.telemetry.publish(TelemetryEvent.WINDOW_LOST)
+                self.stop_reason = "window_lost"
+                self.stop()
+                return
+            if not self._key_state.press(key):
+                self.telemetry.messages_saved += 1  # e.g. a combo pressing a key the movement holds
+                return
+            self.telemetry.keys_sent += 1
+            self.telemetry.keys_by_code[key & 0xFF] += 1
+        elif not self._key_state.release(key):
+            if self.running:
+                self.telemetry.messages_saved += 1
             return
-            
+
+        self.backend.send(self.valorant_hwnd, key, down)
+        self.events_sent += 1
+        if self._trace is not None:
+            self._trace.record(self._scheduler.now(), self.valorant_hwnd, key, down)
+
+    def _release_held_keys(self):
+        """Releases every key that is still held down, even if releasing one of them fails"""
+        for key in self._key_state.held():
+            try:
+                self._send_key_event(key, False)  # never deferred
+            except Exception as e:
+                log(LoggingLevel.ERROR, "sender", f"Could not release key {key:#x}: {e}", hwnd=self.valorant_hwnd)
+
+    def send_key(self, key: Hexadecimal, delay: float, at: float) -> float:
+        """
+        Schedules a key press starting at the given time
+        :return: The time when the key is released
+        """
         # Small random variation in press duration
-        actual_delay = delay * random.uniform(0.85, 1.15)
-        
-        win32api.SendMessage(self.valorant_hwnd, win32con.WM_KEYDOWN, key, 0)
-        wait(actual_delay)
-        win32api.SendMessage(self.valorant_hwnd, win32con.WM_KEYUP, key, 0)
-
-    def send_key_combination(self, keys: list, durations: list):
-        """Sends multiple keys simultaneously"""
-        if not self.is_window_active():
-            self.running = False
-            return
-            
-        # Press all keys down
-        for key in keys:
-            win32api.SendMessage(self.valorant_hwnd, win32con.WM_KEYDOWN, key, 0)
-        
-        # Wait for the duration
-        wait(max(durations) * random.uniform(0.9, 1.1))
-        
-        # Release all keys
-        for key in keys:
-            win32api.SendMessage(self.valorant_hwnd, win32con.WM_KEYUP, key, 0)
-
-    def generate_movement_pattern(self):
-        """Generate movement pattern based on selected type"""
-        if self._pattern_type == MovementPattern.CIRCLE:
-            return ["W", "WD", "D", "SD", "S", "SA", "A", "WA"]
-        elif self._pattern_type == MovementPattern.STRAFE:
-            return ["A", "D"] * random.randint(2, 4)
-        elif self._pattern_type == MovementPattern.FORWARD_BACK:
-            return ["W", "S"] * random.randint(2, 3)
-        elif self._pattern_type == MovementPattern.CUSTOM:
-            return list(self._movement_path.upper())
-        else:  # RANDOM
-            directions = []
-            length = random.randint(3, 8)
-            for _ in range(length):
-                if random.random() < self._strafe_preference:
-                    directions.append(random.choice(["A", "D"]))
-                else:
-                    directions.append(random.choice(["W", "S"]))
-            return directions
-
-    def perform_random_action(self):
-        """Performs a random action with a small chance"""
-        if random.random() < (0.2 * self._action_probability):
-            key, duration = random.choice(self._random_actions)
-            self.send_key(key, duration)
-            
+        actual_delay = delay * self._press_jitter()
+
+        self._scheduler.call_at(at, self._key_event, key, True)
+        self._scheduler.call_at(at + actual_delay, self._key_event, key, False)
+        return at + actual_delay
+
+    def perform_random_action(self, at: float) -> float:
+        """
+        Schedules a random action with a small chance
+        :return: The time when the action is finished
+        """
+        if self._random_action_roll() < (0.2 * self.settings.action_probability):
+            key, duration = self._random_actions[self._random_action_index()]
+            at = self.send_key(key, duration, at)
+
             # Sometimes add a second random action right after the first
-            if random.random() < 0.3:
-                wait(random.uniform(0.05, 0.2))
-                second_key, second_duration = random.choice(self._random_actions)
+            if self._random_action_roll() < 0.3:
+                at += self._random_action_gap()
+                second_key, second_duration = self._random_actions[self._random_action_index()]
                 if second_key != key:  # Avoid repeating the same key
-                    self.send_key(second_key, second_duration)
+                    at = self.send_key(second_key, second_duration, at)
+        return at
 
-    def perform_action_combo(self):
-        if random.random() < (self._combo_chance * self._action_probability):
-            combo = random.choice(self._action_combos)
+    def perform_action_combo(self, at: float) -> float | None:
+        """
+        Schedules a random action combo with a chance
+        :return: The time when the combo is finished, None if it was skipped
+        """
+        if self._combo_roll() < (self._combo_chance * self.settings.action_probability):
+            combo = self._action_combos[self._combo_index()]
             for key, duration in combo:
-                if not self.running:
-                    break
-                self.send_key(key, duration)
-                wait(random.uniform(0.05, 0.15))
-            return True
-        return False
+                at = self.send_key(key, duration, at)
+                at += self._combo_gap()
+            return at
+        return None
 
     def light_mode(self):
         """
-        Runs the light mode - just jumps with random delay between jumps and
+        Starts the light mode - just jumps with random delay between jumps and
         rare other key presses and mouse movements
         """
-        action_variance_counter = 0
-        combo_counter = 0
-        
-        while self.running:
-            current_time = time.time()
-            if current_time - self._last_action_time >= self.jump_delay:
-                # With some probability perform combo instead of regular jump
-                if combo_counter >= 3 and random.random() < 0.4:
-                    # Perform combo actions
-                    performed_combo = self.perform_action_combo()
-                    if performed_combo:
-                        combo_counter = 0
-                else:
-                    # Regular action - jump with variations
-                    self.send_key(Keys.SPACE, self._press_duration * random.uniform(0.8, 1.2))
-                    combo_counter += 1
-                
-                # Perform random action
-                self.perform_random_action()
-                
-                # Sometimes do more complex sequences
-                action_variance_counter += 1
-                if action_variance_counter >= random.randint(3, 6) and random.random() < 0.35:
-                    # Emulate equipment checking or other actions
-                    action_variance_counter = 0
-                    sequence = []
-                    
-                    # Random sequence of 2-4 keys
-                    for _ in range(random.randint(2, 4)):
-                        key, duration = random.choice(self._random_actions)
-                        sequence.append((key, duration))
-                    
-                    # Execute sequence with different delays
-                    for key, duration in sequence:
-                        if not self.running:
-                            break
-                        self.send_key(key, duration)
-                        # More natural pauses between presses
-                        wait(random.uniform(0.05, 0.25))
-                
-                self._last_action_time = current_time
-            
-            # Dynamic delay to reduce CPU load
-            wait(random.uniform(0.08, 0.15))
+        self._action_variance_counter = 0
+        self._combo_counter = 0
+        self._schedule_step(self._scheduler.now() + self.jump_delay, self._light_mode_step)
+
+    def _schedule_step(self, deadline: float, step):
+        """Schedules the next step of the mode, remembering when it is due"""
+        self._next_step_at = deadline
+        self._scheduler.call_at(deadline, step)
+
+    def _check_overrun(self, now: float):
+        """Reports a step that ran noticeably later than it was scheduled"""
+        lag = now - self._next_step_at
+        if lag > self.OVERRUN_THRESHOLD:
+            self.telemetry.overruns += 1
+            self.telemetry.publish(TelemetryEvent.OVERRUN, lag)
+
+    def _light_mode_step(self):
+        """Schedules one round of light mode actions and the next round after it"""
+        if not self.running:
+            return
+        current_time = self._scheduler.now()
+        self._check_overrun(current_time)
+        wait = self._suspend_for(current_time)
+        if wait:
+            self._schedule_step(current_time + wait, self._light_mode_step)
+            return
+        at = current_time
+
+        # With some probability perform combo instead of regular jump
+        if self._combo_counter >= 3 and self._combo_roll() < 0.4:
+            # Perform combo actions
+            combo_end = self.perform_action_combo(at)
+            if combo_end is not None:
+                self._combo_counter = 0
+                at = combo_end
+                self.telemetry.combos += 1
+                self.telemetry.publish(TelemetryEvent.COMBO, 1)
+        else:
+            # Regular action - jump with variations
+            at = self.send_key(Keys.SPACE, self._press_duration * self._jump_press_jitter(), at)
+            self._combo_counter += 1
+            self.telemetry.jumps += 1
+
+        # Perform random action
+        at = self.perform_random_action(at)
+
+        # Sometimes do more complex sequences
+        self._action_variance_counter += 1
+        if self._action_variance_counter >= self._sequence_threshold() and self._sequence_roll() < 0.35:
+            # Emulate equipment checking or other actions
+            self._action_variance_counter = 0
+
+            # Random sequence of 2-4 keys with more natural pauses between presses
+            for _ in range(self._sequence_length()):
+                key, duration = self._random_actions[self._random_action_index()]
+                at = self.send_key(key, duration, at)
+                at += self._sequence_gap()
+
+        self._last_action_time = current_time
+        next_time = max(current_time + self.jump_delay, at)
+        self._schedule_step(next_time, self._light_mode_step)
 
     def heavy_mode(self):
         """
-        Enhanced WASD mode with more realistic movement patterns and customizable behavior
+        Starts the enhanced WASD mode with more realistic movement patterns and customizable behavior
         """
-        pattern_step = 0
-        current_pattern = self.generate_movement_pattern()
-        last_direction_change = time.time()
-        
-        while self.running:
-            current_time = time.time()
-            
-            # Check if we should pause movement
-            if random.random() < self._pause_frequency:
-                pause_duration = random.uniform(*self._pause_duration_range)
-                wait(pause_duration)
-                continue
-            
-            # Update movement pattern based on frequency and intensity
-            direction_change_interval = (2.0 - self._direction_change_frequency) * 3.0
-            if (current_time - last_direction_change) >= direction_change_interval:
-                current_pattern = self.generate_movement_pattern()
-                pattern_step = 0
-                last_direction_change = current_time
-            
-            # Get current movement direction
-            if pattern_step >= len(current_pattern):
-                pattern_step = 0
-                
-            direction = current_pattern[pattern_step]
-            pattern_step += 1
-            
-            # Convert direction to keys
-            movement_keys = []
-            if "W" in direction:
-                movement_keys.append(Keys.W)
-            if "A" in direction:
-                movement_keys.append(Keys.A)
-            if "S" in direction:
-                movement_keys.append(Keys.S)
-            if "D" in direction:
-                movement_keys.append(Keys.D)
-            
-            # Apply movement intensity
-            base_duration = self._key_press_time
-            movement_duration = base_duration * (0.5 + self._movement_intensity * 0.8)
-            movement_duration *= random.uniform(0.8, 1.2)  # Add some randomness
-            
-            # Execute movement
-            if movement_keys:
-                if len(movement_keys) == 1:
-                    self.send_key(movement_keys[0], movement_duration)
-                else:
-                    # Multiple keys (diagonal movement)
-                    self.send_key_combination(movement_keys, [movement_duration] * len(movement_keys))
-            
-            # Add additional actions based on probability
-            if random.random() < (0.4 * self._action_probability):
-                if random.random() < 0.6:  # Jump
-                    wait(random.uniform(0.05, 0.15))
-                    self.send_key(Keys.SPACE, self._press_duration)
-                elif random.random() < 0.3:  # Sprint
-                    self.send_key(Keys.SHIFT, self._press_duration * 2)
-                else:  # Crouch
-                    self.send_key(Keys.CTRL, self._press_duration * 1.5)
-            
-            # Perform random additional actions
-            self.perform_random_action()
-            
-            # Apply smoothness factor to pause between movements
-            base_pause = 0.1
-            smoothness_pause = base_pause * (2.0 - self._movement_smoothness)
-            wait(random.uniform(smoothness_pause * 0.5, smoothness_pause * 1.5))
-            
-            # Occasionally perform combo actions
-            if random.random() < (0.3 * self._action_probability):
-                self.perform_action_combo()
+        self._start_timeline(self._scheduler.now())
+
+    def _start_timeline(self, origin: float, resume_step: int | None = None):
+        """
+        Compiles the current settings into a timeline starting at the given time
+        :param resume_step: Step of the current block the new timeline takes the place of, continuing
+            its movement. The movement starts over if None
+        """
+        settings = self.settings
+        previous, previous_origin = self._timeline, self._timeline_origin
+        self._timeline_snapshot = settings
+        self._timeline_settings = self._compiled_settings(settings)
+        self._timeline = MovementTimeline(**self._timeline_settings, sampler=self._sampler)
+        if resume_step is not None and previous is not None:
+            self._timeline.resume(previous, resume_step, origin - previous_origin)
+        self._timeline_origin = origin
+        self._timeline_index = 0
+        self._timeline_next_step = 0
+        self._timeline.fill()
+        self._schedule_step(origin + self._timeline.offsets[0], self._timeline_step)
+
+    def _count_steps(self, timeline: MovementTimeline, first: int, last: int):
+        """Publishes the jumps, combos and pauses of the dispatched steps first to last, excluding last"""
+        combos = sum(timeline.step_combos[first:last])
+        pauses = sum(timeline.step_pauses[first:last])
+        telemetry = self.telemetry
+        telemetry.jumps += sum(timeline.step_jumps[first:last])
+        if combos:
+            telemetry.combos += combos
+            telemetry.publish(TelemetryEvent.COMBO, combos)
+        if pauses:
+            telemetry.pauses += pauses
+            telemetry.publish(TelemetryEvent.PAUSE, pauses)
+
+    def _timeline_step(self):
+        """Sends every timeline event that is due and schedules the next one"""
+        if not self.running:
+            return
+        timeline = self._timeline
+        offsets, keys, downs = timeline.offsets, timeline.keys, timeline.downs
+        now = self._scheduler.now()
+        self._check_overrun(now)
+        was_suspended = self.suspended
+        wait = self._suspend_for(now)
+        if wait:
+            self._schedule_step(now + wait, self._timeline_step)
+            return
+        if was_suspended:
+            # Continue with fresh movement instead of catching up on the paused events
+            self._start_timeline(now)
+            return
+        origin = self._timeline_origin
+        index = self._timeline_index
+        step_starts, step = timeline.step_starts, self._timeline_next_step
+
+        while True:
+            if index >= timeline.length:
+                # Steps without events, pauses at the end of the block, are over as well
+                self._count_steps(timeline, step, timeline.BLOCK_STEPS)
+                index = step = 0
+                if not timeline.fill():
+                    # The whole block is a pause, wait until it is over
+                    self._timeline_index = self._timeline_next_step = 0
+                    self._schedule_step(origin + timeline.end, self._timeline_step)
+                    return
+            # Compared as absolute times, the way the step was scheduled, so rounding never stalls it
+            if origin + offsets[index] > now:
+                break
+
+            first = step
+            while step < timeline.BLOCK_STEPS and step_starts[step] <= index:
+                step += 1
+            if step != first:
+                settings = self.settings
+                if settings is not self._timeline_snapshot and not self._key_state and not self._throttled:
+                    if self._compiled_settings(settings) != self._timeline_settings:
+                        # Settings changed; switch between steps, so no key stays held and no step is cut short.
+                        # The step beginning now is replaced, the ones before it are over
+                        self._count_steps(timeline, first, step - 1)
+                        self._start_timeline(now, resume_step=step - 1)
+                        return
+                    self._timeline_snapshot = settings  # nothing the timeline uses has changed
+                self._count_steps(timeline, first, step)
+
+            self._key_event(keys[index], downs[index])
+            index += 1
+
+        self._timeline_index = index
+        self._timeline_next_step = step
+        self._schedule_step(origin + offsets[index], self._timeline_step)
+
+    @property
+    def finished(self) -> bool:
+        """Whether the sender released its keys and closed its resources"""
+        return self._finished
+
+    @property
+    def actions(self) -> int:
+        """Number of scheduled actions run so far"""
+        return self._scheduler.actions
+
+    @property
+    def wakeups_per_action(self) -> float:
+        """Average number of thread wakeups per scheduled action"""
+        return self._scheduler.wakeups_per_action
+
+    @property
+    def mean_lag(self) -> float:
+        """Average time the scheduled actions ran late"""
+        return self._scheduler.mean_lag
+
+    @property
+    def max_lag(self) -> float:
+        """Longest time a scheduled action ran late"""
+        return self._scheduler.lag_max
+
+    def dispatch_summary(self) -> str:
+        """Statistics of the key dispatch, of the throttling and of the timing, empty if there are none"""
+        parts = [self.backend.summary(), self._scheduler.timer.summary()]
+        if self.limiter.deferred or self.limiter.dropped:
+            parts.append(self.limiter.summary())
+        return ", ".join(part for part in parts if part)
+
+    @property
+    def dispatch_rate(self) -> float:
+        """Key events sent per second since the sender was started"""
+        if self.started_at is None:
+            return 0.0
+        elapsed = self._scheduler.now() - self.started_at
+        return self.events_sent / elapsed if elapsed > 0 else 0.0
+
+    def attach(self):
+        """
+        Starts the sender on a scheduler run by someone else, e.g. an engine
+        driving many windows from one thread. Must be called from the thread
+        running the scheduler; the sender thread itself is never started
+        """
+        self._attached = True
+        self.begin()
+
+    def begin(self):
+        """Schedules the first action of the selected mode"""
+        self.running = True
+        self.started_at = self._scheduler.now()
+        self.telemetry.publish(TelemetryEvent.STARTED)
+        if self.mode == Mode.LIGHT:
+            self.light_mode()
+        elif self.mode == Mode.HEAVY:
+            self.heavy_mode()
+
+    def finish(self):
+        """Releases all held keys and closes the resources owned by the sender"""
+        if self._finished:
+            return
+        self._finished = True
+        self.running = False
+        self._release_held_keys()
+        if self._owns_backend:
+            self.backend.close()
+        if self._trace is not None:
+            self._trace.close()
+        self.telemetry.publish(TelemetryEvent.STOPPED, self.stop_reason or "requested")
+        if self._stop_requested_at is not None:
+            self.stop_latency = time.perf_counter() - self._stop_requested_at
+            log(
+                LoggingLevel.INFO, "sender", f"KeySender stopped in {self.stop_latency * 1000:.2f} ms",
+                hwnd=self.valorant_hwnd, stop_latency_ms=round(self.stop_latency * 1000, 3),
+                events_sent=self.events_sent, wakeups_per_action=round(self.wakeups_per_action, 3),
+            )
 
     def run(self):
         """Starts the anti afk thread"""
-        self.running = True
         try:
-            if self.mode == Mode.LIGHT:
-                self.light_mode()
-            elif self.mode == Mode.HEAVY:
-                self.heavy_mode()
+            self.begin()
+            self._scheduler.run()
         except Exception as e:
-            print(f"Error in KeySender thread: {e}")
-            self.running = False
+            self.stop_reason = "error"
+            log(
+                LoggingLevel.ERROR, "sender", f"Error in KeySender thread: {e}",
+                hwnd=self.valorant_hwnd, traceback=traceback.format_exc(),
+            )
+        finally:
+            self._scheduler.stop()
+            self.finish()
 
     def stop(self):
-        """Stops the anti afk thread"""
+        """
+        Stops the anti afk thread. The sender wakes up immediately, releases
+        all held keys and exits without waiting for its next action. An attached
+        sender leaves the shared scheduler running and only finishes itself
+        """
+        if self._stop_requested_at is None:
+            self._stop_requested_at = time.perf_counter()
         self.running = False
+        if self._attached:
+            self._scheduler.call_at(self._scheduler.now(), self.finish)
+        else:
+            self._scheduler.stop()
@@ -0,0 +1,125 @@
+"""
+Immutable, validated settings snapshots of a KeySender.
+
+Values are parsed and checked once, when a snapshot is made, and a snapshot is
+never modified afterwards. A sender takes a new snapshot with one reference
+assignment, so its thread always reads a complete and consistent set of
+settings without any lock:
+
+    settings = SenderSettings().merge({"pattern_type": "circle", "pause_frequency": "0.3"})
+    sender.update_settings(settings)
+"""
+
+from dataclasses import dataclass, fields, replace
+
+from mytypes import MovementPattern
+
+WASD_KEYS = frozenset("WASD")
+
+# Inclusive bounds of the numeric settings
+RANGES = {
+    "light_mode_delay": (0.1, 60.0),
+    "heavy_mode_delay": (0.1, 5.0),
+    "movement_intensity": (0.1, 1.0),
+    "direction_change_frequency": (0.1, 1.0),
+    "action_probability": (0.0, 1.0),
+    "strafe_preference": (0.0, 1.0),
+    "movement_smoothness": (0.1, 1.0),
+    "pause_frequency": (0.0, 1.0),
+    "max_event_rate": (1.0, 1000.0),
+    "event_burst": (1.0, 1000.0),
+    "afk_timeout": (20.0, 3600.0),
+    "markov_order": (1, 3),
+}
+
+INTEGERS = {"markov_order"}
+FLAGS = {"idle_aware"}
+TRUE_STRINGS = {"1", "true", "yes", "on"}
+FALSE_STRINGS = {"0", "false", "no", "off"}
+
+
+@dataclass(frozen=True)
+class SenderSettings:
+    """Every setting of a KeySender, the defaults are the ones of a new sender"""
+
+    light_mode_delay: float = 5.0  # seconds between jumps
+    heavy_mode_delay: float = 0.5  # seconds every key of the path is held
+    heavy_mode_path: str = "WASD"
+    pattern_type: MovementPattern = MovementPattern.RANDOM
+    movement_intensity: float = 0.7  # How active the movement is (0.1-1.0)
+    direction_change_frequency: float = 0.3  # How often to change direction (0.1-1.0)
+    action_probability: float = 0.4  # Probability of additional actions (0.0-1.0)
+    strafe_preference: float = 0.5  # Preference for strafing vs forward/back (0.0-1.0)
+    movement_smoothness: float = 0.6  # How smooth transitions are (0.1-1.0)
+    pause_frequency: float = 0.2  # How often to pause movement (0.0-1.0)
+    max_event_rate: float = 20.0  # key events per second sent to the window at most, on average
+    event_burst: float = 10.0  # key events sent at once before max_event_rate applies
+    idle_aware: bool = False  # pause while the user plays or the game is minimized
+    afk_timeout: float = 60.0  # seconds without input after which the game kicks the player
+    markov_order: int = 1  # past movement steps the next RANDOM step depends on (1-3)
+
+    def merge(self, changes: dict) -> "SenderSettings":
+        """
+        Returns a snapshot with the changes applied
+        :param changes: Setting names with their new values, given as their type or as strings
+        :raises ValueError: If a name is unknown or a value is invalid; nothing is applied then
+        """
+
+        if not changes:
+            return self
+        unknown = changes.keys() - self.names()
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+
+        parsed = {name: _parse(name, value) for name, value in changes.items()}
+        settings = replace(self, **parsed)
+        return self if settings == self else settings
+
+    def diff(self, other: "SenderSettings") -> dict:
+        """Returns the settings of this snapshot that differ from the other one"""
+        return {
+            field.name: getattr(self, field.name)
+            for field in fields(self)
+            if getattr(self, field.name) != getattr(other, field.name)
+        }
+
+    @classmethod
+    def names(cls) -> set[str]:
+        return {field.name for field in fields(cls)}
+
+
+def _parse(name: str, value):
+    """Converts one setting to its type and checks it"""
+    if name == "pattern_type":
+        try:
+            return MovementPattern(value.lower() if isinstance(value, str) else value)
+        except ValueError:
+            raise ValueError(f"Invalid pattern_type: {value!r}") from None
+
+    if name in FLAGS:
+        if isinstance(value, str):
+            if value.strip().lower() in TRUE_STRINGS:
+                return True
+            if value.strip().lower() in FALSE_STRINGS:
+                return False
+            raise ValueError(f"Invalid {name}, expected true or false: {value!r}")
+        return bool(value)
+
+    if name == "heavy_mode_path":
+        path = str(value).upper()
+        if not path or not set(path) <= WASD_KEYS:
+            raise ValueError(f"Invalid heavy_mode_path, only WASD keys are allowed: {value!r}")
+        return path
+
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name}: {value!r}") from None
+    if name in INTEGERS:
+        if not number.is_integer():
+            raise ValueError(f"{name} must be a whole number: {value!r}")
+        number = int(number)
+    low, high = RANGES[name]
+    if not low <= number <= high:
+        raise ValueError(f"{name} must be between {low} and {high}: {number}")
+    return number
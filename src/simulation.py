@@ -0,0 +1,141 @@
+"""
+Faster-than-real-time simulation of the KeySender behavior.
+
+The sender runs against a virtual clock and a recording sink, so hours of
+behavior are simulated in seconds on any platform. The recorded event stream
+is summarized to validate a configuration against the AFK timeout:
+
+    python src/simulation.py --mode WASD --hours 24 --afk-timeout 60 --settings '{"pause_frequency": 0.5}'
+"""
+
+import argparse
+import json
+
+from backends import RecordingBackend
+from sampling import Sampler
+from scheduler import DeadlineScheduler
+from sender import KeySender, Mode
+
+SIMULATED_HWND = 1
+
+
+class VirtualClock:
+    """Monotonic clock that only moves forward when it is told to"""
+
+    def __init__(self, start: float = 0.0):
+        self.time = start
+
+    def monotonic(self) -> float:
+        return self.time
+
+    def advance(self, seconds: float):
+        self.time += seconds
+
+
+class SimulationResult:
+    """Recorded event stream of a simulation with its summary statistics"""
+
+    def __init__(self, events: RecordingBackend, duration: float, wakeups_per_action: float):
+        self.events = events
+        self.duration = duration
+        self.wakeups_per_action = wakeups_per_action
+
+        timestamps, downs = events.timestamps, events.downs
+        self.key_presses = sum(downs)
+        self.events_per_minute = len(events) / (duration / 60) if duration else 0.0
+
+        # Gaps between consecutive events, including the edges of the session
+        edges = [0.0, *timestamps, duration]
+        gaps = [later - earlier for earlier, later in zip(edges, edges[1:])]
+        self.longest_no_input = max(gaps)
+
+        # Idle gaps are the stretches where no key is held at all
+        self.idle_gaps = []
+        held = 0
+        idle_since = 0.0
+        for timestamp, down in zip(timestamps, downs):
+            if down:
+                if not held:
+                    self.idle_gaps.append(timestamp - idle_since)
+                held += 1
+            else:
+                held = max(0, held - 1)
+                if not held:
+                    idle_since = timestamp
+        if not held:
+            self.idle_gaps.append(duration - idle_since)
+
+    @property
+    def mean_idle_gap(self) -> float:
+        return sum(self.idle_gaps) / len(self.idle_gaps) if self.idle_gaps else 0.0
+
+    def passes(self, afk_timeout: float) -> bool:
+        """Returns True if no input-free window reaches the AFK timeout"""
+        return self.longest_no_input < afk_timeout
+
+    def summary(self) -> str:
+        return (
+            f"simulated {self.duration / 3600:.2f} h: {len(self.events)} events, "
+            f"{self.key_presses} key presses, {self.events_per_minute:.1f} events/min, "
+            f"mean idle gap {self.mean_idle_gap:.2f} s, "
+            f"longest no-input window {self.longest_no_input:.2f} s, "
+            f"{self.wakeups_per_action:.2f} wakeups per action"
+        )
+
+
+def simulate(
+    mode: Mode,
+    duration: float,
+    settings: dict | None = None,
+    seed: int | None = None,
+    trace_path: str | None = None,
+) -> SimulationResult:
+    """
+    Runs the KeySender behavior for the given virtual duration
+    :param mode: The mode of the simulated KeySender
+    :param duration: Simulated time in seconds
+    :param settings: Settings passed to KeySender.update_settings
+    :param seed: Seed of the random variates, so runs can be reproduced
+    :param trace_path: File the simulated events are appended to as a binary trace
+    """
+
+    clock = VirtualClock()
+    scheduler = DeadlineScheduler(clock=clock.monotonic, sleep=clock.advance)
+    events = RecordingBackend(clock=clock.monotonic)
+
+    sender = KeySender(
+        mode,
+        SIMULATED_HWND,
+        backend=events,
+        scheduler=scheduler,
+        sampler=Sampler(seed),
+        trace_path=trace_path,
+    )
+    sender.update_settings(settings or {})
+    scheduler.call_at(duration, sender.stop)
+    sender.run()  # runs in the calling thread, the virtual clock never sleeps
+
+    return SimulationResult(events, duration, sender.wakeups_per_action)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulates the KeySender behavior faster than real time")
+    parser.add_argument("--mode", choices=KeySender.MODES_NAMES, default=Mode.LIGHT.value)
+    parser.add_argument("--hours", type=float, default=24.0, help="Simulated session length")
+    parser.add_argument("--settings", type=json.loads, default={}, help="Settings as a JSON object")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible runs")
+    parser.add_argument("--trace", help="Append the simulated events to this trace file")
+    parser.add_argument("--afk-timeout", type=float, help="Fail if any no-input window reaches this many seconds")
+    args = parser.parse_args()
+
+    result = simulate(Mode(args.mode), args.hours * 3600, args.settings, args.seed, args.trace)
+    print(result.summary())
+
+    if args.afk_timeout is not None:
+        passed = result.passes(args.afk_timeout)
+        print(f"AFK timeout {args.afk_timeout:g} s: {'PASS' if passed else 'FAIL'}")
+        raise SystemExit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
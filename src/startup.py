@@ -0,0 +1,32 @@
+import time
+
+
+class StartupTimer:
+    """
+    Splits the application startup into named phases. Every mark ends the
+    current phase, so the phases add up to the total startup time
+    """
+
+    def __init__(self, origin: float | None = None):
+        """
+        Creates a new timer
+        :param origin: perf_counter() value the startup began at, now if None
+        """
+
+        self._origin = origin if origin is not None else time.perf_counter()
+        self._last = self._origin
+        self.phases = []  # (name, seconds) pairs in startup order
+
+    def mark(self, phase: str):
+        """Ends the phase with the given name"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    @property
+    def total(self) -> float:
+        return self._last - self._origin
+
+    def summary(self) -> str:
+        phases = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.phases)
+        return f"Startup took {self.total * 1000:.1f} ms: {phases}"
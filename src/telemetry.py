@@ -0,0 +1,84 @@
+"""
+Single-producer/single-consumer telemetry channel from a sender to the GUI.
+
+The sender thread is the only writer of the counters and of the head of the
+event ring, the GUI thread is the only writer of the tail. Every index is
+written by one side only, so neither side ever takes a lock; when the ring is
+full new events are counted as dropped instead of blocking the sender.
+"""
+
+import time
+from enum import Enum
+
+
+class TelemetryEvent(Enum):
+    """Kinds of events published by a sender"""
+
+    STARTED = "started"
+    COMBO = "combo"  # value: number of combos
+    PAUSE = "pause"  # value: number of pauses
+    WINDOW_LOST = "window_lost"
+    OVERRUN = "overrun"  # value: seconds the sender loop ran late
+    SUSPENDED = "suspended"  # injection paused while the user plays or the game is hidden
+    RESUMED = "resumed"
+    STOPPED = "stopped"  # value: reason, "requested", "window_lost" or "error"
+
+
+class TelemetryChannel:
+    """Event ring plus monotonic counters, written by one thread and read by another"""
+
+    DEFAULT_CAPACITY = 1024
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self._capacity = capacity
+        self._ring = [None] * capacity
+        self._head = 0  # events ever published, written by the producer only
+        self._tail = 0  # events ever drained, written by the consumer only
+
+        # Counters, written by the producer only
+        self.keys_sent = 0
+        self.keys_by_code = [0] * 256  # key presses by virtual-key code
+        self.jumps = 0
+        self.combos = 0
+        self.pauses = 0
+        self.overruns = 0
+        self.windows_lost = 0
+        self.messages_saved = 0  # redundant key messages that were not sent
+        self.suspensions = 0  # times injection paused for the user or a hidden game
+        self.dropped = 0
+
+    def publish(self, kind: TelemetryEvent, value=None) -> bool:
+        """
+        Appends an event, called from the producer thread only
+        :return: False if the ring was full and the event was dropped
+        """
+        head = self._head
+        if head - self._tail >= self._capacity:
+            self.dropped += 1
+            return False
+        self._ring[head % self._capacity] = (time.time(), kind, value)
+        self._head = head + 1  # publishes the slot written above
+        return True
+
+    def counters(self) -> tuple:
+        """Returns a copy of the counters, e.g. to send them to another process"""
+        return (
+            self.keys_sent, list(self.keys_by_code), self.jumps, self.combos, self.pauses,
+            self.overruns, self.windows_lost, self.messages_saved, self.suspensions,
+        )
+
+    def set_counters(self, counters: tuple):
+        """Replaces the counters with a copy taken by counters(), called from the producer thread only"""
+        (
+            self.keys_sent, self.keys_by_code, self.jumps, self.combos, self.pauses,
+            self.overruns, self.windows_lost, self.messages_saved, self.suspensions,
+        ) = counters
+
+    def drain(self) -> list:
+        """Takes every published event as (timestamp, kind, value), called from the consumer thread only"""
+        tail, head = self._tail, self._head
+        if tail == head:
+            return []
+        events = [self._ring[index % self._capacity] for index in range(tail, head)]
+        self._tail = head  # frees the slots read above
+        return events
@@ -0,0 +1,265 @@
+from array import array
+
+from markov import STATES, MovementModel, compile_model
+from mytypes import Keys, MovementPattern
+
+# Keys held for every direction mask, the bits follow the W, A, S, D order
+DIRECTION_BITS = (("W", Keys.W), ("A", Keys.A), ("S", Keys.S), ("D", Keys.D))
+MASK_KEYS = tuple(
+    tuple(key for bit, (_, key) in enumerate(DIRECTION_BITS) if mask & (1 << bit))
+    for mask in range(1 << len(DIRECTION_BITS))
+)
+
+
+def direction_keys(direction: str) -> tuple:
+    """Converts a direction like "WD" to the keys that have to be held"""
+    mask = 0
+    for bit, (letter, _) in enumerate(DIRECTION_BITS):
+        if letter in direction:
+            mask |= 1 << bit
+    return MASK_KEYS[mask]
+
+
+# Fixed patterns are cycled step by step, so repeating them changes nothing
+FIXED_PATTERNS = {
+    MovementPattern.CIRCLE: tuple(map(direction_keys, ("W", "WD", "D", "SD", "S", "SA", "A", "WA"))),
+    MovementPattern.STRAFE: tuple(map(direction_keys, ("A", "D"))),
+    MovementPattern.FORWARD_BACK: tuple(map(direction_keys, ("W", "S"))),
+}
+
+
+class MovementTimeline:
+    """
+    WASD mode behavior compiled into a flat timeline of (offset, key, down)
+    events. The settings are turned into constants once, and the events are
+    generated ahead in blocks into preallocated arrays, so the sender loop only
+    walks the arrays. Offsets are seconds since the start of the timeline
+    """
+
+    BLOCK_STEPS = 16
+    MAX_EVENTS_PER_STEP = 16  # movement, extra action, random actions and combo
+
+    def __init__(
+        self,
+        key_press_time: float,
+        press_duration: float,
+        movement_path: str,
+        pattern_type: MovementPattern,
+        movement_intensity: float,
+        direction_change_frequency: float,
+        action_probability: float,
+        combo_chance: float,
+        strafe_preference: float,
+        movement_smoothness: float,
+        markov_order: int,
+        pause_frequency: float,
+        pause_duration_range: tuple,
+        random_actions: list,
+        action_combos: list,
+        sampler,
+    ):
+        self._press_duration = press_duration
+        self._pattern_type = pattern_type
+        self._custom_pattern = tuple(map(direction_keys, movement_path.upper())) or (MASK_KEYS[0],)
+        self._movement_duration = key_press_time * (0.5 + movement_intensity * 0.8)
+        self._direction_change_interval = (2.0 - direction_change_frequency) * 3.0
+        self._extra_action_chance = 0.4 * action_probability
+        self._random_action_chance = 0.2 * action_probability
+        self._combo_chance = combo_chance * action_probability
+        self._late_combo_chance = 0.3 * action_probability
+        self._smoothness_pause = 0.1 * (2.0 - movement_smoothness)
+        self._pause_frequency = pause_frequency
+        self._random_actions = random_actions
+        self._action_combos = action_combos
+
+        # Every random decision draws from its own pre-sampled stream
+        self._pause_roll = sampler.stream("pause")
+        self._pause_length = sampler.stream("pause_duration", *pause_duration_range)
+        self._movement_jitter = sampler.stream("movement_jitter", 0.8, 1.2)
+        self._press_jitter = sampler.stream("press_jitter", 0.85, 1.15)
+        self._combination_jitter = sampler.stream("combination_jitter", 0.9, 1.1)
+        self._action_roll = sampler.stream("action")
+        self._action_type = sampler.stream("action_type")
+        self._jump_gap = sampler.stream("jump_gap", 0.05, 0.15)
+        self._random_action_roll = sampler.stream("random_action")
+        self._random_action_index = sampler.integers("random_action_choice", 0, len(random_actions) - 1)
+        self._random_action_gap = sampler.stream("random_action_gap", 0.05, 0.2)
+        self._combo_roll = sampler.stream("combo")
+        self._combo_index = sampler.integers("combo_choice", 0, len(action_combos) - 1)
+        self._combo_gap = sampler.stream("combo_gap", 0.05, 0.15)
+        self._smoothness_jitter = sampler.stream("smoothness", 0.5, 1.5)
+
+        # RANDOM movement walks a Markov model, its tables are shared by timelines with the same sliders
+        self._markov = None
+        if pattern_type == MovementPattern.RANDOM:
+            self._markov = MovementModel(
+                compile_model(markov_order, strafe_preference, direction_change_frequency, movement_smoothness),
+                sampler.stream("markov_state", 0, len(STATES)),
+            )
+
+        capacity = self.BLOCK_STEPS * self.MAX_EVENTS_PER_STEP
+        self.offsets = array("d", bytes(8 * capacity))
+        self.keys = array("B", bytes(capacity))
+        self.downs = array("B", bytes(capacity))
+        self.step_starts = array("I", bytes(4 * self.BLOCK_STEPS))  # first event index of every step of the block
+        self._step_states = [None] * self.BLOCK_STEPS  # movement state before every step, to resume from
+        self.step_combos = array("B", bytes(self.BLOCK_STEPS))  # combos of every step of the block
+        self.step_pauses = array("B", bytes(self.BLOCK_STEPS))  # 1 for every step of the block that is a pause
+        self.step_jumps = array("B", bytes(self.BLOCK_STEPS))  # jumps of every step of the block
+        self.length = 0  # number of valid events in the current block
+        self.end = 0.0  # offset where the current block ends
+        self.combos = 0  # combos generated so far
+        self.pauses = 0  # pauses generated so far
+        self.jumps = 0  # jumps generated so far
+
+        self._pattern = self._next_pattern()
+        self._pattern_step = 0
+        self._last_direction_change = 0.0
+        self._replaces_movement = False  # the first step takes the place of a movement step, it is no pause
+
+    def _next_pattern(self) -> tuple:
+        """Returns the keys held on every step of the next movement pattern"""
+        if self._pattern_type in FIXED_PATTERNS:
+            return FIXED_PATTERNS[self._pattern_type]
+        if self._pattern_type == MovementPattern.CUSTOM:
+            return self._custom_pattern
+        return ()  # RANDOM movement comes from the Markov model instead
+
+    def _emit(self, offset: float, key: int, down: int):
+        index = self.length
+        self.offsets[index] = offset
+        self.keys[index] = key
+        self.downs[index] = down
+        self.length = index + 1
+
+    def _press(self, at: float, key: int, duration: float) -> float:
+        """Adds a key press with a small random variation in its duration"""
+        release = at + duration * self._press_jitter()
+        self._emit(at, key, 1)
+        self._emit(release, key, 0)
+        return release
+
+    def _press_together(self, at: float, keys: tuple, duration: float) -> float:
+        """Adds multiple keys held simultaneously"""
+        release = at + duration * self._combination_jitter()
+        for key in keys:
+            self._emit(at, key, 1)
+        for key in keys:
+            self._emit(release, key, 0)
+        return release
+
+    def _random_action(self, at: float) -> float:
+        if self._random_action_roll() < self._random_action_chance:
+            key, duration = self._random_actions[self._random_action_index()]
+            at = self._press(at, key, duration)
+
+            # Sometimes add a second random action right after the first
+            if self._random_action_roll() < 0.3:
+                at += self._random_action_gap()
+                second_key, second_duration = self._random_actions[self._random_action_index()]
+                if second_key != key:  # Avoid repeating the same key
+                    at = self._press(at, second_key, second_duration)
+        return at
+
+    def _combo(self, at: float) -> float:
+        if self._combo_roll() < self._combo_chance:
+            self.combos += 1
+            for key, duration in self._action_combos[self._combo_index()]:
+                at = self._press(at, key, duration)
+                at += self._combo_gap()
+        return at
+
+    def _step(self, at: float) -> float:
+        """Adds one movement step starting at the given offset and returns its end"""
+        # Check if we should pause movement
+        if self._replaces_movement:
+            self._replaces_movement = False
+        elif self._pause_roll() < self._pause_frequency:
+            self.pauses += 1
+            return at + self._pause_length()
+
+        if self._markov is not None:
+            movement_keys = self._markov.next_keys()
+        else:
+            # Update movement pattern based on frequency and intensity
+            if at - self._last_direction_change >= self._direction_change_interval:
+                self._pattern = self._next_pattern()
+                self._pattern_step = 0
+                self._last_direction_change = at
+
+            if self._pattern_step >= len(self._pattern):
+                self._pattern_step = 0
+            movement_keys = self._pattern[self._pattern_step]
+            self._pattern_step += 1
+
+        # Apply movement intensity with some randomness
+        movement_duration = self._movement_duration * self._movement_jitter()
+        if len(movement_keys) == 1:
+            at = self._press(at, movement_keys[0], movement_duration)
+        elif movement_keys:
+            # Multiple keys (diagonal movement)
+            at = self._press_together(at, movement_keys, movement_duration)
+
+        # Add additional actions based on probability
+        if self._action_roll() < self._extra_action_chance:
+            if self._action_type() < 0.6:  # Jump
+                self.jumps += 1
+                at += self._jump_gap()
+                at = self._press(at, Keys.SPACE, self._press_duration)
+            elif self._action_type() < 0.3:  # Sprint
+                at = self._press(at, Keys.SHIFT, self._press_duration * 2)
+            else:  # Crouch
+                at = self._press(at, Keys.CTRL, self._press_duration * 1.5)
+
+        at = self._random_action(at)
+
+        # Apply smoothness factor to pause between movements
+        at += self._smoothness_pause * self._smoothness_jitter()
+
+        # Occasionally perform combo actions
+        if self._combo_roll() < self._late_combo_chance:
+            at = self._combo(at)
+        return at
+
+    def fill(self) -> int:
+        """
+        Replaces the current block with the next one, continuing where the
+        previous block ended
+        :return: The number of events in the new block
+        """
+        self.length = 0
+        at = self.end
+        step_starts = self.step_starts
+        step_states, markov = self._step_states, self._markov
+        step_combos, step_pauses, step_jumps = self.step_combos, self.step_pauses, self.step_jumps
+        for step in range(self.BLOCK_STEPS):
+            step_starts[step] = self.length
+            step_states[step] = (
+                self._pattern, self._pattern_step, self._last_direction_change,
+                markov.context if markov is not None else None,
+            )
+            combos, pauses, jumps = self.combos, self.pauses, self.jumps
+            at = self._step(at)
+            step_combos[step] = self.combos - combos
+            step_pauses[step] = self.pauses - pauses
+            step_jumps[step] = self.jumps - jumps
+        self.end = at
+        return self.length
+
+    def resume(self, previous: "MovementTimeline", step: int, shift: float):
+        """
+        Continues the movement of a timeline compiled from other settings, so
+        a settings change does not restart the pattern or the Markov chain
+        :param previous: The timeline replaced by this one
+        :param step: The movement step of the previous block this timeline starts in place of
+        :param shift: Offset of this timeline's origin in the previous timeline
+        """
+        pattern, pattern_step, last_direction_change, context = previous._step_states[step]
+        if previous._pattern_type == self._pattern_type:
+            self._pattern = pattern
+            self._pattern_step = pattern_step
+        self._last_direction_change = last_direction_change - shift
+        if context is not None and self._markov is not None:
+            self._markov.resume(context)
+        # The step this timeline starts with was a movement step of the previous one
+        self._replaces_movement = True
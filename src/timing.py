@@ -0,0 +1,106 @@
+"""
+Strategies the scheduler uses to wait for its next deadline.
+
+A plain timed wait wakes up on the next tick of the OS timer, which is
+15.6 ms on a default Windows system, so every key hold ends up to one tick
+later than requested. The hybrid strategy sleeps coarsely until a margin
+before the deadline, then spins for the rest. The margin follows how late
+the coarse waits actually wake up, and the spinning is capped to a share of
+the elapsed time, so a precise sender never costs more than that share of
+one core:
+
+    scheduler = DeadlineScheduler(timer=HybridTimer())
+
+Every wait returns early when its wakeup event is set, exactly like the
+default wait, so new deadlines and stop() interrupt a spin as well.
+"""
+
+import threading
+import time
+
+
+class CoarseTimer:
+    """Waits on the wakeup event alone, precise to the tick of the OS timer"""
+
+    name = "coarse"
+
+    def wait(self, wakeup: threading.Event, timeout: float):
+        """Waits until the timeout elapsed or the wakeup event is set"""
+        wakeup.wait(timeout)
+
+    def summary(self) -> str:
+        return ""
+
+
+class HybridTimer:
+    """Sleeps until shortly before the deadline, then spins until it"""
+
+    name = "hybrid"
+
+    def __init__(
+        self,
+        clock=time.perf_counter,
+        margin: float = 0.002,
+        max_margin: float = 0.02,
+        cpu_cap: float = 0.1,
+    ):
+        """
+        :param clock: High-resolution clock the spin checks, with the same rate as the scheduler clock
+        :param margin: Seconds before the deadline the spin starts at least
+        :param max_margin: Seconds before the deadline the spin starts at most, however late the sleeps wake up
+        :param cpu_cap: Share of the elapsed time that may be spent spinning, the waits are coarse above it
+        """
+        self._clock = clock
+        self.min_margin = margin
+        self.max_margin = max_margin
+        self.cpu_cap = cpu_cap
+        self.margin = margin
+        self._created = clock()
+
+        self.spin_time = 0.0  # seconds spent spinning
+        self.spins = 0  # waits that ended with a spin
+        self.capped = 0  # waits that stayed coarse because the spin budget was spent
+
+    def wait(self, wakeup: threading.Event, timeout: float):
+        """Waits until the timeout elapsed or the wakeup event is set"""
+        clock = self._clock
+        deadline = clock() + timeout
+
+        margin = self.margin
+        if timeout > margin:
+            if wakeup.wait(timeout - margin):
+                return
+            # A sleep waking up late moves the next spin start earlier, one waking up early moves it later
+            late = clock() - (deadline - margin)
+            target = min(self.max_margin, max(self.min_margin, 1.5 * late))
+            self.margin += (target - margin) / 8
+
+        now = clock()
+        if now >= deadline:
+            return
+        if self.spin_time + (deadline - now) > self.cpu_cap * (now - self._created):
+            self.capped += 1
+            wakeup.wait(deadline - now)
+            return
+
+        self.spins += 1
+        spin_start = now
+        while now < deadline and not wakeup.is_set():
+            time.sleep(0)  # gives up the rest of the time slice, other threads still run
+            now = clock()
+        self.spin_time += now - spin_start
+
+    @property
+    def cpu_share(self) -> float:
+        """Share of the elapsed time spent spinning"""
+        elapsed = self._clock() - self._created
+        return self.spin_time / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"precise timing: {self.spins} spins, {self.capped} capped, margin {self.margin * 1000:.1f} ms, "
+            f"cpu {self.cpu_share * 100:.1f}%"
+        )
+
+
+TIMERS = {timer.name: timer for timer in (CoarseTimer, HybridTimer)}
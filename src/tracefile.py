@@ -0,0 +1,178 @@
+"""
+Compact binary session traces of dispatched key events.
+
+A trace is a 16 byte header followed by fixed-width 16 byte records:
+monotonic timestamp (float64), window slot (uint16), virtual key code (uint8),
+down flag (uint8) and padding. Window handles are not stored, every new handle
+gets the next slot number, and replay maps slots to the windows of the day.
+
+Writes are buffered appends. Reading memory-maps the file and exposes the
+columns as NumPy views without parsing the records:
+
+    python src/tracefile.py info session.trace
+    python src/tracefile.py replay session.trace --hwnd 0x1234 --speed max
+"""
+
+import argparse
+import mmap
+import struct
+import threading
+import time
+
+from mytypes import Hexadecimal, Handle
+
+MAGIC = b"VAFKTRC"
+VERSION = 1
+HEADER = struct.Struct("<7sBH6x")  # magic, version, record size
+RECORD = struct.Struct("<dHBB4x")  # timestamp, slot, key, down
+WRITE_BUFFER_SIZE = 1 << 16
+REPLAY_CHUNK = 1 << 16  # records converted to Python values at once during replay
+
+
+class TraceWriter:
+    """Appends key events to a trace file"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "ab", buffering=WRITE_BUFFER_SIZE)
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+
+        self._slots = {}
+        self._write = self._file.write
+        self._pack = RECORD.pack
+
+    def slot(self, hwnd: Handle) -> int:
+        """Returns the slot number of the window handle"""
+        slot = self._slots.get(hwnd)
+        if slot is None:
+            slot = self._slots[hwnd] = len(self._slots)
+        return slot
+
+    def record(self, timestamp: float, hwnd: Handle, key: Hexadecimal, down: bool):
+        self._write(self._pack(timestamp, self.slot(hwnd), key, down))
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class TraceReader:
+    """Memory-mapped view of a trace file"""
+
+    def __init__(self, path: str):
+        import numpy as np
+
+        with open(path, "rb") as file:
+            header = file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"Not a trace file: {path}")
+            magic, version, record_size = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+                raise ValueError(f"Unsupported trace file: {path}")
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        dtype = np.dtype([("timestamp", "<f8"), ("slot", "<u2"), ("key", "u1"), ("down", "u1"), ("", "V4")])
+        count = (len(self._mmap) - HEADER.size) // RECORD.size  # ignores a torn last record
+        self.records = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=HEADER.size)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def timestamps(self):
+        return self.records["timestamp"]
+
+    @property
+    def slots(self):
+        return self.records["slot"]
+
+    @property
+    def keys(self):
+        return self.records["key"]
+
+    @property
+    def downs(self):
+        return self.records["down"]
+
+    @property
+    def duration(self) -> float:
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self) else 0.0
+
+    def replay(self, backend, hwnds: list, speed: float | None = 1.0, stop_event: threading.Event | None = None) -> int:
+        """
+        Re-drives a backend with the recorded events
+        :param backend: The backend receiving the events
+        :param hwnds: Target window for every slot
+        :param speed: Playback speed relative to the recording, as fast as possible if None
+        :param stop_event: Event interrupting the replay when set
+        :return: The number of replayed events
+        """
+
+        stop_event = stop_event or threading.Event()
+        send = backend.send
+        replayed = 0
+        origin = float(self.timestamps[0]) if len(self) else 0.0
+        start = time.monotonic()
+
+        for first in range(0, len(self), REPLAY_CHUNK):
+            chunk = self.records[first:first + REPLAY_CHUNK]
+            for timestamp, slot, key, down in zip(
+                chunk["timestamp"].tolist(), chunk["slot"].tolist(), chunk["key"].tolist(), chunk["down"].tolist()
+            ):
+                if speed is not None:
+                    delay = start + (timestamp - origin) / speed - time.monotonic()
+                    if delay > 0 and stop_event.wait(delay):
+                        return replayed
+                elif stop_event.is_set():
+                    return replayed
+                send(hwnds[slot], key, bool(down))
+                replayed += 1
+        return replayed
+
+    def close(self):
+        self.records = None
+        self._mmap.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspects and replays key event traces")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    info = commands.add_parser("info", help="Prints a summary of the trace")
+    info.add_argument("path")
+
+    replay = commands.add_parser("replay", help="Sends the recorded events to a window again")
+    replay.add_argument("path")
+    replay.add_argument("--hwnd", type=lambda value: int(value, 0), nargs="+", required=True,
+                        help="Target window for every recorded slot")
+    replay.add_argument("--speed", default="1", help="Playback speed, or 'max' for as fast as possible")
+    replay.add_argument("--backend", default="postmessage", help="Backend delivering the events")
+    args = parser.parse_args()
+
+    with TraceReader(args.path) as reader:
+        if args.command == "info":
+            slots = int(reader.slots.max()) + 1 if len(reader) else 0
+            print(f"{len(reader)} events, {slots} windows, {reader.duration:.2f} s")
+            return
+
+        from backends import create_backend
+
+        backend = create_backend(args.backend)
+        speed = None if args.speed == "max" else float(args.speed)
+        start = time.perf_counter()
+        replayed = reader.replay(backend, args.hwnd, speed)
+        elapsed = time.perf_counter() - start
+        print(f"replayed {replayed} events in {elapsed:.2f} s ({replayed / elapsed:,.0f} events/s)")
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
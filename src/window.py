@@ -1,9 +1,7 @@
-import win32gui
-from PyQt6.QtCore import Qt, QTimer, QDateTime
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import (
     QKeySequence,
-    QTextOption,
-    QFont,
+    QPaintEvent,
     QDoubleValidator,
     QCloseEvent,
     QIcon,
@@ -13,7 +11,6 @@ from PyQt6.QtWidgets import (
     QSizePolicy,
     QPushButton,
     QLabel,
-    QTextEdit,
     QVBoxLayout,
     QGroupBox,
     QComboBox,
@@ -25,20 +22,13 @@ from PyQt6.QtWidgets import (
     QFrame,
 )
 
-from sender import Mode, KeySender, MovementPattern
-from mytypes import Handle, LoggingLevel
-
-
-def find_window(window_name: str) -> Handle | None:
-    """Returns window handle if found, otherwise None"""
-
-    def enum_windows_callback(hwnd, windows):
-        if window_name in win32gui.GetWindowText(hwnd):
-            windows.append(hwnd)
-
-    windows = []
-    win32gui.EnumWindows(enum_windows_callback, windows)
-    return windows[0] if windows else None
+import logwriter
+from discovery import WindowDiscovery
+from logview import LogModel, LogView
+from mytypes import Handle, LoggingLevel, Mode
+from settings import SenderSettings
+from startup import StartupTimer
+from telemetry import TelemetryEvent
 
 
 class MainWindow(QMainWindow):
@@ -48,8 +38,17 @@ class MainWindow(QMainWindow):
         NOT_FOUND = "<font color='#ff4444'>Not Found</font>"
         FOUND = "<font color='#44ff44'>Found</font>"
 
-    def __init__(self, parent=None, flags=Qt.WindowType.Widget):
+    STOP_TIMEOUT = 0.1  # seconds to wait for the sender thread on stop
+    LOG_MAX_LINES = 10_000  # console lines kept, older lines are dropped
+    TELEMETRY_INTERVAL = 500  # milliseconds between two drains of the sender telemetry
+    SETTINGS_INTERVAL = 100  # milliseconds, setting changes within it are published as one snapshot
+
+    # Emitted from the window discovery thread, delivered on the GUI thread
+    valorant_window_changed = pyqtSignal(object)
+
+    def __init__(self, parent=None, flags=Qt.WindowType.Widget, startup_timer: StartupTimer | None = None):
         super().__init__(parent, flags)
+        self.startup_timer = startup_timer
 
         self.setWindowTitle("Valorant AFK bot")
         self.setSizePolicy(QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Minimum)
@@ -126,7 +125,7 @@ class MainWindow(QMainWindow):
                 height: 14px;
                 image: url(assets/down-arrow.png);
             }
-            QTextEdit {
+            QListView {
                 background-color: #1e1e1e;
                 color: #ffffff;
                 border: 1px solid #3d3d3d;
@@ -170,18 +169,39 @@ class MainWindow(QMainWindow):
 
         self.aafk = None
         self._anti_afk_status = False
-        self._anti_afk_settings = {}
+        self._anti_afk_settings = SenderSettings()
+        self._pending_settings = {}
         self._anti_afk_mode = Mode.LIGHT
         self._console_open = False
         self._valorant_status = False
         self._advanced_settings_visible = False
+        self._first_paint_done = False
+        self.log_model = LogModel(self.LOG_MAX_LINES, parent=self)
+
+        # Sender events are drained in batches, never delivered one signal at a time
+        self.telemetry_timer = QTimer(self)
+        self.telemetry_timer.setInterval(self.TELEMETRY_INTERVAL)
+        self.telemetry_timer.timeout.connect(self.drain_telemetry)
+
+        # Slider drags change settings on every tick, the sender only gets a snapshot now and then
+        self.settings_timer = QTimer(self)
+        self.settings_timer.setSingleShot(True)
+        self.settings_timer.setInterval(self.SETTINGS_INTERVAL)
+        self.settings_timer.timeout.connect(self.publish_settings)
+
+        # Hidden panels are only built when they are shown for the first time
+        self.console = None
+        self.heavy_mode_settings_group = None
+        self.advanced_settings_group = None
 
         self._init_ui()
         self._connect_signals()
 
-        self.valorant_status_timer = QTimer(self)
-        self.valorant_status_timer.timeout.connect(self.update_valorant_status)
-        self.valorant_status_timer.start(5000)
+        # The first window scan starts after the first paint
+        self.valorant_window_changed.connect(self.update_valorant_status)
+        self.window_discovery = WindowDiscovery(
+            "VALORANT", on_change=self.valorant_window_changed.emit
+        )
 
     def _init_ui(self):
         self.start_button = self._create_button("Start", enabled=True)
@@ -196,7 +216,19 @@ class MainWindow(QMainWindow):
             "font-size: 14px; font-weight: bold; padding: 5px;"
         )
 
-        self.console = self._create_console()
+        self.process_checkbox = QCheckBox("Run in separate process")
+        self.process_checkbox.setToolTip(
+            "Sends keys from a child process, so a busy window does not delay key presses"
+        )
+
+        self.idle_checkbox = QCheckBox("Pause while I play")
+        self.idle_checkbox.setToolTip(
+            "Sends no keys while you play or the game is minimized, only shortly before the AFK timeout"
+        )
+
+        self.telemetry_label = QLabel()
+        self.telemetry_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.telemetry_label.setStyleSheet("color: #999999;")
 
         controls_layout = QVBoxLayout()
         controls_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
@@ -204,9 +236,12 @@ class MainWindow(QMainWindow):
         controls_layout.addWidget(self.start_button)
         controls_layout.addWidget(self.stop_button)
         controls_layout.addWidget(self.console_button)
+        controls_layout.addWidget(self.process_checkbox)
+        controls_layout.addWidget(self.idle_checkbox)
         controls_layout.addWidget(self.status_label)
+        controls_layout.addWidget(self.telemetry_label)
         controls_layout.addStretch()
-        controls_layout.addWidget(self.console, 1)
+        self._controls_layout = controls_layout
 
         self.controls_group = QGroupBox("Control")
         self.controls_group.setLayout(controls_layout)
@@ -216,7 +251,7 @@ class MainWindow(QMainWindow):
         self.window_status_label.setStyleSheet(
             "font-size: 14px; font-weight: bold; padding: 5px;"
         )
-        self.update_valorant_status()
+        self.update_valorant_status(None)
 
         # Mode selection
         self.mode_input = QComboBox()
@@ -235,19 +270,13 @@ class MainWindow(QMainWindow):
             "color: #aaaaaa; font-style: italic; padding: 5px; font-size: 11px;"
         )
 
-        # Basic settings
+        # Basic settings, the WASD group is created when that mode is selected
         self.light_mode_settings_group = self._create_light_mode_settings()
-        self.heavy_mode_settings_group = self._create_heavy_mode_settings()
-        self.heavy_mode_settings_group.hide()
 
         # Advanced settings toggle
         self.advanced_toggle = QPushButton("Show Advanced Settings")
         self.advanced_toggle.setStyleSheet("QPushButton { min-width: 160px; font-size: 11px; }")
         self.advanced_toggle.hide()
-        
-        # Advanced settings (initially hidden)
-        self.advanced_settings_group = self._create_advanced_settings()
-        self.advanced_settings_group.hide()
 
         settings_layout = QVBoxLayout()
         settings_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
@@ -256,10 +285,9 @@ class MainWindow(QMainWindow):
         settings_layout.addLayout(mode_layout)
         settings_layout.addWidget(self.hint_label)
         settings_layout.addWidget(self.light_mode_settings_group)
-        settings_layout.addWidget(self.heavy_mode_settings_group)
         settings_layout.addWidget(self.advanced_toggle)
-        settings_layout.addWidget(self.advanced_settings_group)
         settings_layout.addStretch()
+        self._settings_layout = settings_layout
 
         settings_group = QGroupBox("Settings")
         settings_group.setLayout(settings_layout)
@@ -287,13 +315,9 @@ class MainWindow(QMainWindow):
         return button
 
     def _create_console(self):
-        console = QTextEdit("")
-        console.setReadOnly(True)
-        console.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
-        console.setWordWrapMode(QTextOption.WrapMode.NoWrap)
-        console.setFont(QFont("Consolas", 10))
+        console = LogView(self.log_model)
         console.setStyleSheet("""
-            QTextEdit {
+            QListView {
                 background-color: #1a1a1a;
                 color: #ffffff;
                 border: 1px solid #3d3d3d;
@@ -442,6 +466,7 @@ class MainWindow(QMainWindow):
         self.stop_button.clicked.connect(self.stop_anti_afk)
         self.console_button.clicked.connect(self.toggle_console)
         self.advanced_toggle.clicked.connect(self.toggle_advanced_settings)
+        self.idle_checkbox.toggled.connect(lambda checked: self.update_aafk_settings(idle_aware=checked))
 
         # Mode selection
         self.mode_input.currentIndexChanged.connect(
@@ -452,12 +477,35 @@ class MainWindow(QMainWindow):
         delay_input = self.light_mode_settings_group.findChild(QLineEdit)
         delay_input.textChanged.connect(self.change_light_mode_delay)
 
-        # Basic settings - Heavy mode
+    def _ensure_console(self):
+        """Creates the console on first use, it shows the lines logged so far"""
+        if self.console is not None:
+            return
+        self.console = self._create_console()
+        self._controls_layout.addWidget(self.console, 1)
+
+    def _ensure_heavy_mode_settings(self):
+        """Creates the WASD settings group when that mode is selected for the first time"""
+        if self.heavy_mode_settings_group is not None:
+            return
+        self.heavy_mode_settings_group = self._create_heavy_mode_settings()
+        self.heavy_mode_settings_group.hide()
+        index = self._settings_layout.indexOf(self.light_mode_settings_group) + 1
+        self._settings_layout.insertWidget(index, self.heavy_mode_settings_group)
+
         heavy_mode_inputs = self.heavy_mode_settings_group.findChildren(QLineEdit)
         heavy_mode_inputs[0].textChanged.connect(self.change_heavy_mode_delay)
         heavy_mode_inputs[1].textChanged.connect(self.change_heavy_mode_path)
 
-        # Advanced settings
+    def _ensure_advanced_settings(self):
+        """Creates the advanced settings group when it is shown for the first time"""
+        if self.advanced_settings_group is not None:
+            return
+        self.advanced_settings_group = self._create_advanced_settings()
+        self.advanced_settings_group.hide()
+        index = self._settings_layout.indexOf(self.advanced_toggle) + 1
+        self._settings_layout.insertWidget(index, self.advanced_settings_group)
+
         self.pattern_combo.currentTextChanged.connect(self.change_pattern_type)
         self.intensity_slider["slider"].valueChanged.connect(
             lambda v: self.update_aafk_settings(movement_intensity=v/100)
@@ -481,6 +529,7 @@ class MainWindow(QMainWindow):
     def toggle_advanced_settings(self):
         self._advanced_settings_visible = not self._advanced_settings_visible
         if self._advanced_settings_visible:
+            self._ensure_advanced_settings()
             self.advanced_settings_group.show()
             self.advanced_toggle.setText("Hide Advanced Settings")
             self.setMinimumSize(500, 650)
@@ -489,8 +538,7 @@ class MainWindow(QMainWindow):
             self.advanced_toggle.setText("Show Advanced Settings")
             self.setMinimumSize(500, 400)
 
-    def update_valorant_status(self):
-        valorant_hwnd = find_window("VALORANT")
+    def update_valorant_status(self, valorant_hwnd: Handle | None):
         self._valorant_status = valorant_hwnd is not None
         self.window_status_label.setText(
             f"Valorant: {self.Status.FOUND if self._valorant_status else self.Status.NOT_FOUND}"
@@ -516,11 +564,14 @@ class MainWindow(QMainWindow):
         self._anti_afk_mode = mode
         if mode == Mode.LIGHT:
             self.light_mode_settings_group.show()
-            self.heavy_mode_settings_group.hide()
+            if self.heavy_mode_settings_group is not None:
+                self.heavy_mode_settings_group.hide()
             self.advanced_toggle.hide()
-            self.advanced_settings_group.hide()
+            if self.advanced_settings_group is not None:
+                self.advanced_settings_group.hide()
             self._advanced_settings_visible = False
         else:
+            self._ensure_heavy_mode_settings()
             self.light_mode_settings_group.hide()
             self.heavy_mode_settings_group.show()
             self.advanced_toggle.show()
@@ -550,10 +601,29 @@ class MainWindow(QMainWindow):
             )
 
     def update_aafk_settings(self, **kwargs):
-        self._anti_afk_settings.update(kwargs)
+        """Queues setting changes, they are published together at most every SETTINGS_INTERVAL"""
+        self._pending_settings.update(kwargs)
+        if not self.settings_timer.isActive():
+            self.settings_timer.start()
+
+    def publish_settings(self):
+        """Turns the queued changes into a new settings snapshot and hands it to the sender"""
+        self.settings_timer.stop()
+        changes, self._pending_settings = self._pending_settings, {}
+        try:
+            settings = self._anti_afk_settings.merge(changes)
+        except ValueError as e:
+            self.log(f"Invalid settings: {e}", LoggingLevel.ERROR)
+            return
+        if settings is self._anti_afk_settings:
+            return
+
+        changed = settings.diff(self._anti_afk_settings)
+        self._anti_afk_settings = settings
         if self.aafk:
-            self.aafk.update_settings(self._anti_afk_settings)
-            self.log(f"Settings updated: {kwargs}", LoggingLevel.INFO)
+            self.aafk.update_settings(settings)
+            changed = {name: getattr(value, "value", value) for name, value in changed.items()}
+            self.log(f"Settings updated: {changed}", LoggingLevel.INFO, coalesce="settings")
 
     def change_light_mode_delay(self, delay):
         if delay:
@@ -586,40 +656,26 @@ class MainWindow(QMainWindow):
     def toggle_console(self):
         self._console_open = not self._console_open
         if self._console_open:
+            self._ensure_console()
             self.console.show()
             self.console_button.setText("Hide Logs")
         else:
             self.console.hide()
             self.console_button.setText("Show Logs")
 
-    def log(self, text, level: LoggingLevel = LoggingLevel.INFO):
-        """Enhanced logging with timestamp and color coding based on logging level"""
-        timestamp = QDateTime.currentDateTime().toString("HH:mm:ss")
-
-        # Color mapping based on logging level
-        color_map = {
-            LoggingLevel.DEBUG: "#cccccc",    # light gray for debug
-            LoggingLevel.INFO: "#ffffff",     # white for info
-            LoggingLevel.WARNING: "#ffcc66",  # orange for warnings
-            LoggingLevel.ERROR: "#ff6b6b"     # red for errors
-        }
-        
-        color = color_map.get(level, "#ffffff")
-        level_text = f"[{level.value}]"
-
-        log_entry = f"<span style='color: #999999;'>[{timestamp}] {level_text}</span> <span style='color: {color};'>{text}</span>"
-
-        # Scroll to bottom only if we were already at the bottom
-        scrollbar = self.console.verticalScrollBar()
-        at_bottom = scrollbar.value() == scrollbar.maximum()
-
-        self.console.append(log_entry)
-
-        if at_bottom:
-            scrollbar.setValue(scrollbar.maximum())
+    def log(self, text, level: LoggingLevel = LoggingLevel.INFO, coalesce: str | None = None):
+        """
+        Queues a console line, safe to call from any thread. Lines are shown in
+        batches and only the last LOG_MAX_LINES lines are kept
+        :param coalesce: Key of lines superseding each other, e.g. while a slider is dragged
+        """
+        self.log_model.append(text, level, coalesce)
+        writer = logwriter.installed()
+        if writer is not None:
+            writer.write(level, "gui", text)
 
     def start_anti_afk(self):
-        valorant_hwnd = find_window("VALORANT")
+        valorant_hwnd = self.window_discovery.hwnd
         if not valorant_hwnd:
             self.log("VALORANT not found!", LoggingLevel.ERROR)
             return
@@ -629,26 +685,112 @@ class MainWindow(QMainWindow):
             return
 
         try:
-            self.aafk = KeySender(self._anti_afk_mode, valorant_hwnd)
+            self.publish_settings()
+
+            # The sender modules are only needed once the anti-AFK is started
+            from sender import KeySender
+            from worker import SenderProcess
+
+            if self.process_checkbox.isChecked():
+                writer = logwriter.installed()
+                sender_class = SenderProcess
+                self.aafk = SenderProcess(
+                    self._anti_afk_mode, valorant_hwnd, log_path=writer.sibling("worker") if writer else None
+                )
+            else:
+                sender_class = KeySender
+                self.aafk = KeySender(self._anti_afk_mode, valorant_hwnd)
             self.aafk.update_settings(self._anti_afk_settings)
             self.aafk.start()
             self.anti_afk_status = True
-            self.log(f"Anti-AFK started in mode: {self._anti_afk_mode.value}", LoggingLevel.INFO)
+            self.process_checkbox.setEnabled(False)
+            self.telemetry_timer.start()
+            self.log(
+                f"Anti-AFK started in mode: {self._anti_afk_mode.value}"
+                f"{' (separate process)' if sender_class is SenderProcess else ''}",
+                LoggingLevel.INFO,
+            )
         except Exception as e:
             self.log(f"Error during startup: {str(e)}", LoggingLevel.ERROR)
 
     def stop_anti_afk(self):
         if self.aafk:
             self.aafk.stop()
-            self.log("Anti-AFK stopped", LoggingLevel.INFO)
-
+            # The sender exits within milliseconds, so the GUI barely waits here
+            self.aafk.join(self.STOP_TIMEOUT)
+            if self.aafk.is_alive():
+                self.log("Anti-AFK thread did not exit in time", LoggingLevel.WARNING)
+            elif self.aafk.stop_latency is not None:
+                self.log(
+                    f"Anti-AFK stopped in {self.aafk.stop_latency * 1000:.2f} ms "
+                    f"({self.aafk.wakeups_per_action:.2f} wakeups per action)",
+                    LoggingLevel.INFO,
+                )
+            else:
+                self.log("Anti-AFK stopped", LoggingLevel.INFO)
+
+            dispatch_summary = self.aafk.dispatch_summary()
+            if dispatch_summary:
+                self.log(f"Key dispatch: {dispatch_summary}", LoggingLevel.INFO)
+
+        self.telemetry_timer.stop()
+        self.drain_telemetry()
         self.anti_afk_status = False
+        self.process_checkbox.setEnabled(True)
+
+    def drain_telemetry(self):
+        """Applies the telemetry published by the sender since the last drain"""
+        if self.aafk is None:
+            return
+        telemetry = self.aafk.telemetry
+        self.telemetry_label.setText(
+            f"Keys: {telemetry.keys_sent}  Combos: {telemetry.combos}  Pauses: {telemetry.pauses}"
+        )
+
+        stopped_by_sender = False
+        for _, kind, value in telemetry.drain():
+            if kind == TelemetryEvent.WINDOW_LOST:
+                self.log("VALORANT window lost, Anti-AFK stopped", LoggingLevel.WARNING)
+            elif kind == TelemetryEvent.OVERRUN:
+                self.log(f"Anti-AFK ran {value * 1000:.1f} ms late", LoggingLevel.WARNING, coalesce="overrun")
+            elif kind == TelemetryEvent.SUSPENDED:
+                self.log("Anti-AFK paused while you play", LoggingLevel.INFO, coalesce="suspended")
+            elif kind == TelemetryEvent.RESUMED:
+                self.log("Anti-AFK resumed", LoggingLevel.INFO, coalesce="suspended")
+            elif kind == TelemetryEvent.STOPPED and value != "requested":
+                stopped_by_sender = True
+
+        if stopped_by_sender and self.anti_afk_status:
+            # The sender stopped on its own, e.g. the game was closed
+            self.telemetry_timer.stop()
+            self.anti_afk_status = False
+            self.process_checkbox.setEnabled(True)
+
+    def paintEvent(self, event: QPaintEvent):
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            if self.startup_timer is not None:
+                self.startup_timer.mark("first paint")
+            QTimer.singleShot(0, self._after_first_paint)
+
+    def _after_first_paint(self):
+        """Starts the work that is not needed to show the first frame"""
+        self.window_discovery.start()
+        if self.startup_timer is not None:
+            summary = self.startup_timer.summary()
+            logwriter.log(
+                LoggingLevel.DEBUG, "startup", summary,
+                phases_ms={name: round(seconds * 1000, 1) for name, seconds in self.startup_timer.phases},
+            )
+            self.log_model.append(summary, LoggingLevel.DEBUG)
 
     def closeEvent(self, event: QCloseEvent):
         """When closing the application, stop all threads"""
         self.stop_anti_afk()
         self.log("Application closing...", LoggingLevel.INFO)
-        # Give threads some time to finish
+        # Give threads some time to finish releasing held keys
         if self.aafk:
             self.aafk.join(1.0)
+        self.window_discovery.stop()
         super().closeEvent(event)
@@ -0,0 +1,235 @@
+"""
+KeySender running in a child process, out of reach of the GUI and its GIL.
+
+The parent keeps a SenderProcess, which mirrors the KeySender interface used
+by the GUI. Both sides talk over one duplex pipe with small tuples:
+
+    parent -> child: ("settings", SenderSettings), ("stop",)
+    child -> parent: ("started",), ("error", message),
+                     ("telemetry", running, events_sent, wakeups_per_action, mean_lag, max_lag, counters, events),
+                     ("stopped", events_sent, wakeups_per_action, mean_lag, max_lag, dispatch_summary, counters, events)
+
+counters and events carry the telemetry channel of the child sender, they are
+republished into the telemetry channel of the SenderProcess.
+"""
+
+import multiprocessing
+import threading
+import time
+
+from mytypes import Handle
+from settings import SenderSettings
+from telemetry import TelemetryChannel
+
+START_TIMEOUT = 10.0  # seconds the child may take to import everything and create its sender
+DEFAULT_TELEMETRY_INTERVAL = 1.0
+
+
+def _worker_main(connection, mode, window_handle: Handle, press_duration: float, settings: SenderSettings,
+                 backend_name: str | None, telemetry_interval: float, log_path: str | None):
+    """Entry point of the child process"""
+    import logwriter
+    from backends import create_backend
+    from sender import KeySender
+
+    writer = None
+    if log_path:
+        try:
+            writer = logwriter.StructuredLogWriter(log_path)
+            logwriter.install(writer)
+        except OSError:
+            pass
+
+    send_lock = threading.Lock()
+
+    def send(*message):
+        with send_lock:
+            connection.send(message)
+
+    def report(*message):
+        """Sends the message with the telemetry of the sender, the lock keeps the drain single-consumer"""
+        with send_lock:
+            telemetry = sender.telemetry
+            connection.send((*message, telemetry.counters(), telemetry.drain()))
+
+    try:
+        backend = create_backend(backend_name) if backend_name else None
+        sender = KeySender(mode, window_handle, press_duration, backend=backend)
+        sender.update_settings(settings)
+    except Exception as e:
+        send("error", str(e))
+        if writer is not None:
+            writer.close()
+        return
+
+    def listen():
+        """Applies commands from the parent and reports telemetry between them"""
+        try:
+            while True:
+                if connection.poll(telemetry_interval):
+                    message = connection.recv()
+                    if message[0] == "settings":
+                        sender.update_settings(message[1])
+                    elif message[0] == "stop":
+                        sender.stop()
+                        return
+                else:
+                    report("telemetry", sender.running, sender.events_sent, sender.wakeups_per_action,
+                           sender.mean_lag, sender.max_lag)
+        except (EOFError, OSError):
+            sender.stop()  # the parent is gone
+
+    send("started")
+    threading.Thread(target=listen, name="WorkerListener", daemon=True).start()
+    sender.run()  # the sender runs on the main thread of the child
+    if backend is not None:
+        backend.close()
+    report("stopped", sender.events_sent, sender.wakeups_per_action, sender.mean_lag, sender.max_lag,
+           sender.dispatch_summary())
+    if writer is not None:
+        writer.close()
+
+
+class SenderProcess:
+    """
+    Handle of a KeySender running in a child process. It has the parts of the
+    KeySender interface the GUI uses, the values reported by the child are
+    updated in the background from its telemetry
+    """
+
+    def __init__(
+        self,
+        mode,
+        window_handle: Handle,
+        press_duration: float = 0.1,
+        backend_name: str | None = None,
+        telemetry_interval: float = DEFAULT_TELEMETRY_INTERVAL,
+        log_path: str | None = None,
+    ):
+        """
+        Creates a new sender process, it is not started yet
+        :param mode: The mode of the KeySender
+        :param window_handle: The window handle of the game
+        :param press_duration: Duration of key press in seconds
+        :param backend_name: Name of the backend created in the child, the KeySender default if None
+        :param telemetry_interval: Seconds between telemetry reports of the child
+        :param log_path: Structured log file of the child, its messages are printed if None
+        """
+
+        self.mode = mode
+        self.valorant_hwnd = window_handle
+        self._press_duration = press_duration
+        self._backend_name = backend_name
+        self._telemetry_interval = telemetry_interval
+        self._log_path = log_path
+        self.settings = SenderSettings()
+
+        self._connection = None
+        self._process = None
+        self._reader = None
+        self._stopped = threading.Event()
+        self._stop_requested_at = None
+
+        self.running = False
+        self.stop_latency = None  # seconds between stop() and the stop report of the child
+        self.events_sent = 0
+        self.wakeups_per_action = 0.0
+        self.mean_lag = 0.0
+        self.max_lag = 0.0
+        self._dispatch_summary = ""
+        self.telemetry = TelemetryChannel()  # the reader thread is its producer
+
+    def update_settings(self, settings: SenderSettings | dict):
+        """
+        Sends the settings to the child, they are applied on start if it is not running yet
+        :param settings: A new snapshot, or the changes to apply to the current one
+        :raises ValueError: If a setting is invalid
+        """
+        if isinstance(settings, dict):
+            settings = self.settings.merge(settings)
+        self.settings = settings
+        if self._connection is not None and self.running:
+            try:
+                self._connection.send(("settings", settings))
+            except OSError:
+                pass
+
+    def start(self):
+        """Starts the child process and waits until its sender is created"""
+        context = multiprocessing.get_context("spawn")
+        self._connection, child_connection = context.Pipe()
+        self._process = context.Process(
+            target=_worker_main,
+            args=(child_connection, self.mode, self.valorant_hwnd, self._press_duration, self.settings,
+                  self._backend_name, self._telemetry_interval, self._log_path),
+            name="KeySenderWorker",
+            daemon=True,
+        )
+        self._process.start()
+        child_connection.close()
+
+        if not self._connection.poll(START_TIMEOUT):
+            self._process.kill()
+            raise RuntimeError("Sender process did not start in time")
+        message = self._connection.recv()
+        if message[0] == "error":
+            self._process.join()
+            raise ValueError(message[1])
+
+        self.running = True
+        self._reader = threading.Thread(target=self._read, name="WorkerReader", daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        """Keeps the mirrored values up to date with the messages of the child"""
+        try:
+            while True:
+                message = self._connection.recv()
+                *values, counters, events = message
+                telemetry = self.telemetry
+                telemetry.set_counters(counters)
+                for _, kind, value in events:
+                    telemetry.publish(kind, value)
+
+                if message[0] == "telemetry":
+                    running, self.events_sent, self.wakeups_per_action, self.mean_lag, self.max_lag = values[1:]
+                    self.running = running and self._stop_requested_at is None
+                elif message[0] == "stopped":
+                    self.events_sent, self.wakeups_per_action, self.mean_lag, self.max_lag, self._dispatch_summary = (
+                        values[1:]
+                    )
+                    break
+        except (EOFError, OSError):
+            pass
+
+        if self._stop_requested_at is not None:
+            self.stop_latency = time.perf_counter() - self._stop_requested_at
+        self.running = False
+        self._stopped.set()
+
+    def stop(self):
+        """Asks the child to release all held keys and exit"""
+        if self._stop_requested_at is None:
+            self._stop_requested_at = time.perf_counter()
+        self.running = False
+        if self._connection is not None:
+            try:
+                self._connection.send(("stop",))
+            except OSError:
+                pass
+
+    def join(self, timeout: float | None = None):
+        """Waits until the child has reported its stop and exited"""
+        if self._process is None:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._stopped.wait(timeout)
+        self._process.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def is_alive(self) -> bool:
+        """Whether the sender in the child has not reported its stop yet"""
+        return self._process is not None and self._process.is_alive() and not self._stopped.is_set()
+
+    def dispatch_summary(self) -> str:
+        """Statistics of the key dispatch in the child, empty until it has stopped"""
+        return self._dispatch_summary